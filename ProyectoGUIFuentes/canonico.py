@@ -0,0 +1,96 @@
+# canonico.py
+"""
+Forma canónica de una instancia, para que la caché reconozca instancias
+equivalentes.
+
+Dos instancias tienen el mismo plan óptimo de movimientos si:
+- sus valores v difieren por una transformación afín v' = a * v + b
+  (a != 0): la mediana se transforma igual y la polarización queda
+  multiplicada por |a|;
+- difieren en opiniones vacías de los extremos que nadie puede alcanzar
+  (ver presolve.py);
+- ct o maxMovs difieren solo por encima de lo que la instancia puede
+  llegar a usar, o ct difiere por debajo de la resolución del costo.
+
+La forma canónica usa v entero con mínimo 0 y MCD 1 (v_int de
+escalado_exacto), orientado para que la tupla sea la menor entre v y su
+reflejo. descanonizar() lleva el resultado de la forma canónica a la
+instancia original.
+"""
+
+import hashlib
+import json
+from fractions import Fraction
+from typing import Dict, Tuple
+
+from generar_dzn import CLAVES_INSTANCIA, escalado_exacto
+from presolve import expandir_resultado, reducir_instancia
+
+
+def canonizar(parsed: Dict) -> Tuple[Dict, Dict]:
+    """
+    Returns:
+        (canonico, transformacion): la instancia canónica (mismo formato que
+        parse_input_text) y los datos para descanonizar
+    """
+    reducido, mapa = reducir_instancia(parsed)
+    esc = escalado_exacto(reducido)
+
+    v_int = esc['v_int']
+    tope = max(v_int)
+    reflejo = [tope - x for x in v_int]
+    invertido = reflejo < v_int
+    v_canonico = reflejo if invertido else v_int
+
+    # Lo máximo que la instancia puede llegar a usar: mover a todos al extremo más lejano
+    m = reducido['m']
+    distancias = [max(i, m - 1 - i) for i in range(m)]
+    movs_max = sum(sum(fila) * d for fila, d in zip(reducido['s'], distancias))
+    costo_max = sum(fila[k] * esc['peso_costo'][k] * d
+                    for fila, d in zip(reducido['s'], distancias) for k in range(3))
+
+    canonico = dict(reducido)
+    canonico['v'] = [float(x) for x in v_canonico]
+    canonico['ct'] = float(Fraction(min(esc['ct_int'], costo_max)) / esc['escala_costo'])
+    canonico['max_movs'] = min(reducido['max_movs'], movs_max)
+
+    transformacion = {
+        "mapa": mapa,
+        "v_base": esc['v_base'],
+        "factor_v": esc['factor_v'],
+        "tope": tope,
+        "invertido": invertido,
+    }
+    return canonico, transformacion
+
+
+def hash_canonico(parsed: Dict) -> str:
+    """Hash de la forma canónica: igual para todas las instancias equivalentes."""
+    canonico, _ = canonizar(parsed)
+    datos = {k: canonico[k] for k in CLAVES_INSTANCIA}
+    return hashlib.sha256(json.dumps(datos, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _escalar(valor, factor_v: Fraction) -> float:
+    return float(Fraction(repr(float(valor))) * factor_v)
+
+
+def descanonizar(resultado: Dict, transformacion: Dict) -> Dict:
+    """
+    Lleva un resultado de la instancia canónica a la original: escala la
+    polarización (y objetivo/cota), deshace la transformación de la mediana
+    y devuelve p_final y las matrices a los índices originales.
+    """
+    if not isinstance(resultado, dict) or "error" in resultado:
+        return resultado
+    factor_v = transformacion["factor_v"]
+    original = dict(resultado)
+    for clave in ("polarizacion", "objetivo", "cota"):
+        if isinstance(original.get(clave), (int, float)):
+            original[clave] = _escalar(original[clave], factor_v)
+    if isinstance(original.get("mediana"), (int, float)):
+        mediana = Fraction(repr(float(original["mediana"])))
+        if transformacion["invertido"]:
+            mediana = transformacion["tope"] - mediana
+        original["mediana"] = float(transformacion["v_base"] + mediana * factor_v)
+    return expandir_resultado(original, transformacion["mapa"])
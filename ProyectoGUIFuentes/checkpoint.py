@@ -0,0 +1,75 @@
+# checkpoint.py
+"""
+Checkpoints de la mejor solución durante resoluciones largas.
+
+MiniZincRunner.run (y MiniZincPythonRunner) escriben cada solución que
+mejora en un archivo JSON, de forma atómica: temporal en la misma carpeta,
+fsync y os.replace. Si el proceso muere queda la última incumbente
+completa, nunca un archivo a medias.
+
+Al volver a resolver con el mismo checkpoint, el pipeline la recarga, la
+verifica contra la instancia y se la pasa al modelo como cota superior
+(cota_polarizacion) y arranque en caliente (x_inicial). Si la nueva
+ejecución no mejora a tiempo, se devuelve la del checkpoint.
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from generar_dzn import escalado_exacto
+from verificador import calcular_mediana_doble, matrices_a_x, verificar_solucion
+
+
+def ruta_checkpoint(directorio, nombre) -> str:
+    """Ruta del checkpoint de un trabajo dentro de `directorio` (la crea si falta)."""
+    Path(directorio).mkdir(parents=True, exist_ok=True)
+    seguro = re.sub(r"[^\w.-]", "_", str(nombre))
+    return str(Path(directorio) / f"{seguro}.checkpoint.json")
+
+
+def guardar_checkpoint(path, resultado: Dict):
+    """Guarda una solución de forma atómica."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding='utf-8') as f:
+        json.dump({"guardado_en": time.time(), "resultado": resultado}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def cargar_checkpoint(path, parsed: Dict) -> Optional[Dict]:
+    """
+    Última solución guardada en `path`, si existe y es válida para la
+    instancia (con las métricas recalculadas).
+    """
+    try:
+        resultado = json.loads(Path(path).read_text(encoding='utf-8'))["resultado"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(resultado, dict) or "matrices_movimiento" not in resultado:
+        return None
+    verificacion = verificar_solucion(parsed, resultado)
+    if not verificacion["valido"]:
+        return None
+    return dict(resultado, **verificacion["recalculado"])
+
+
+def arranque_desde(parsed: Dict, resultado: Dict) -> Tuple:
+    """
+    (x_inicial, cota_polarizacion) para generate_dzn a partir de una solución
+    verificada: su plan y su polarización en la escala entera del modelo.
+    """
+    m = parsed['m']
+    x = matrices_a_x(resultado["matrices_movimiento"], m)
+    v_int = np.asarray(escalado_exacto(parsed)['v_int'], dtype=np.int64)
+    p_final = np.asarray(resultado["p_final"], dtype=np.int64)
+    mediana_doble = calcular_mediana_doble(p_final, v_int)
+    polarizacion_doble = int((p_final * np.abs(2 * v_int - mediana_doble)).sum())
+    return x.tolist(), polarizacion_doble
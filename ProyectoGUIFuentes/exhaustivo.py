@@ -0,0 +1,240 @@
+# exhaustivo.py
+"""
+Resolución exacta por enumeración para instancias pequeñas, sin MiniZinc.
+
+Para instancias chicas lanzar MiniZinc y aplanar el modelo cuesta mucho
+más que la búsqueda. Aquí se recorren las opiniones de origen una por una:
+cada una aporta un vector de movimientos y[j] (personas que van de i a j)
+cuyo costo mínimo se calcula sin enumerar resistencias, y los estados se
+combinan con NumPy podando por maxMovs y ct. Como la polarización depende
+solo de p_final, de cada p_final alcanzable se conservan únicamente los
+planes no dominados en (movimientos, costo). Al final se evalúan en bloque
+la mediana y la polarización de todos los p_final y se reconstruye el plan
+óptimo.
+
+Si la enumeración supera MAX_FILAS en algún paso se abandona (devuelve
+None) y el pipeline usa MiniZinc.
+"""
+
+import itertools
+import math
+from fractions import Fraction
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from generar_dzn import CLAVES_MATRICES, cotas_movimiento, escalado_exacto
+from run_mzn import OPTIMO
+
+# Cantidad de p_final posibles (ver estados_posibles) hasta la que el
+# pipeline intenta la vía exhaustiva
+UMBRAL_EXHAUSTIVO = 12_000
+
+# Filas máximas de un paso de la enumeración antes de abandonar
+MAX_FILAS = 2_000_000
+
+
+def _pesos_acumulados(s_i, pesos):
+    """
+    W[r] = suma de los pesos de las r personas más baratas de la opinión
+    (primero las de resistencia baja, luego media, luego alta).
+    """
+    por_persona = np.repeat(np.asarray(pesos, dtype=np.int64), s_i)
+    return np.concatenate(([0], np.cumsum(por_persona)))
+
+
+def _opciones_origen(i, s_i, cotas, distancias, max_movs, pesos, ct_int):
+    """
+    Vectores y[j] de personas que salen de la opinión i hacia cada j que
+    respetan p[i], maxMovs y ct, con su costo mínimo.
+
+    El costo mínimo de un vector y se obtiene moviendo a las personas de
+    menor resistencia y dándoles los destinos más lejanos (desigualdad de
+    reordenamiento), así que la resistencia no hace falta enumerarla.
+
+    Returns:
+        (destinos, y, movs, costo) con los destinos ordenados de más lejano
+        a más cercano, o None si hay demasiadas combinaciones
+    """
+    m = len(cotas)
+    destinos = sorted((j for j in range(m) if max(cotas[i][j]) > 0),
+                      key=lambda j: distancias[i, j], reverse=True)
+    rangos = [range(min(sum(s_i), sum(cotas[i][j])) + 1) for j in destinos]
+    total = 1
+    for r in rangos:
+        total *= len(r)
+    if total > MAX_FILAS:
+        return None
+    y = np.array(list(itertools.product(*rangos)), dtype=np.int64).reshape(-1, len(destinos))
+    d = distancias[i, destinos]
+    movs = y @ d
+    validas = (y.sum(axis=1) <= sum(s_i)) & (movs <= max_movs)
+    y, movs = y[validas], movs[validas]
+
+    W = _pesos_acumulados(s_i, pesos)
+    hasta = np.cumsum(y, axis=1)
+    desde = hasta - y
+    costo = ((W[hasta] - W[desde]) * d).sum(axis=1)
+    validas = costo <= ct_int
+    return destinos, y[validas], movs[validas], costo[validas]
+
+
+def _asignar_resistencias(y_fila, s_i):
+    """
+    Reparte las personas de un vector y (destinos de más lejano a más
+    cercano) entre las resistencias, de la más barata a la más cara.
+
+    Returns:
+        Lista [(posición del destino, k, cantidad)]
+    """
+    disponibles = list(s_i)
+    asignacion = []
+    k = 0
+    for pos, cantidad in enumerate(y_fila):
+        cantidad = int(cantidad)
+        while cantidad > 0:
+            while disponibles[k] == 0:
+                k += 1
+            toma = min(cantidad, disponibles[k])
+            asignacion.append((pos, k, toma))
+            disponibles[k] -= toma
+            cantidad -= toma
+    return asignacion
+
+
+def _frente_pareto(claves, movs, costo, max_movs, ct_int):
+    """
+    Índices de las filas no dominadas en (movs, costo) dentro de cada clave.
+    """
+    rango = (max_movs + 1) * (ct_int + 1)
+    if len(claves) and int(claves.max()) < (2 ** 62) // rango:
+        # Un solo argsort sobre la clave combinada es mucho más rápido que lexsort
+        orden = np.argsort((claves * (max_movs + 1) + movs) * (ct_int + 1) + costo)
+    else:
+        orden = np.lexsort((costo, movs, claves))
+    c_ord, k_ord = claves[orden], costo[orden]
+    nuevo_grupo = np.ones(len(orden), dtype=bool)
+    nuevo_grupo[1:] = c_ord[1:] != c_ord[:-1]
+    grupo = np.cumsum(nuevo_grupo)
+    # Mínimo acumulado del costo dentro de cada grupo: desplazar cada grupo por
+    # debajo del anterior hace que el acumulado no arrastre valores de otros grupos
+    desplazamiento = grupo.astype(np.int64) * (ct_int + 1)
+    minimo = np.minimum.accumulate(k_ord - desplazamiento) + desplazamiento
+    anterior = np.empty_like(minimo)
+    anterior[1:] = minimo[:-1]
+    conservar = nuevo_grupo | (k_ord < anterior)
+    return orden[conservar]
+
+
+def resolver_exhaustivo(parsed: Dict) -> Optional[Dict]:
+    """
+    Resuelve la instancia de forma exacta.
+
+    Returns:
+        Dict con el mismo formato que la salida del modelo (estado
+        OPTIMAL_SOLUTION), o None si la instancia es demasiado grande
+    """
+    n, m = parsed['n'], parsed['m']
+    s = parsed['s']
+    esc = escalado_exacto(parsed)
+    ct_int, pesos = esc['ct_int'], esc['peso_costo']
+    max_movs = parsed['max_movs']
+    cotas = cotas_movimiento(parsed)
+    base = 2 * n + 1
+    if base ** m >= 2 ** 62:
+        return None
+    potencias = base ** np.arange(m, dtype=np.int64)
+    idx = np.arange(m)
+    distancias = np.abs(idx[:, None] - idx[None, :])
+
+    # Estado inicial: sin movimientos
+    delta = np.zeros((1, m), dtype=np.int64)
+    claves = np.full(1, n * int(potencias.sum()), dtype=np.int64)
+    movs = np.zeros(1, dtype=np.int64)
+    costo = np.zeros(1, dtype=np.int64)
+    pasos = []  # por opinión de origen: (i, destinos, y, padre, opcion)
+
+    # De menor a mayor población: así los estados crecen lo más tarde posible
+    origenes = [i for i in sorted(range(m), key=lambda i: sum(s[i]))
+                if any(max(cotas[i][j]) for j in range(m))]
+    for i in origenes:
+        opciones = _opciones_origen(i, s[i], cotas, distancias, max_movs, pesos, ct_int)
+        if opciones is None:
+            return None
+        destinos, y, o_movs, o_costo = opciones
+        if len(y) * len(delta) > MAX_FILAS:
+            return None
+
+        # Cruce estados x opciones, podando por presupuesto
+        padre = np.repeat(np.arange(len(delta)), len(y))
+        opcion = np.tile(np.arange(len(y)), len(delta))
+        n_movs = movs[padre] + o_movs[opcion]
+        n_costo = costo[padre] + o_costo[opcion]
+        validas = (n_movs <= max_movs) & (n_costo <= ct_int)
+        padre, opcion = padre[validas], opcion[validas]
+        n_movs, n_costo = n_movs[validas], n_costo[validas]
+
+        # La clave (delta + n en base 2n+1) es lineal en delta: se suma sin
+        # construir los delta de todas las filas cruzadas
+        o_delta = np.zeros((len(y), m), dtype=np.int64)
+        o_delta[:, destinos] = y
+        o_delta[:, i] -= y.sum(axis=1)
+        n_claves = claves[padre] + (o_delta @ potencias)[opcion]
+
+        conservar = _frente_pareto(n_claves, n_movs, n_costo, max_movs, ct_int)
+        padre, opcion = padre[conservar], opcion[conservar]
+        delta = delta[padre] + o_delta[opcion]
+        claves, movs, costo = n_claves[conservar], n_movs[conservar], n_costo[conservar]
+        pasos.append((i, destinos, y, padre, opcion))
+
+    # Evaluación en bloque de todos los p_final alcanzables
+    p_final = np.asarray(parsed['p'], dtype=np.int64) + delta
+    v_int = np.asarray(esc['v_int'], dtype=np.int64)
+    orden = np.argsort(v_int, kind="stable")
+    acumulado = np.cumsum(p_final[:, orden], axis=1)
+    valores = v_int[orden]
+    if n % 2 == 1:
+        medianas = 2 * valores[np.argmax(acumulado >= n // 2 + 1, axis=1)]
+    else:
+        medianas = valores[np.argmax(acumulado >= n // 2, axis=1)] + valores[np.argmax(acumulado >= n // 2 + 1, axis=1)]
+    polarizaciones = (p_final * np.abs(2 * v_int[None, :] - medianas[:, None])).sum(axis=1)
+    mejor = int(np.argmin(polarizaciones))
+
+    # Reconstrucción del plan siguiendo los punteros hacia atrás
+    x = np.zeros((m, m, 3), dtype=np.int64)
+    fila = mejor
+    for i, destinos, y, padre, opcion in reversed(pasos):
+        for pos, k, cantidad in _asignar_resistencias(y[opcion[fila]], s[i]):
+            x[i, destinos[pos], k] += cantidad
+        fila = padre[fila]
+
+    factor_v = esc['factor_v']
+    final = p_final[mejor]
+    mediana_doble = int(medianas[mejor])
+    matrices: Dict[str, List[List[int]]] = {
+        clave: x[:, :, k].tolist() for k, clave in enumerate(CLAVES_MATRICES)
+    }
+    polarizacion = float(Fraction(int(polarizaciones[mejor])) * factor_v / 2)
+    return {
+        "polarizacion": polarizacion,
+        "costo_usado": float(Fraction(int(costo[mejor])) / esc['escala_costo']),
+        "movimientos_usados": int(movs[mejor]),
+        "p_final": final.tolist(),
+        "mediana": float(esc['v_base'] + Fraction(mediana_doble) * factor_v / 2),
+        "matrices_movimiento": matrices,
+        "estado": OPTIMO,
+        "objetivo": polarizacion,
+        "cota": polarizacion,
+        "brecha": 0.0,
+        "motor": "exhaustivo",
+    }
+
+
+def estados_posibles(parsed: Dict) -> int:
+    """Cantidad de repartos de n personas en m opiniones: cota de los estados."""
+    return math.comb(parsed['n'] + parsed['m'] - 1, parsed['m'] - 1)
+
+
+def es_pequena(parsed: Dict) -> bool:
+    """Si conviene intentar la vía exhaustiva antes de MiniZinc."""
+    return estados_posibles(parsed) <= UMBRAL_EXHAUSTIVO
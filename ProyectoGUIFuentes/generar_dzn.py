@@ -4,10 +4,28 @@ Módulo para parsear archivos .txt de entrada según el formato del proyecto
 y generar archivos .dzn para MiniZinc.
 """
 
+import math
+from fractions import Fraction
+from functools import reduce
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
+from traza import trazado
 
+# Claves del dict que produce parse_input_text
+CLAVES_INSTANCIA = ("n", "m", "p", "v", "s", "ct", "max_movs")
+
+# Claves de 'matrices_movimiento' en los resultados, por resistencia (baja, media, alta)
+CLAVES_MATRICES = ("resistencia_baja", "resistencia_media", "resistencia_alta")
+
+# Costo por unidad de distancia según la resistencia (baja, media, alta)
+PESOS_RESISTENCIA = (1.0, 1.5, 2.0)
+
+# Cota de los enteros del modelo escalado (los int de MiniZinc son de 64 bits)
+LIMITE_ENTERO = 2 ** 62
+
+
+@trazado("parse_input_text")
 def parse_input_text(text: str) -> Dict:
     """
     Parsea el contenido de un archivo .txt según el formato del proyecto.
@@ -99,7 +117,168 @@ def parse_input_text(text: str) -> Dict:
         raise ValueError(f"Error en el formato de datos o número de elementos: {e}")
 
 
-def generate_dzn(parsed: Dict, output_path: str = None) -> str:
+def format_input_text(parsed: Dict) -> str:
+    """
+    Convierte un dict de instancia al formato .txt del enunciado
+    (inverso de parse_input_text).
+    
+    Args:
+        parsed: Dict con las claves n, m, p, v, s, ct, max_movs
+        
+    Returns:
+        String con el contenido del archivo .txt
+    """
+    lines = [
+        str(parsed['n']),
+        str(parsed['m']),
+        ','.join(map(str, parsed['p'])),
+        ','.join(map(str, parsed['v'])),
+    ]
+    lines += [','.join(map(str, row)) for row in parsed['s']]
+    lines += [str(parsed['ct']), str(parsed['max_movs'])]
+    return '\n'.join(lines)
+
+
+def _fraccion(valor) -> Fraction:
+    """Valor decimal exacto tal como se escribió (0.345 -> 69/200), sin redondear."""
+    return Fraction(repr(float(valor)))
+
+
+def _escalar_a_enteros(fracciones: List[Fraction]):
+    """
+    Menor escala que vuelve enteros todos los valores, dividida por el MCD
+    de los resultados. Devuelve (enteros, factor) con valor = entero * factor.
+    """
+    escala = reduce(lambda a, b: a * b // math.gcd(a, b), (f.denominator for f in fracciones), 1)
+    enteros = [int(f * escala) for f in fracciones]
+    g = reduce(math.gcd, enteros, 0) or 1
+    return [e // g for e in enteros], Fraction(g, escala)
+
+
+def escalado_exacto(parsed: Dict) -> Dict:
+    """
+    Calcula el escalado entero más pequeño y exacto para el modelo.
+
+    - Opiniones: v[i] = v_base + v_int[i] * factor_v, con v_int >= 0 lo más
+      pequeño posible (se resta el mínimo y se divide por el MCD). La
+      polarización no cambia al desplazar v, solo se multiplica por factor_v.
+    - Costos: peso_costo[k] = PESOS_RESISTENCIA[k] * escala_costo con enteros
+      coprimos (1 / 1.5 / 2 -> 2 / 3 / 4). Como el costo es entero en esa
+      escala, costo <= ct equivale exactamente a costo <= ct_int = floor(ct * escala_costo).
+
+    Returns:
+        Dict con v_int, factor_v, v_base, peso_costo, escala_costo y ct_int
+
+    Raises:
+        ValueError: Si los valores de v tienen tantos decimales que la
+            polarización escalada no entra en un entero de 64 bits
+    """
+    v = [_fraccion(x) for x in parsed['v']]
+    v_base = min(v)
+    v_int, factor_v = _escalar_a_enteros([x - v_base for x in v])
+    if 2 * parsed['n'] * max(v_int, default=0) >= LIMITE_ENTERO:
+        raise ValueError(
+            "Los valores de v tienen demasiados decimales: el escalado entero exacto "
+            f"(factor {factor_v}) no entra en los enteros de 64 bits del modelo. "
+            "Redondéalos a menos decimales."
+        )
+
+    pesos, factor_costo = _escalar_a_enteros([_fraccion(w) for w in PESOS_RESISTENCIA])
+    escala_costo = 1 / factor_costo
+
+    return {
+        'v_int': v_int,
+        'factor_v': factor_v,
+        'v_base': v_base,
+        'peso_costo': pesos,
+        'escala_costo': escala_costo,
+        'ct_int': math.floor(_fraccion(parsed['ct']) * escala_costo),
+    }
+
+
+def cotas_movimiento(parsed: Dict) -> List[List[List[int]]]:
+    """
+    Cota superior de x[i][j][k] (personas con resistencia k que pasan de i a j).
+
+    x[i][j][k] <= min(s[i][k], maxMovs div |i-j|, ct_int div (|i-j| * peso_costo[k]))
+    y x[i][i][k] = 0. Así se anulan de entrada los pares demasiado lejanos,
+    los movimientos que solos superan ct y las clases vacías.
+    """
+    m = parsed['m']
+    s = parsed['s']
+    max_movs = parsed['max_movs']
+    esc = escalado_exacto(parsed)
+    pesos, ct_int = esc['peso_costo'], esc['ct_int']
+
+    cotas = []
+    for i in range(m):
+        fila = []
+        for j in range(m):
+            d = abs(i - j)
+            if d == 0:
+                fila.append([0, 0, 0])
+            else:
+                fila.append([min(s[i][k], max_movs // d, ct_int // (d * pesos[k])) for k in range(3)])
+        cotas.append(fila)
+    return cotas
+
+
+def _cotas_o_defecto(parsed: Dict, cotas: Tuple = None):
+    """(x_min, x_max) dados, o 0 y cotas_movimiento(parsed) por defecto."""
+    if cotas is not None:
+        return cotas
+    m = parsed['m']
+    return [[[0] * 3 for _ in range(m)] for _ in range(m)], cotas_movimiento(parsed)
+
+
+def _arranque_o_defecto(arranque: Tuple, x_min):
+    """(x_inicial, cota_polarizacion) dados, o x_min y -1 (sin cota) por defecto."""
+    if arranque is not None:
+        return arranque
+    return x_min, -1
+
+
+def datos_modelo(parsed: Dict, cotas: Tuple = None, arranque: Tuple = None) -> Dict:
+    """
+    Parámetros de Proyecto.mzn como valores de Python (los mismos que
+    escribe generate_dzn), para asignarlos directamente a una instancia
+    de MiniZinc sin pasar por un .dzn.
+    """
+    esc = escalado_exacto(parsed)
+    x_min, x_max = _cotas_o_defecto(parsed, cotas)
+    x_inicial, cota_polarizacion = _arranque_o_defecto(arranque, x_min)
+    return {
+        'n': parsed['n'],
+        'm': parsed['m'],
+        'p': list(parsed['p']),
+        'v': [float(x) for x in parsed['v']],
+        's': [list(fila) for fila in parsed['s']],
+        'ct': float(parsed['ct']),
+        'maxMovs': parsed['max_movs'],
+        'v_int': esc['v_int'],
+        'factor_v': float(esc['factor_v']),
+        'v_base': float(esc['v_base']),
+        'peso_costo': esc['peso_costo'],
+        'escala_costo': float(esc['escala_costo']),
+        'ct_int': esc['ct_int'],
+        'x_min': x_min,
+        'x_max': x_max,
+        'x_inicial': x_inicial,
+        'cota_polarizacion': cota_polarizacion,
+    }
+
+
+@trazado("generate_dzn")
+def generate_dzn(parsed: Dict, output_path: str = None, cotas: Tuple = None,
+                 arranque: Tuple = None) -> str:
+    """
+    Genera el contenido .dzn de una instancia (y lo guarda si se da output_path).
+    
+    cotas: (x_min, x_max) opcionales de x[i][j][k]; por defecto 0 y
+    cotas_movimiento(parsed).
+    arranque: (x_inicial, cota_polarizacion) opcionales de un checkpoint
+    (ver checkpoint.py); por defecto x_min y -1 (sin cota).
+    """
     n = parsed['n']
     m = parsed['m']
     p = parsed['p']
@@ -124,6 +303,18 @@ def generate_dzn(parsed: Dict, output_path: str = None) -> str:
     # y añade los delimitadores externos [| y |]
     s_str = '[| ' + ' | '.join(s_rows) + ' |]'
     
+    # Escalado entero exacto (ver escalado_exacto)
+    esc = escalado_exacto(parsed)
+    v_int_str = '[' + ', '.join(map(str, esc['v_int'])) + ']'
+    peso_str = '[' + ', '.join(map(str, esc['peso_costo'])) + ']'
+    
+    # Cotas de x aplanadas en orden (i, j, k) para array3d
+    x_min, x_max = _cotas_o_defecto(parsed, cotas)
+    x_max_str = ', '.join(str(c) for fila in x_max for celda in fila for c in celda)
+    x_min_str = ', '.join(str(c) for fila in x_min for celda in fila for c in celda)
+    x_inicial, cota_polarizacion = _arranque_o_defecto(arranque, x_min)
+    x_inicial_str = ', '.join(str(c) for fila in x_inicial for celda in fila for c in celda)
+    
     # Construir el contenido del .dzn
     dzn_content = f"""% Archivo generado automáticamente
 % Datos para el problema de minimización de polarización
@@ -135,6 +326,22 @@ v = {v_str};
 s = {s_str};
 ct = {ct};
 maxMovs = {max_movs};
+
+% Escalado entero exacto: v = v_base + v_int * factor_v, costo = suma / escala_costo
+v_int = {v_int_str};
+factor_v = {float(esc['factor_v'])!r};
+v_base = {float(esc['v_base'])!r};
+peso_costo = {peso_str};
+escala_costo = {float(esc['escala_costo'])!r};
+ct_int = {esc['ct_int']};
+
+% Cotas de cada x[i,j,k] (presolve; la inferior solo la usa la búsqueda LNS)
+x_min = array3d(1..{m}, 1..{m}, 1..3, [{x_min_str}]);
+x_max = array3d(1..{m}, 1..{m}, 1..3, [{x_max_str}]);
+
+% Arranque en caliente desde un checkpoint (cota -1 = sin cota)
+x_inicial = array3d(1..{m}, 1..{m}, 1..3, [{x_inicial_str}]);
+cota_polarizacion = {cota_polarizacion};
 """ 
     
     # Guardar si se proporciona una ruta
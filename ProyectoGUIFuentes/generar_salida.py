@@ -16,6 +16,8 @@ from pathlib import Path
 from typing import Dict
 import math 
 
+from traza import trazado
+
 
 def format_polarization(pol_value):
     """
@@ -42,6 +44,7 @@ def format_polarization(pol_value):
         return str(pol_value)
 
 
+@trazado("generate_output_txt")
 def generate_output_txt(resultado: Dict, output_path: str = None) -> str:
     """
     Genera el contenido de un archivo de salida .txt a partir del JSON de MiniZinc.
@@ -99,6 +102,48 @@ def generate_output_txt(resultado: Dict, output_path: str = None) -> str:
     return output_content
 
 
+def parse_output_text(text: str) -> Dict:
+    """
+    Parsea un archivo de salida .txt (inverso de generate_output_txt).
+
+    Args:
+        text: String con el contenido del archivo de salida
+
+    Returns:
+        Dict con 'polarizacion' y 'matrices_movimiento'
+
+    Raises:
+        ValueError: Si el formato es incorrecto
+    """
+    lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
+
+    # 1 línea de polarización + 3 marcadores de nivel + 3 matrices de m filas
+    if len(lines) < 4 or (len(lines) - 4) % 3 != 0:
+        raise ValueError(f"Número de líneas inválido en la salida: {len(lines)}")
+    m = (len(lines) - 4) // 3
+
+    try:
+        polarizacion = float(lines[0].replace(',', '.'))
+
+        matrices = {}
+        claves = ("resistencia_baja", "resistencia_media", "resistencia_alta")
+        for k, clave in enumerate(claves):
+            inicio = 1 + k * (m + 1)
+            if lines[inicio] != str(k + 1):
+                raise ValueError(f"Se esperaba el nivel de resistencia {k + 1}, se encontró '{lines[inicio]}'")
+            matrices[clave] = [
+                [int(x) for x in lines[inicio + 1 + i].split(',')]
+                for i in range(m)
+            ]
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"Error en el formato de salida: {e}")
+
+    return {
+        "polarizacion": polarizacion,
+        "matrices_movimiento": matrices
+    }
+
+
 def resultado_a_formato_proyecto(json_resultado: Dict) -> str:
     """
     Convierte un resultado JSON de MiniZinc al formato de texto del proyecto.
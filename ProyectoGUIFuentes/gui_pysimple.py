@@ -6,12 +6,15 @@ Permite cargar archivos .txt, generar .dzn y ejecutar el modelo MiniZinc.
 
 import PySimpleGUI as sg
 from pathlib import Path
-import json
+import threading
+import time
 
 # Importar módulos locales
+# (run_mzn se importa en segundo plano, al detectar MiniZinc, para que la
+# ventana aparezca cuanto antes)
 from generar_dzn import parse_input_text, generate_dzn
-from run_mzn import MiniZincRunner
 from generar_salida import generate_output_txt
+from vista_resultados import ENCABEZADOS, VistaResultado, recortar_texto
  
 # CONFIGURACIÓN DE RUTAS Y CONSTANTES 
 BASE_DIR = Path(__file__).resolve().parent
@@ -23,6 +26,90 @@ SAVED_DZN = str(MZN_DIR / "DatosProyecto.dzn")
 # Constante para evitar duplicación de literales
 ALL_FILES = "All Files" 
 
+# Solvers mostrados mientras se detectan los instalados
+SOLVER_AUTO = "auto"
+SOLVERS_POR_DEFECTO = ["gecode", "chuffed", "coin-bc", "gurobi", SOLVER_AUTO]
+
+# Eventos que los hilos en segundo plano envían a la ventana
+EVT_SOLUCION = "-SOLUCION-"
+EVT_FIN = "-FIN-"
+EVT_MINIZINC = "-MINIZINC-"
+
+# Cada cuánto se refresca el tiempo transcurrido mientras se resuelve (ms)
+REFRESCO_MS = 200
+
+# Prefijo de las claves de cada tabla paginada de resultados
+TABLAS = {"p_final": "-PF", "movimientos": "-MOV"}
+
+
+def detectar_minizinc(window):
+    """
+    Crea el runner y detecta los solvers instalados en un hilo aparte.
+    Publica EVT_MINIZINC con {"runner", "solvers"} o {"error"}.
+    """
+    try:
+        from run_mzn import MiniZincRunner
+        runner = MiniZincRunner()
+        window.write_event_value(EVT_MINIZINC, {"runner": runner, "solvers": runner.list_solvers()})
+    except Exception as e:
+        window.write_event_value(EVT_MINIZINC, {"error": str(e)})
+
+
+def ejecutar_en_segundo_plano(window, runner, parsed, mzn_path, dzn_path, solver, timeout):
+    """
+    Ejecuta MiniZinc en un hilo aparte y publica los eventos en la ventana:
+    EVT_SOLUCION por cada solución intermedia y EVT_FIN con el resultado final
+    y su VistaResultado (preparada aquí para no frenar la ventana).
+    Con el solver "auto" elige el solver según el historial de ejecuciones.
+    """
+    from seleccion_solver import elegir_solver, registrar_ejecucion
+
+    def al_encontrar(sol):
+        window.write_event_value(EVT_SOLUCION, sol)
+
+    seleccion = None
+    try:
+        if solver == SOLVER_AUTO:
+            solver, razon = elegir_solver(parsed, runner.list_solvers())
+            seleccion = {"solver": solver, **razon}
+        inicio = time.perf_counter()
+        res = runner.run(mzn_path, dzn_path, solver=solver, timeout=timeout, on_solution=al_encontrar)
+        registrar_ejecucion(parsed, solver, time.perf_counter() - inicio, res)
+    except Exception as e:
+        # Capturar errores de ejecución de forma segura
+        res = {"error": str(e), "raw": "Error al intentar ejecutar el modelo."}
+    if seleccion:
+        res["seleccion_solver"] = seleccion
+    vista = None
+    if isinstance(res, dict) and "error" not in res:
+        try:
+            vista = VistaResultado(res, parsed['p'])
+        except (ValueError, TypeError) as e:
+            res = {"error": f"Resultado con formato inesperado: {e}"}
+    window.write_event_value(EVT_FIN, {"resultado": res, "vista": vista})
+
+
+def tabla_paginada(tabla, columnas):
+    """Pestaña con un sg.Table y controles de página para una tabla de VistaResultado."""
+    prefijo = TABLAS[tabla]
+    return [
+        [sg.Table(
+            values=[],
+            headings=ENCABEZADOS[tabla],
+            key=f"{prefijo}-TABLA-",
+            num_rows=12,
+            col_widths=columnas,
+            auto_size_columns=False,
+            justification="right",
+            expand_x=True
+        )],
+        [
+            sg.Button("◀", key=f"{prefijo}-ANT-", size=(3, 1)),
+            sg.Text("", size=(30, 1), key=f"{prefijo}-PAG-"),
+            sg.Button("▶", key=f"{prefijo}-SIG-", size=(3, 1))
+        ]
+    ]
+
  
 # DISEÑO DE LA INTERFAZ 
 sg.theme('DarkBlue3')
@@ -60,11 +147,12 @@ layout = [
         ],
         [
             sg.Text("Solver:", size=(12, 1)),
-            sg.Combo(["gecode", "chuffed", "coin-bc", "gurobi"], 
+            sg.Combo(SOLVERS_POR_DEFECTO, 
                       default_value="gecode", 
                       key="-SOLVER-",
                       size=(15, 1),
-                      tooltip="Usa gecode para pruebas pequeñas, gurobi para grandes (requiere licencia)"),
+                      tooltip="Usa gecode para pruebas pequeñas, gurobi para grandes (requiere licencia).\n"
+                              "'auto' elige el más rápido en instancias parecidas según el historial"),
             sg.Text("Timeout (seg):", pad=((20, 5), 0)),
             sg.Input("300", key="-TIMEOUT-", size=(8, 1), tooltip="Tiempo máximo de ejecución (0 = sin límite)")
         ]
@@ -75,6 +163,7 @@ layout = [
     # Botones de acción
     [
         sg.Button("▶️ Generar .dzn y Ejecutar", key="-RUN-", size=(25, 1), button_color=("white", "green")),
+        sg.Button("⏹️ Cancelar", key="-CANCEL-", size=(12, 1), button_color=("white", "firebrick"), disabled=True),
         sg.Button("📝 Generar .dzn (solo)", key="-GEN-", size=(20, 1)),
         sg.Button("💾 Guardar .dzn como...", key="-SAVE-", size=(20, 1)),
         sg.Push(),
@@ -84,15 +173,19 @@ layout = [
     
     [sg.HorizontalSeparator()],
     
-    # Sección de salida
+    # Sección de salida: resumen y tablas paginadas (nunca el JSON completo)
     [sg.Frame("📊 Resultados", [
-        [sg.Multiline(
-            size=(100, 14),
-            key="-OUT-",
-            font=("Courier", 9),
-            disabled=True,
-            autoscroll=True
-        )]
+        [sg.TabGroup([[
+            sg.Tab("Resumen", [[sg.Multiline(
+                size=(100, 14),
+                key="-OUT-",
+                font=("Courier", 9),
+                disabled=True,
+                autoscroll=True
+            )]]),
+            sg.Tab("p_final", tabla_paginada("p_final", [10, 12, 12, 12])),
+            sg.Tab("Movimientos", tabla_paginada("movimientos", [10, 10, 12, 12]))
+        ]], expand_x=True)]
     ], font=("Arial", 10, "bold"))],
     
     # Barra de estado
@@ -108,30 +201,127 @@ window = sg.Window(
 )
 
  
-# INICIALIZAR RUNNER DE MINIZINC 
-try:
-    runner = MiniZincRunner()
-    window["-STATUS-"].update(f"✅ MiniZinc encontrado: {runner.minizinc}")
-except Exception as e:
-    runner = None
-    window["-STATUS-"].update(f"⚠️ Advertencia: {e}")
-    sg.popup_warning(
-        f"No se encontró MiniZinc en PATH.\n\n{e}\n\n"
-        "Puedes continuar generando .dzn, pero no podrás ejecutar el modelo.",
-        title="MiniZinc no encontrado"
-    )
+# INICIALIZAR RUNNER DE MINIZINC (en segundo plano)
+runner = None
+detectando_minizinc = True
+window["-STATUS-"].update("🔎 Detectando MiniZinc y solvers disponibles...")
+threading.Thread(target=detectar_minizinc, args=(window,), daemon=True).start()
 
  
 # LOOP PRINCIPAL DE LA INTERFAZ 
 ultimo_resultado = None 
+vista_actual = None
+paginas = {tabla: 0 for tabla in TABLAS}
+
+# Estado de la ejecución en segundo plano
+ejecutando = False
+inicio_ejecucion = 0.0
+mejor_polarizacion = None
+solver_en_curso = ""
+
+
+def mostrar_pagina(tabla):
+    """Carga en la tabla solo las filas de su página actual."""
+    prefijo = TABLAS[tabla]
+    if vista_actual is None:
+        window[f"{prefijo}-TABLA-"].update(values=[])
+        window[f"{prefijo}-PAG-"].update("")
+        return
+    total = vista_actual.paginas(tabla)
+    paginas[tabla] = min(max(paginas[tabla], 0), total - 1)
+    window[f"{prefijo}-TABLA-"].update(values=vista_actual.pagina(tabla, paginas[tabla]))
+    window[f"{prefijo}-PAG-"].update(
+        f"Página {paginas[tabla] + 1} de {total} ({vista_actual.filas(tabla)} filas)")
+
+
+def mostrar_vista(vista):
+    """Reemplaza la vista de resultados (None la vacía) y vuelve a la primera página."""
+    global vista_actual
+    vista_actual = vista
+    for tabla in TABLAS:
+        paginas[tabla] = 0
+        mostrar_pagina(tabla)
+
+
+def marcar_ejecucion(activa):
+    """
+    Habilita o deshabilita los botones según haya una ejecución en curso:
+    mientras corre, -GEN- y -RUN- reescribirían el .dzn que está usando.
+    """
+    window["-RUN-"].update(disabled=activa)
+    window["-GEN-"].update(disabled=activa)
+    window["-CANCEL-"].update(disabled=not activa)
+
+
+def estado_ejecucion():
+    """Texto de la barra de estado mientras el solver está trabajando."""
+    texto = f"⏳ Ejecutando MiniZinc con {solver_en_curso}... {time.monotonic() - inicio_ejecucion:.1f} s"
+    if mejor_polarizacion is not None:
+        texto += f" | Mejor polarización hasta ahora: {mejor_polarizacion}"
+    return texto
+
 
 while True:
-    event, values = window.read()
+    event, values = window.read(timeout=REFRESCO_MS if ejecutando else None)
     
     # Evento: Cerrar ventana o botón Salir
     if event in (sg.WINDOW_CLOSED, "Salir"):
+        if ejecutando and runner:
+            runner.cancel()
         break
     
+    # Evento: Refresco periódico del tiempo transcurrido
+    if event == sg.TIMEOUT_KEY:
+        if ejecutando:
+            window["-STATUS-"].update(estado_ejecucion())
+        continue
+    
+    # Evento: Terminó la detección de MiniZinc
+    if event == EVT_MINIZINC:
+        info = values[EVT_MINIZINC]
+        detectando_minizinc = False
+        if "error" in info:
+            window["-STATUS-"].update(f"⚠️ Advertencia: {info['error']}")
+            sg.popup_warning(
+                f"No se encontró MiniZinc en PATH.\n\n{info['error']}\n\n"
+                "Puedes continuar generando .dzn, pero no podrás ejecutar el modelo.",
+                title="MiniZinc no encontrado"
+            )
+        else:
+            runner = info["runner"]
+            solvers = info["solvers"]
+            if solvers:
+                solvers = solvers + [SOLVER_AUTO]
+            if solvers:
+                actual = values["-SOLVER-"]
+                window["-SOLVER-"].update(values=solvers, value=actual if actual in solvers else solvers[0])
+            window["-STATUS-"].update(f"✅ MiniZinc encontrado: {runner.minizinc} | Solvers: {', '.join(solvers) or '?'}")
+        continue
+    
+    # Evento: Cancelar la ejecución en curso
+    if event == "-CANCEL-":
+        if ejecutando and runner:
+            runner.cancel()
+            window["-STATUS-"].update("⏹️ Cancelando...")
+        continue
+    
+    # Evento: Solución intermedia reportada por el solver
+    if event == EVT_SOLUCION:
+        sol = values[EVT_SOLUCION]
+        if isinstance(sol, dict) and "polarizacion" in sol:
+            mejor_polarizacion = sol["polarizacion"]
+            window["-STATUS-"].update(estado_ejecucion())
+        continue
+    
+    # Evento: Cambio de página de una tabla de resultados
+    cambio = next(((tabla, -1 if event.endswith("-ANT-") else 1) for tabla, prefijo in TABLAS.items()
+                   if event in (f"{prefijo}-ANT-", f"{prefijo}-SIG-")), None)
+    if cambio:
+        tabla, paso = cambio
+        paginas[tabla] += paso
+        mostrar_pagina(tabla)
+        continue
+    
     # Evento: Cargar archivo .txt
     if event == "-LOAD-":
         filename = sg.popup_get_file(
@@ -158,9 +348,12 @@ while True:
         window["-STATUS-"].update("🧹 Limpiado")
         window["-SAVE-OUT-"].update(disabled=True)
         ultimo_resultado = None
+        mostrar_vista(None)
     
     # Evento: Generar .dzn solamente
     if event == "-GEN-":
+        if ejecutando:
+            continue
         txt = values["-INPUT-"].strip()
         if not txt:
             sg.popup_error("No hay texto de entrada.\nCarga un archivo o pega el contenido.")
@@ -169,7 +362,7 @@ while True:
         try:
             parsed = parse_input_text(txt)
             dzn_text = generate_dzn(parsed, SAVED_DZN)
-            window["-OUT-"].update(dzn_text)
+            window["-OUT-"].update(recortar_texto(dzn_text, aviso=f"Archivo completo: {SAVED_DZN}"))
             window["-STATUS-"].update(f"✅ .dzn generado en: {SAVED_DZN}")
         except Exception as e:
             sg.popup_error(f"Error parseando entrada:\n\n{e}")         
@@ -196,7 +389,7 @@ while True:
         try:
             parsed = parse_input_text(txt)
             dzn_text = generate_dzn(parsed, save_path)
-            window["-OUT-"].update(dzn_text)
+            window["-OUT-"].update(recortar_texto(dzn_text, aviso=f"Archivo completo: {save_path}"))
             window["-STATUS-"].update(f"💾 .dzn guardado en: {save_path}")
             sg.popup_ok(f"Archivo guardado correctamente:\n{save_path}")
         except Exception as e:
@@ -205,6 +398,8 @@ while True:
     
     # Evento: Generar .dzn y EJECUTAR modelo
     if event == "-RUN-":
+        if ejecutando:
+            continue
         mzn_path = values["-MZN-"]
         txt = values["-INPUT-"].strip()
         solver = values["-SOLVER-"]
@@ -218,6 +413,10 @@ while True:
             sg.popup_error(f"No se encontró el archivo .mzn:\n{mzn_path}\n\nSelecciona el Proyecto.mzn correcto.")
             continue
         
+        if detectando_minizinc:
+            sg.popup_error("Todavía se está detectando MiniZinc.\nIntenta de nuevo en un momento.")
+            continue
+        
         if not runner:
             sg.popup_error("MiniZinc no está disponible.\nNo se puede ejecutar el modelo.")
             continue
@@ -234,14 +433,12 @@ while True:
         try:
             dzn_path = SAVED_DZN
             generate_dzn(parsed, dzn_path)
-            window["-STATUS-"].update(f"⏳ Ejecutando MiniZinc con {solver}... (esto puede tomar tiempo)")
-            window.refresh()
         except Exception as e:
             sg.popup_error(f"Error generando .dzn:\n\n{e}")
             window["-STATUS-"].update("❌ Error generando .dzn")
             continue
         
-        # Ejecutar MiniZinc
+        # Ejecutar MiniZinc en segundo plano
         try:
             timeout_val = int(values["-TIMEOUT-"])
             if timeout_val <= 0:
@@ -249,32 +446,51 @@ while True:
         except ValueError: 
             timeout_val = 300
         
-        try:
-            res = runner.run(mzn_path, dzn_path, solver=solver, timeout=timeout_val)
-        except Exception as e:
-            # Capturar errores de ejecución de forma segura
-            res = {"error": str(e), "raw": "Error al intentar ejecutar el modelo."} 
-            sg.popup_error(f"Error ejecutando MiniZinc:\n\n{e}")
-            window["-STATUS-"].update("❌ Error de ejecución") 
+        ejecutando = True
+        inicio_ejecucion = time.monotonic()
+        mejor_polarizacion = None
+        solver_en_curso = solver
+        marcar_ejecucion(True)
+        window["-STATUS-"].update(estado_ejecucion())
+        threading.Thread(
+            target=ejecutar_en_segundo_plano,
+            args=(window, runner, parsed, mzn_path, dzn_path, solver, timeout_val),
+            daemon=True
+        ).start()
+    
+    # Evento: Terminó la ejecución en segundo plano
+    if event == EVT_FIN:
+        res = values[EVT_FIN]["resultado"]
+        ejecutando = False
+        transcurrido = time.monotonic() - inicio_ejecucion
+        marcar_ejecucion(False)
         
         # Mostrar resultado
-        if isinstance(res, dict) and "error" in res:
+        if isinstance(res, dict) and res.get("cancelado"):
+            window["-OUT-"].update("⏹️ Ejecución cancelada.")
+            window["-STATUS-"].update(f"⏹️ Ejecución cancelada tras {transcurrido:.1f} s")
+            window["-SAVE-OUT-"].update(disabled=True)
+            ultimo_resultado = None
+            mostrar_vista(None)
+        elif isinstance(res, dict) and "error" in res:
             error_msg = f"❌ ERROR:\n{res.get('error')}\n\n"
             if "raw" in res:
                 error_msg += f"SALIDA CRUDA:\n{res.get('raw')}"
-            window["-OUT-"].update(error_msg)
+            window["-OUT-"].update(recortar_texto(error_msg))
             window["-STATUS-"].update("❌ Error al ejecutar MiniZinc")
             window["-SAVE-OUT-"].update(disabled=True)
             ultimo_resultado = None
-            sg.popup_error(f"Error ejecutando modelo:\n\n{res.get('error')}")
+            mostrar_vista(None)
+            sg.popup_error(f"Error ejecutando modelo:\n\n{recortar_texto(str(res.get('error')), max_lineas=20)}")
         else:
             # Guardar resultado
             ultimo_resultado = res
             
-            # Formatear resultado bonito
-            output_text = "✅ SOLUCIÓN ENCONTRADA\n" + "=" * 60 + "\n\n"
-            output_text += json.dumps(res, indent=2, ensure_ascii=False)
+            # Resumen corto; p_final y los movimientos van en sus pestañas, por páginas
+            vista = values[EVT_FIN]["vista"]
+            output_text = "✅ SOLUCIÓN ENCONTRADA\n" + "=" * 60 + "\n\n" + vista.resumen()
             window["-OUT-"].update(output_text)
+            mostrar_vista(vista)
             
             # Habilitar botón de guardar
             window["-SAVE-OUT-"].update(disabled=False)
@@ -282,9 +498,9 @@ while True:
             # Extraer polarización si existe
             if "polarizacion" in res:
                 pol = res["polarizacion"]
-                window["-STATUS-"].update(f"✅ Ejecución exitosa | Polarización: {pol}")
+                window["-STATUS-"].update(f"✅ Ejecución exitosa en {transcurrido:.1f} s | Polarización: {pol}")
             else:
-                window["-STATUS-"].update("✅ Ejecución finalizada correctamente")
+                window["-STATUS-"].update(f"✅ Ejecución finalizada correctamente en {transcurrido:.1f} s")
     
     # Evento: Guardar salida como .txt
     if event == "-SAVE-OUT-":
@@ -307,7 +523,8 @@ while True:
         try:
             salida_txt = generate_output_txt(ultimo_resultado, save_path)
             window["-STATUS-"].update(f"💾 Salida guardada en: {save_path}")
-            sg.popup_ok(f"Archivo de salida guardado:\n{save_path}\n\n{salida_txt}")
+            sg.popup_ok(f"Archivo de salida guardado:\n{save_path}\n\n"
+                        f"{recortar_texto(salida_txt, max_lineas=20, max_caracteres=120)}")
         except Exception as e:
             sg.popup_error(f"Error generando salida:\n\n{e}")
             window["-STATUS-"].update("❌ Error guardando salida")
@@ -0,0 +1,226 @@
+# lns.py
+"""
+Búsqueda en vecindarios grandes (LNS) para instancias con m grande.
+
+Se parte del plan sin movimientos (siempre factible). En cada iteración se
+libera una ventana de opiniones alrededor de la opinión donde cae la
+mediana actual: los x[i][j][k] con i y j dentro de la ventana quedan
+libres y el resto se fija al plan vigente (cotas x_min = x_max en el
+.dzn). MiniZinc reoptimiza ese subproblema con un límite de tiempo corto y
+la solución se conserva si mejora la polarización. Varios procesos
+exploran ventanas distintas a la vez sobre el mejor plan conocido.
+
+Uso:
+    python lns.py ../BateriaPruebas/Prueba30.txt --tiempo 300 -j 4 --ventana 20 --curva curva.csv
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from generar_dzn import cotas_movimiento, generate_dzn, parse_input_text
+from pipeline import DEFAULT_MZN
+from run_mzn import OPTIMO, SATISFECHO, MiniZincRunner
+from verificador import CLAVES_MATRICES, verificar_solucion
+
+# Opiniones por ventana y tiempo de cada subproblema
+VENTANA_POR_DEFECTO = 20
+LIMITE_SUBPROBLEMA_S = 5.0
+
+
+def plan_a_x(resultado: Dict, m: int) -> List[List[List[int]]]:
+    """x[i][j][k] a partir de las matrices de movimiento de un resultado."""
+    matrices = resultado["matrices_movimiento"]
+    return [[[matrices[clave][i][j] for clave in CLAVES_MATRICES] for j in range(m)] for i in range(m)]
+
+
+def solucion_inicial(parsed: Dict) -> Dict:
+    """Resultado del plan sin movimientos, con sus métricas recalculadas."""
+    m = parsed['m']
+    ceros = [[0] * m for _ in range(m)]
+    resultado = {
+        "p_final": list(parsed['p']),
+        "matrices_movimiento": {clave: [fila[:] for fila in ceros] for clave in CLAVES_MATRICES},
+    }
+    resultado.update(verificar_solucion(parsed, resultado)["recalculado"])
+    return resultado
+
+
+def opinion_mediana(parsed: Dict, p_final: List[int]) -> int:
+    """Índice de la opinión (poblada) donde cae la mediana de la población."""
+    orden = sorted(range(parsed['m']), key=lambda j: parsed['v'][j])
+    objetivo = (sum(p_final) + 1) // 2
+    acumulado = 0
+    for j in orden:
+        acumulado += p_final[j]
+        if acumulado >= objetivo:
+            return j
+    return orden[-1]
+
+
+def elegir_ventana(centro: int, m: int, tamano: int, rng: random.Random) -> range:
+    """Ventana de `tamano` opiniones que contiene a `centro`, con desplazamiento aleatorio."""
+    tamano = max(2, min(tamano, m))
+    inicio = centro - rng.randint(0, tamano - 1)
+    inicio = max(0, min(inicio, m - tamano))
+    return range(inicio, inicio + tamano)
+
+
+def cotas_vecindario(base, x, ventana: range):
+    """
+    (x_min, x_max) que dejan libres los movimientos dentro de la ventana
+    (acotados por `base`) y fijan el resto al plan x.
+    """
+    m = len(x)
+    x_min = [[[0] * 3 for _ in range(m)] for _ in range(m)]
+    x_max = [[[0] * 3 for _ in range(m)] for _ in range(m)]
+    for i in range(m):
+        for j in range(m):
+            libre = i in ventana and j in ventana
+            for k in range(3):
+                if libre:
+                    x_max[i][j][k] = base[i][j][k]
+                else:
+                    x_min[i][j][k] = x_max[i][j][k] = x[i][j][k]
+    return x_min, x_max
+
+
+def _resolver_vecindario(parsed, mzn_path, solver, x_min, x_max, limite, semilla):
+    """Resuelve un subproblema en el proceso worker (un .dzn temporal propio)."""
+    fd, dzn_path = tempfile.mkstemp(suffix=".dzn", prefix="minpol_lns_")
+    os.close(fd)
+    try:
+        generate_dzn(parsed, dzn_path, cotas=(x_min, x_max))
+        runner = MiniZincRunner()
+        return runner.run(mzn_path, dzn_path, solver=solver, timeout=limite, random_seed=semilla)
+    except OSError as e:
+        return {"error": str(e)}
+    finally:
+        try:
+            os.remove(dzn_path)
+        except OSError:
+            pass
+
+
+def resolver_lns(parsed: Dict, mzn_path: str = DEFAULT_MZN, solver: str = "gecode",
+                 tiempo_total: float = 60.0, workers: int = 1, ventana: int = VENTANA_POR_DEFECTO,
+                 limite_subproblema: float = LIMITE_SUBPROBLEMA_S, semilla: Optional[int] = None,
+                 on_mejora: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Ejecuta LNS durante `tiempo_total` segundos.
+
+    Args:
+        workers: Procesos que resuelven subproblemas en paralelo
+        ventana: Opiniones liberadas en cada subproblema
+        limite_subproblema: Tiempo máximo de cada subproblema en segundos
+        on_mejora: Callback opcional con cada punto de la curva de mejora
+
+    Returns:
+        Dict con el mejor resultado (mismo formato que MiniZinc), más
+        'curva_mejora' (lista de {tiempo, polarizacion}), 'iteraciones' y 'estado'
+    """
+    rng = random.Random(semilla)
+    m = parsed['m']
+    base = cotas_movimiento(parsed)
+    mejor = solucion_inicial(parsed)
+    x_mejor = plan_a_x(mejor, m)
+    inicio = time.perf_counter()
+    curva = [{"tiempo": 0.0, "polarizacion": mejor["polarizacion"]}]
+    iteraciones = 0
+    optimo = False
+
+    def lanzar(pool):
+        centro = opinion_mediana(parsed, mejor["p_final"])
+        libres = elegir_ventana(centro, m, ventana, rng)
+        x_min, x_max = cotas_vecindario(base, x_mejor, libres)
+        restante = tiempo_total - (time.perf_counter() - inicio)
+        limite = max(1.0, min(limite_subproblema, restante))
+        futuro = pool.submit(_resolver_vecindario, parsed, mzn_path, solver, x_min, x_max,
+                             limite, rng.randrange(2 ** 31))
+        return futuro, len(libres) == m
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        pendientes = {}
+        while not optimo:
+            restante = tiempo_total - (time.perf_counter() - inicio)
+            if restante <= 0:
+                break
+            while len(pendientes) < max(1, workers):
+                futuro, completa = lanzar(pool)
+                pendientes[futuro] = completa
+            hechos, _ = wait(pendientes, timeout=restante, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                completa = pendientes.pop(futuro)
+                iteraciones += 1
+                resultado = futuro.result()
+                if "error" in resultado or "matrices_movimiento" not in resultado:
+                    continue
+                verificacion = verificar_solucion(parsed, resultado)
+                if not verificacion["valido"]:
+                    continue
+                polarizacion = verificacion["recalculado"]["polarizacion"]
+                if polarizacion < mejor["polarizacion"]:
+                    mejor = dict(resultado, **verificacion["recalculado"])
+                    x_mejor = plan_a_x(mejor, m)
+                    punto = {"tiempo": round(time.perf_counter() - inicio, 3), "polarizacion": polarizacion}
+                    curva.append(punto)
+                    if on_mejora:
+                        on_mejora(punto)
+                # Con la ventana completa el subproblema es el problema entero
+                optimo = optimo or (completa and resultado.get("estado") == OPTIMO)
+        for futuro in pendientes:
+            futuro.cancel()
+
+    for clave in ("estado", "tiempo_agotado", "objetivo", "cota", "brecha", "recursos"):
+        mejor.pop(clave, None)
+    mejor["estado"] = OPTIMO if optimo else SATISFECHO
+    mejor["curva_mejora"] = curva
+    mejor["iteraciones"] = iteraciones
+    return mejor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Búsqueda LNS para instancias grandes de MinPol")
+    parser.add_argument("archivo", help="Archivo .txt de entrada")
+    parser.add_argument("--tiempo", type=float, default=60, help="Tiempo total en segundos")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Procesos en paralelo")
+    parser.add_argument("--ventana", type=int, default=VENTANA_POR_DEFECTO,
+                        help="Opiniones liberadas en cada subproblema")
+    parser.add_argument("--limite-sub", type=float, default=LIMITE_SUBPROBLEMA_S,
+                        help="Tiempo máximo por subproblema en segundos")
+    parser.add_argument("--solver", default="gecode")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--mzn", default=DEFAULT_MZN, help="Modelo .mzn a usar")
+    parser.add_argument("--curva", default=None, help="Guardar la curva de mejora en CSV (tiempo,polarizacion)")
+    args = parser.parse_args(argv)
+
+    try:
+        parsed = parse_input_text(Path(args.archivo).read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    resultado = resolver_lns(
+        parsed, mzn_path=args.mzn, solver=args.solver, tiempo_total=args.tiempo,
+        workers=args.workers, ventana=args.ventana, limite_subproblema=args.limite_sub,
+        semilla=args.semilla,
+        on_mejora=lambda p: print(f"{p['tiempo']:>8.2f} s  polarización {p['polarizacion']}", file=sys.stderr)
+    )
+    if args.curva:
+        with open(args.curva, "w", encoding='utf-8') as f:
+            f.write("tiempo,polarizacion\n")
+            for punto in resultado["curva_mejora"]:
+                f.write(f"{punto['tiempo']},{punto['polarizacion']}\n")
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
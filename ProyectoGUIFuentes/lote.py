@@ -0,0 +1,382 @@
+# lote.py
+"""
+Ejecución de lotes reanudable respaldada por un registro de trabajos en SQLite.
+
+Cada trabajo es una combinación (instancia, solver, modelo) con su estado,
+intentos, tiempos y resultado. Si el lote se interrumpe, al volver a
+ejecutarlo se saltan los trabajos completados y se reintentan los fallidos
+o con timeout, con un límite de tiempo escalado en cada intento. La mejor
+solución de cada trabajo se guarda en <lote.db>.checkpoints/ a medida que
+aparece, y el siguiente intento sigue desde ella (ver checkpoint.py).
+
+Varios procesos (del mismo lote o lanzados aparte) pueden reclamar trabajos
+a la vez: el reclamo es atómico dentro de una transacción IMMEDIATE, así que
+nunca dos procesos hacen el mismo trabajo.
+
+Con --metricas cada worker reescribe en vivo su propio archivo de métricas
+de Prometheus (lote.prom -> lote.0.prom, lote.1.prom, ...; ver metricas.py),
+listo para el textfile collector de node_exporter.
+
+Uso:
+    python lote.py agregar lote.db ../BateriaPruebas/*.txt --solver gecode --timeout 60
+    python lote.py ejecutar lote.db -j 4 [--metricas lote.prom]
+    python lote.py estado lote.db
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from checkpoint import ruta_checkpoint
+from generar_dzn import parse_input_text
+from pipeline import DEFAULT_MZN, crear_runner, resolver_instancia
+from planificador import hilos_recomendados, nucleos_disponibles
+import metricas
+import traza
+
+# Estados de un trabajo
+PENDIENTE = "pendiente"
+EJECUTANDO = "ejecutando"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+TIMEOUT = "timeout"
+
+# Margen extra sobre el timeout antes de considerar huérfano un trabajo en ejecución
+MARGEN_RECLAMO_S = 60
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id INTEGER PRIMARY KEY,
+    instancia TEXT NOT NULL,
+    hash_instancia TEXT NOT NULL,
+    solver TEXT NOT NULL,
+    mzn TEXT NOT NULL,
+    timeout REAL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    reclamado_en REAL,
+    vence_en REAL,
+    terminado_en REAL,
+    duracion REAL,
+    resultado TEXT,
+    error TEXT,
+    UNIQUE (instancia, solver, mzn)
+);
+CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (estado);
+"""
+
+
+def conectar(db_path: str) -> sqlite3.Connection:
+    """Abre el registro (y crea el esquema si no existe)."""
+    con = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    # WAL permite lecturas concurrentes mientras otro proceso escribe
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA busy_timeout=30000")
+    con.executescript(ESQUEMA)
+    return con
+
+
+def hash_archivo(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def agregar_trabajos(con: sqlite3.Connection, instancias: Iterable[str], solver="gecode",
+                     timeout: Optional[float] = None, mzn_path=DEFAULT_MZN) -> int:
+    """
+    Registra trabajos nuevos. Los que ya existen (misma instancia, solver y
+    modelo) no se duplican; si el contenido de la instancia cambió, se
+    vuelven a dejar pendientes.
+
+    Returns:
+        int: Número de trabajos nuevos o reiniciados
+    """
+    cambios = 0
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        for instancia in instancias:
+            ruta = str(Path(instancia).resolve())
+            h = hash_archivo(ruta)
+            fila = con.execute(
+                "SELECT id, hash_instancia FROM trabajos WHERE instancia = ? AND solver = ? AND mzn = ?",
+                (ruta, solver, str(mzn_path))
+            ).fetchone()
+            if fila is None:
+                con.execute(
+                    "INSERT INTO trabajos (instancia, hash_instancia, solver, mzn, timeout) VALUES (?, ?, ?, ?, ?)",
+                    (ruta, h, solver, str(mzn_path), timeout)
+                )
+                cambios += 1
+            elif fila["hash_instancia"] != h:
+                con.execute(
+                    "UPDATE trabajos SET hash_instancia = ?, timeout = ?, estado = ?, intentos = 0, "
+                    "resultado = NULL, error = NULL WHERE id = ?",
+                    (h, timeout, PENDIENTE, fila["id"])
+                )
+                cambios += 1
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return cambios
+
+
+def timeout_escalado(timeout_base: Optional[float], intento: int, factor: float) -> Optional[float]:
+    """Límite de tiempo del intento `intento` (1, 2, ...): base * factor^(intento-1)."""
+    if not timeout_base:
+        return None
+    return timeout_base * factor ** (intento - 1)
+
+
+def reclamar_trabajo(con: sqlite3.Connection, worker: str, max_intentos=3,
+                     factor=2.0) -> Optional[sqlite3.Row]:
+    """
+    Reclama atómicamente el siguiente trabajo disponible: pendiente, fallido
+    o con timeout (si le quedan intentos), o en ejecución por un worker que
+    dejó vencer su plazo (p. ej. porque la máquina se reinició), también si
+    le quedan intentos: si no, lo marca como fallido.
+
+    Returns:
+        La fila del trabajo reclamado (ya con intentos incrementado) o None
+    """
+    ahora = time.time()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        # Los vencidos sin intentos restantes (el worker murió, p. ej. por memoria,
+        # en cada intento) se dan por fallidos en vez de reclamarse para siempre
+        con.execute(
+            "UPDATE trabajos SET estado = ?, error = ? WHERE estado = ? AND vence_en < ? AND intentos >= ?",
+            (FALLIDO, "El worker dejó vencer el plazo en el último intento", EJECUTANDO, ahora, max_intentos)
+        )
+        fila = con.execute(
+            "SELECT * FROM trabajos WHERE "
+            "(estado = ? OR (estado IN (?, ?) AND intentos < ?) OR (estado = ? AND vence_en < ? AND intentos < ?)) "
+            "ORDER BY intentos, id LIMIT 1",
+            (PENDIENTE, FALLIDO, TIMEOUT, max_intentos, EJECUTANDO, ahora, max_intentos)
+        ).fetchone()
+        if fila is None:
+            con.execute("COMMIT")
+            return None
+
+        intento = fila["intentos"] + 1
+        limite = timeout_escalado(fila["timeout"], intento, factor)
+        vence_en = ahora + (limite or 24 * 3600) + MARGEN_RECLAMO_S
+        con.execute(
+            "UPDATE trabajos SET estado = ?, intentos = ?, worker = ?, reclamado_en = ?, vence_en = ? "
+            "WHERE id = ?",
+            (EJECUTANDO, intento, worker, ahora, vence_en, fila["id"])
+        )
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return con.execute("SELECT * FROM trabajos WHERE id = ?", (fila["id"],)).fetchone()
+
+
+def estado_resultado(resultado: Dict) -> str:
+    """
+    Estado de un trabajo según su resultado. Un tiempo agotado cuenta como
+    TIMEOUT aunque devuelva la mejor solución sin probar óptima: se reintenta
+    con más tiempo, retomando esa solución desde el checkpoint. Si ya no
+    quedan intentos queda en TIMEOUT con esa solución como resultado.
+    """
+    if resultado.get("tiempo_agotado") or resultado.get("timeout"):
+        return TIMEOUT
+    return FALLIDO if "error" in resultado else COMPLETADO
+
+
+def registrar_resultado(con: sqlite3.Connection, trabajo_id: int, worker: str,
+                        resultado: Dict, duracion: float):
+    """Guarda el resultado de un trabajo (solo si sigue reclamado por este worker)."""
+    estado = estado_resultado(resultado)
+    con.execute(
+        "UPDATE trabajos SET estado = ?, terminado_en = ?, duracion = ?, resultado = ?, error = ? "
+        "WHERE id = ? AND worker = ? AND estado = ?",
+        (estado, time.time(), duracion, json.dumps(resultado, ensure_ascii=False),
+         resultado.get("error"), trabajo_id, worker, EJECUTANDO)
+    )
+
+
+def bucle_worker(db_path: str, max_intentos=3, factor=2.0, worker: Optional[str] = None,
+                 memoria_mb=None, cpu_s=None, cpus=None, max_hilos=1,
+                 traza_path: Optional[str] = None, metricas_path: Optional[str] = None) -> int:
+    """
+    Reclama y resuelve trabajos hasta que no quede ninguno disponible.
+
+    memoria_mb, cpu_s y cpus se aplican a cada proceso de MiniZinc
+    (ver MiniZincRunner). Cada instancia usa los hilos que recomiende el
+    planificador según su tamaño, hasta max_hilos. Si se da traza_path,
+    los tramos de este worker se guardan ahí al terminar; si se da
+    metricas_path, sus métricas se reescriben ahí mientras trabaja.
+
+    Returns:
+        int: Número de trabajos procesados por este worker
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    con = conectar(db_path)
+    runner = crear_runner(memoria_mb=memoria_mb, cpu_s=cpu_s, cpus=cpus)
+    exportador = None
+    if metricas_path:
+        metricas.reiniciar()
+        exportador = metricas.ExportadorArchivo(metricas_path, etiquetas_fijas={"worker": worker})
+        exportador.iniciar()
+    procesados = 0
+    try:
+        while True:
+            with traza.tramo("reclamar_trabajo"):
+                trabajo = reclamar_trabajo(con, worker, max_intentos, factor)
+            if trabajo is None:
+                break
+            if metricas.activo():
+                metricas.fijar("minpol_cola_trabajos", resumen(con).get(PENDIENTE, 0))
+            limite = timeout_escalado(trabajo["timeout"], trabajo["intentos"], factor)
+            inicio = time.perf_counter()
+            with traza.tramo("trabajo", id=trabajo["id"], intento=trabajo["intentos"]):
+                try:
+                    parsed = parse_input_text(Path(trabajo["instancia"]).read_text(encoding='utf-8'))
+                    resultado = resolver_instancia(
+                        parsed, mzn_path=trabajo["mzn"], solver=trabajo["solver"],
+                        timeout=limite, runner=runner, threads=hilos_recomendados(parsed, max_hilos),
+                        checkpoint=ruta_checkpoint(f"{db_path}.checkpoints", trabajo["id"])
+                    )
+                except (OSError, ValueError) as e:
+                    resultado = {"error": str(e)}
+                registrar_resultado(con, trabajo["id"], worker, resultado, time.perf_counter() - inicio)
+            procesados += 1
+    finally:
+        con.close()
+        if exportador:
+            exportador.detener()
+        if traza_path and traza.activo():
+            traza.exportar_chrome(traza_path)
+    return procesados
+
+
+def ejecutar_lote(db_path: str, workers=1, max_intentos=3, factor=2.0,
+                  memoria_mb=None, cpu_s=None, afinidad=False, hilos_auto=False,
+                  traza_path: Optional[str] = None, metricas_path: Optional[str] = None) -> int:
+    """
+    Ejecuta el lote con `workers` procesos locales.
+
+    Args:
+        afinidad: Si True, fija cada worker a un bloque de núcleos propio
+        hilos_auto: Si True, los núcleos se reparten entre los workers y cada
+            uno da a sus instancias hasta núcleos/workers hilos según su tamaño
+        traza_path: Si se da, activa las trazas y combina las de todos los
+            workers en ese archivo (formato Chrome/Perfetto)
+        metricas_path: Si se da, cada worker i reescribe sus métricas de
+            Prometheus en metricas.ruta_worker(metricas_path, i)
+
+    Returns:
+        int: Trabajos procesados en total
+    """
+    conectar(db_path).close()
+    workers = max(1, workers)
+    n_cpus = nucleos_disponibles()
+    max_hilos = max(1, n_cpus // workers) if hilos_auto else 1
+    argumentos = []
+    for i in range(workers):
+        cpus = None
+        if afinidad:
+            inicio = (i * max_hilos) % n_cpus
+            cpus = {(inicio + k) % n_cpus for k in range(max_hilos)}
+        parte = f"{traza_path}.{i}" if traza_path else None
+        archivo_metricas = metricas.ruta_worker(metricas_path, i) if metricas_path else None
+        argumentos.append((db_path, max_intentos, factor, None, memoria_mb, cpu_s, cpus, max_hilos, parte,
+                           archivo_metricas))
+    if traza_path:
+        traza.activar()
+    if workers <= 1:
+        procesados = bucle_worker(*argumentos[0])
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            procesados = sum(pool.starmap(bucle_worker, argumentos))
+    if traza_path:
+        _combinar_trazas(traza_path, [args[-2] for args in argumentos])
+    return procesados
+
+
+def _combinar_trazas(destino: str, partes: List[str]):
+    """Une las trazas de cada worker en un solo archivo y borra las partes."""
+    eventos = []
+    for parte in partes:
+        try:
+            eventos.extend(traza.cargar_eventos(parte))
+            os.remove(parte)
+        except (OSError, ValueError):
+            continue
+    traza.reiniciar()
+    traza.exportar_chrome(destino, extra=eventos)
+
+
+def resumen(con: sqlite3.Connection) -> Dict[str, int]:
+    """Cantidad de trabajos por estado."""
+    filas = con.execute("SELECT estado, COUNT(*) AS total FROM trabajos GROUP BY estado").fetchall()
+    return {fila["estado"]: fila["total"] for fila in filas}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Lotes reanudables de MinPol sobre un registro SQLite")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_agregar = sub.add_parser("agregar", help="Registrar instancias en el lote")
+    p_agregar.add_argument("db")
+    p_agregar.add_argument("instancias", nargs="+")
+    p_agregar.add_argument("--solver", default="gecode")
+    p_agregar.add_argument("--timeout", type=float, default=300, help="Timeout base en segundos (0 = sin límite)")
+    p_agregar.add_argument("--mzn", default=DEFAULT_MZN)
+
+    p_ejecutar = sub.add_parser("ejecutar", help="Ejecutar (o reanudar) el lote")
+    p_ejecutar.add_argument("db")
+    p_ejecutar.add_argument("-j", "--workers", type=int, default=1)
+    p_ejecutar.add_argument("--max-intentos", type=int, default=3)
+    p_ejecutar.add_argument("--factor", type=float, default=2.0,
+                            help="Factor de escalado del timeout en cada reintento")
+    p_ejecutar.add_argument("--memoria-mb", type=float, default=None,
+                            help="Límite de memoria por proceso de MiniZinc en MB")
+    p_ejecutar.add_argument("--cpu-s", type=float, default=None,
+                            help="Límite de tiempo de CPU por proceso de MiniZinc en segundos")
+    p_ejecutar.add_argument("--afinidad", action="store_true",
+                            help="Fijar cada worker a núcleos distintos")
+    p_ejecutar.add_argument("--hilos-auto", action="store_true",
+                            help="Repartir los núcleos entre workers e hilos del solver según el tamaño")
+    p_ejecutar.add_argument("--traza", default=None,
+                            help="Guardar una traza Chrome/Perfetto (JSON) y mostrar el resumen por etapa")
+    p_ejecutar.add_argument("--metricas", default=None,
+                            help="Archivo base de métricas de Prometheus (uno por worker, reescritos en vivo)")
+
+    p_estado = sub.add_parser("estado", help="Mostrar el resumen del lote")
+    p_estado.add_argument("db")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "agregar":
+        con = conectar(args.db)
+        nuevos = agregar_trabajos(con, args.instancias, args.solver, args.timeout or None, args.mzn)
+        print(f"Trabajos nuevos o reiniciados: {nuevos}")
+    elif args.comando == "ejecutar":
+        procesados = ejecutar_lote(args.db, args.workers, args.max_intentos, args.factor,
+                                   args.memoria_mb, args.cpu_s, args.afinidad, args.hilos_auto,
+                                   args.traza, args.metricas)
+        print(f"Trabajos procesados: {procesados}")
+        if args.traza:
+            print(traza.tabla_resumen(traza.cargar_eventos(args.traza)))
+        con = conectar(args.db)
+    else:
+        con = conectar(args.db)
+
+    for estado, total in sorted(resumen(con).items()):
+        print(f"  {estado}: {total}")
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
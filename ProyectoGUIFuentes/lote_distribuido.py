@@ -0,0 +1,456 @@
+# lote_distribuido.py
+"""
+Lotes distribuidos sin coordinador sobre un directorio compartido.
+
+Pensado para varias máquinas que montan el mismo directorio (NFS, SMB...),
+donde SQLite no es fiable. Cada trabajo es un archivo JSON que pasa por
+las carpetas del directorio del lote:
+
+    pendientes/<id>.json   esperando worker
+    en_curso/<id>.json     reclamado; su mtime es el latido del worker
+    hechos/<id>.json       terminado (completado, o fallido/timeout tras
+                           agotar los intentos)
+    checkpoints/           mejor solución de cada trabajo hasta ahora: un
+                           intento que retoma un trabajo vencido sigue
+                           desde ahí (ver checkpoint.py)
+
+Reclamar es un os.rename de pendientes/ a en_curso/: es atómico en el
+mismo sistema de archivos, así que solo un worker lo consigue. Mientras
+resuelve, el worker actualiza el mtime de su archivo cada LATIDO_S. Si un
+archivo de en_curso/ no late en VENCIMIENTO_S, cualquier worker lo
+devuelve a pendientes/ (también con un rename atómico). Las horas se
+comparan con el reloj del propio sistema de archivos, no con el de cada
+máquina.
+
+Para modificar un trabajo reclamado (registrar el intento, guardar el
+resultado, recuperarlo) el worker primero lo mueve con un rename a un nombre
+oculto propio (.<id>.json.<worker>.propio). Si el rename falla, el reclamo
+se perdió y no se toca nada; si el worker muere con el archivo oculto, este
+vence como cualquier otro y se recupera.
+
+Uso:
+    python lote_distribuido.py preparar /compartido/lote ../BateriaPruebas/*.txt --timeout 60
+    python lote_distribuido.py worker /compartido/lote          # en cada máquina
+    python lote_distribuido.py ejecutar /compartido/lote -j 4   # varios workers locales
+    python lote_distribuido.py informe /compartido/lote --salida informe.json
+
+Con --metricas ARCHIVO cada worker reescribe en vivo sus métricas de
+Prometheus (ver metricas.py); con `ejecutar -j N`, una copia por worker.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from checkpoint import ruta_checkpoint
+from generar_dzn import parse_input_text
+import metricas
+from lote import COMPLETADO, FALLIDO, PENDIENTE, estado_resultado, hash_archivo, timeout_escalado
+from pipeline import DEFAULT_MZN, crear_runner, resolver_instancia
+from run_mzn import MiniZincRunner
+
+PENDIENTES = "pendientes"
+EN_CURSO = "en_curso"
+HECHOS = "hechos"
+CHECKPOINTS = "checkpoints"
+
+# Cada cuánto late un worker y cuánto sin latir lo da por muerto
+LATIDO_S = 10
+VENCIMIENTO_S = 60
+
+# Sufijo de los archivos que un worker apartó para modificarlos
+SUFIJO_PROPIO = ".propio"
+
+
+def _carpetas(directorio) -> Dict[str, Path]:
+    base = Path(directorio)
+    carpetas = {nombre: base / nombre for nombre in (PENDIENTES, EN_CURSO, HECHOS)}
+    for carpeta in carpetas.values():
+        carpeta.mkdir(parents=True, exist_ok=True)
+    return carpetas
+
+
+def _escribir_atomico(path: Path, datos: Dict):
+    """Escribe un JSON a través de un temporal y os.replace (nunca se ve a medias)."""
+    tmp = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(datos, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _leer(path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _apropiar(archivo: Path, nombre: str, worker: str) -> Optional[Path]:
+    """
+    Mueve `archivo` (en_curso/<nombre> o el archivo oculto de otro worker)
+    a un nombre oculto propio con un rename atómico y renueva su mtime.
+
+    Returns:
+        Ruta propia, o None si el archivo ya no estaba (el reclamo se perdió)
+    """
+    propio = archivo.with_name(f".{nombre}.{worker.replace(':', '_')}{SUFIJO_PROPIO}")
+    try:
+        os.rename(archivo, propio)
+        os.utime(propio)
+    except FileNotFoundError:
+        return None
+    return propio
+
+
+def _nombre_trabajo(archivo: Path) -> str:
+    """<id>.json de un archivo de en_curso/, esté oculto o no."""
+    if archivo.name.endswith(SUFIJO_PROPIO):
+        return archivo.name[1:].split(".json.", 1)[0] + ".json"
+    return archivo.name
+
+
+def _en_curso(carpeta: Path) -> List[Path]:
+    """Archivos de en_curso/, incluidos los apartados por algún worker."""
+    return [*carpeta.glob("*.json"), *carpeta.glob(f".*{SUFIJO_PROPIO}")]
+
+
+def _ahora_fs(directorio: Path, worker: str) -> float:
+    """Hora actual según el sistema de archivos compartido (evita desfases de reloj)."""
+    reloj = directorio / f".reloj.{worker.replace(':', '_')}"
+    reloj.touch()
+    return reloj.stat().st_mtime
+
+
+def id_trabajo(instancia: str, solver: str, mzn_path: str) -> str:
+    return hashlib.sha256(f"{instancia}\n{solver}\n{mzn_path}".encode('utf-8')).hexdigest()[:20]
+
+
+def preparar(directorio, instancias: Iterable[str], solver="gecode",
+             timeout: Optional[float] = None, mzn_path=DEFAULT_MZN) -> int:
+    """
+    Crea un trabajo pendiente por instancia. Los que ya existen (en
+    cualquier carpeta) con el mismo contenido no se duplican.
+
+    Returns:
+        int: Trabajos nuevos o reiniciados
+    """
+    carpetas = _carpetas(directorio)
+    nuevos = 0
+    for instancia in instancias:
+        ruta = str(Path(instancia).resolve())
+        trabajo_id = id_trabajo(ruta, solver, str(mzn_path))
+        h = hash_archivo(ruta)
+        existente = next((datos for datos in (_leer(c / f"{trabajo_id}.json") for c in carpetas.values())
+                          if datos is not None), None)
+        if existente is not None and existente.get("hash_instancia") == h:
+            continue
+        for carpeta in (carpetas[HECHOS], carpetas[EN_CURSO]):
+            try:
+                (carpeta / f"{trabajo_id}.json").unlink()
+            except FileNotFoundError:
+                pass
+        _escribir_atomico(carpetas[PENDIENTES] / f"{trabajo_id}.json", {
+            "id": trabajo_id, "instancia": ruta, "hash_instancia": h, "solver": solver,
+            "mzn": str(mzn_path), "timeout": timeout, "estado": PENDIENTE, "intentos": 0,
+        })
+        nuevos += 1
+    return nuevos
+
+
+def reclamar(directorio, worker: str) -> Optional[Path]:
+    """
+    Reclama un trabajo pendiente moviéndolo a en_curso/.
+
+    Returns:
+        Ruta del archivo reclamado, o None si no queda ninguno
+    """
+    carpetas = _carpetas(directorio)
+    for archivo in sorted(carpetas[PENDIENTES].glob("*.json")):
+        destino = carpetas[EN_CURSO] / archivo.name
+        try:
+            os.rename(archivo, destino)
+        except (FileNotFoundError, PermissionError):
+            # Otro worker lo reclamó primero
+            continue
+        # El rename conserva el mtime viejo: latir antes de que otro lo crea vencido
+        os.utime(destino)
+        return destino
+    return None
+
+
+def recuperar_vencidos(directorio, worker: str, vencimiento=VENCIMIENTO_S, max_intentos=3) -> int:
+    """
+    Devuelve a pendientes/ los trabajos cuyo worker dejó de latir (o los da
+    por fallidos si ya agotaron los intentos).
+
+    Returns:
+        int: Trabajos recuperados
+    """
+    carpetas = _carpetas(directorio)
+    ahora = _ahora_fs(Path(directorio), worker)
+    recuperados = 0
+    for archivo in _en_curso(carpetas[EN_CURSO]):
+        try:
+            if ahora - archivo.stat().st_mtime < vencimiento:
+                continue
+        except FileNotFoundError:
+            continue
+        # Rename atómico a un nombre propio: solo un worker recupera cada trabajo.
+        # También los archivos ocultos de un worker que murió mientras los tenía
+        nombre = _nombre_trabajo(archivo)
+        try:
+            propio = _apropiar(archivo, nombre, worker)
+        except PermissionError:
+            continue
+        if propio is None:
+            continue
+        datos = _leer(propio)
+        if datos is not None:
+            if datos["intentos"] >= max_intentos:
+                datos.update(estado=FALLIDO, resultado={"error": f"El worker {datos.get('worker')} dejó de latir"})
+                _escribir_atomico(carpetas[HECHOS] / nombre, datos)
+            else:
+                datos.update(estado=PENDIENTE, worker=None)
+                _escribir_atomico(carpetas[PENDIENTES] / nombre, datos)
+            recuperados += 1
+        _borrar(propio)
+    return recuperados
+
+
+def _borrar(path: Path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class Latido:
+    """Hilo que actualiza el mtime del trabajo reclamado mientras se resuelve."""
+
+    def __init__(self, archivo: Path, runner: Optional[MiniZincRunner], intervalo=LATIDO_S):
+        self.archivo = archivo
+        self.runner = runner
+        self.intervalo = intervalo
+        self.perdido = False
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._fin.set()
+        self._hilo.join()
+
+    def _bucle(self):
+        while not self._fin.wait(self.intervalo):
+            try:
+                os.utime(self.archivo)
+            except FileNotFoundError:
+                # Otro worker lo dio por vencido: no tiene sentido seguir
+                self.perdido = True
+                if self.runner is not None:
+                    self.runner.cancel()
+                return
+
+
+def _ejecutar_trabajo(archivo: Path, worker: str, runner: Optional[MiniZincRunner],
+                      factor: float, latido: float) -> Optional[Dict]:
+    """Resuelve un trabajo reclamado. Devuelve None si se perdió el reclamo."""
+    # El intento queda registrado aunque el worker muera a mitad. Se escribe
+    # sobre la copia apartada: si el reclamo ya se perdió, no se recrea
+    propio = _apropiar(archivo, archivo.name, worker)
+    if propio is None:
+        return None
+    datos = _leer(propio)
+    if datos is None:
+        _borrar(propio)
+        return None
+    datos["intentos"] += 1
+    datos["worker"] = worker
+    _escribir_atomico(propio, datos)
+    try:
+        os.rename(propio, archivo)
+    except FileNotFoundError:
+        return None
+    limite = timeout_escalado(datos["timeout"], datos["intentos"], factor)
+    inicio = time.perf_counter()
+    with Latido(archivo, runner, latido) as vigia:
+        try:
+            parsed = parse_input_text(Path(datos["instancia"]).read_text(encoding='utf-8'))
+            checkpoint = ruta_checkpoint(archivo.parent.parent / CHECKPOINTS, datos["id"])
+            resultado = resolver_instancia(parsed, mzn_path=datos["mzn"], solver=datos["solver"],
+                                           timeout=limite, runner=runner, checkpoint=checkpoint)
+        except (OSError, ValueError) as e:
+            resultado = {"error": str(e)}
+    if vigia.perdido:
+        return None
+    datos["duracion"] = time.perf_counter() - inicio
+    datos["resultado"] = resultado
+    datos["terminado_en"] = time.time()
+    return datos
+
+
+def bucle_worker(directorio, max_intentos=3, factor=2.0, worker: Optional[str] = None,
+                 latido=LATIDO_S, vencimiento=VENCIMIENTO_S, metricas_path: Optional[str] = None) -> int:
+    """
+    Reclama y resuelve trabajos hasta que no quede ninguno pendiente ni en
+    curso (los en curso de otros workers se esperan por si vencen). Si se
+    da metricas_path, las métricas del worker se reescriben ahí.
+
+    Returns:
+        int: Trabajos terminados por este worker
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    carpetas = _carpetas(directorio)
+    runner = crear_runner()
+    exportador = None
+    if metricas_path:
+        metricas.reiniciar()
+        exportador = metricas.ExportadorArchivo(metricas_path, etiquetas_fijas={"worker": worker})
+        exportador.iniciar()
+    try:
+        return _procesar(directorio, carpetas, worker, runner, max_intentos, factor, latido, vencimiento)
+    finally:
+        if exportador:
+            exportador.detener()
+
+
+def _procesar(directorio, carpetas, worker, runner, max_intentos, factor, latido, vencimiento) -> int:
+    procesados = 0
+    while True:
+        recuperar_vencidos(directorio, worker, vencimiento, max_intentos)
+        archivo = reclamar(directorio, worker)
+        if archivo is None:
+            if not _en_curso(carpetas[EN_CURSO]):
+                break
+            time.sleep(min(latido, vencimiento / 4))
+            continue
+        if metricas.activo():
+            metricas.fijar("minpol_cola_trabajos", sum(1 for _ in carpetas[PENDIENTES].glob("*.json")))
+
+        datos = _ejecutar_trabajo(archivo, worker, runner, factor, latido)
+        if datos is None:
+            continue
+        datos["estado"] = estado_resultado(datos["resultado"])
+
+        if datos["estado"] != COMPLETADO and datos["intentos"] < max_intentos:
+            destino = carpetas[PENDIENTES] / archivo.name
+        else:
+            destino = carpetas[HECHOS] / archivo.name
+        # Apartar el reclamo antes de registrar: si otro worker lo recuperó en el
+        # último intervalo de latido, en_curso/<id>.json puede ser ya su reclamo
+        propio = _apropiar(archivo, archivo.name, worker)
+        if propio is None:
+            continue
+        _escribir_atomico(destino, datos)
+        _borrar(propio)
+        procesados += 1
+    return procesados
+
+
+def ejecutar(directorio, workers=1, max_intentos=3, factor=2.0,
+             latido=LATIDO_S, vencimiento=VENCIMIENTO_S, metricas_path: Optional[str] = None) -> int:
+    """
+    Lanza `workers` procesos locales contra el directorio del lote. Con
+    metricas_path, el worker i escribe en metricas.ruta_worker(metricas_path, i).
+    """
+    _carpetas(directorio)
+    argumentos = [(str(directorio), max_intentos, factor, None, latido, vencimiento,
+                   metricas.ruta_worker(metricas_path, i) if metricas_path else None)
+                  for i in range(max(1, workers))]
+    if workers <= 1:
+        return bucle_worker(*argumentos[0])
+    with multiprocessing.Pool(workers) as pool:
+        return sum(pool.starmap(bucle_worker, argumentos))
+
+
+def informe(directorio) -> Dict:
+    """
+    Une el estado de todos los trabajos en un solo informe.
+
+    Returns:
+        Dict con 'resumen' (trabajos por estado) y 'trabajos' (uno por instancia)
+    """
+    carpetas = _carpetas(directorio)
+    trabajos: List[Dict] = []
+    for nombre in (HECHOS, EN_CURSO, PENDIENTES):
+        archivos = _en_curso(carpetas[nombre]) if nombre == EN_CURSO else carpetas[nombre].glob("*.json")
+        for archivo in sorted(archivos):
+            datos = _leer(archivo)
+            if datos is None:
+                continue
+            if nombre == EN_CURSO:
+                datos["estado"] = "ejecutando"
+            resultado = datos.pop("resultado", None) or {}
+            datos["polarizacion"] = resultado.get("polarizacion")
+            datos["error"] = resultado.get("error")
+            trabajos.append(datos)
+    resumen: Dict[str, int] = {}
+    for datos in trabajos:
+        resumen[datos["estado"]] = resumen.get(datos["estado"], 0) + 1
+    return {"resumen": resumen, "trabajos": sorted(trabajos, key=lambda d: d["instancia"])}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Lotes distribuidos de MinPol sobre un directorio compartido")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_preparar = sub.add_parser("preparar", help="Crear los trabajos del lote")
+    p_preparar.add_argument("directorio")
+    p_preparar.add_argument("instancias", nargs="+")
+    p_preparar.add_argument("--solver", default="gecode")
+    p_preparar.add_argument("--timeout", type=float, default=300, help="Timeout base en segundos (0 = sin límite)")
+    p_preparar.add_argument("--mzn", default=DEFAULT_MZN)
+
+    for nombre, ayuda in (("worker", "Ejecutar un worker en esta máquina"),
+                          ("ejecutar", "Ejecutar varios workers locales")):
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument("directorio")
+        if nombre == "ejecutar":
+            p.add_argument("-j", "--workers", type=int, default=1)
+        p.add_argument("--max-intentos", type=int, default=3)
+        p.add_argument("--factor", type=float, default=2.0,
+                       help="Factor de escalado del timeout en cada reintento")
+        p.add_argument("--latido", type=float, default=LATIDO_S, help="Segundos entre latidos")
+        p.add_argument("--vencimiento", type=float, default=VENCIMIENTO_S,
+                       help="Segundos sin latido tras los que se recupera un trabajo")
+        p.add_argument("--metricas", default=None,
+                       help="Archivo de métricas de Prometheus, reescrito en vivo (uno por worker)")
+
+    p_informe = sub.add_parser("informe", help="Unir los resultados en un informe")
+    p_informe.add_argument("directorio")
+    p_informe.add_argument("--salida", default=None, help="Guardar el informe completo en JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "preparar":
+        nuevos = preparar(args.directorio, args.instancias, args.solver, args.timeout or None, args.mzn)
+        print(f"Trabajos nuevos o reiniciados: {nuevos}")
+        return
+    if args.comando == "worker":
+        procesados = bucle_worker(args.directorio, args.max_intentos, args.factor,
+                                  latido=args.latido, vencimiento=args.vencimiento,
+                                  metricas_path=args.metricas)
+        print(f"Trabajos procesados: {procesados}")
+    elif args.comando == "ejecutar":
+        procesados = ejecutar(args.directorio, args.workers, args.max_intentos, args.factor,
+                              args.latido, args.vencimiento, args.metricas)
+        print(f"Trabajos procesados: {procesados}")
+
+    datos = informe(args.directorio)
+    if getattr(args, "salida", None):
+        Path(args.salida).write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding='utf-8')
+    for estado, total in sorted(datos["resumen"].items()):
+        print(f"  {estado}: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# metricas.py
+"""
+Métricas operativas en formato de texto de Prometheus.
+
+Contadores, indicadores e histogramas en memoria para las ejecuciones
+desatendidas (lotes, barridos, servicio): resoluciones iniciadas y
+terminadas por estado, latencia de resolución y de aplanado por solver,
+aciertos y fallos de caché, profundidad de cola y timeouts.
+
+Desactivadas por defecto: incrementar(), fijar() y observar() solo
+comprueban una bandera. Se activan con activar() o con la variable de
+entorno MINPOL_METRICAS=1 (la heredan los procesos hijos de los lotes).
+Se exponen escribiendo un archivo periódicamente (ExportadorArchivo,
+compatible con el textfile collector de node_exporter) o sirviendo
+/metrics en 127.0.0.1 (servir).
+
+Uso:
+    metricas.activar()
+    with metricas.ExportadorArchivo("minpol.prom", intervalo=5):
+        ...
+    metricas.servir(9108)   # http://127.0.0.1:9108/metrics
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+HOST = "127.0.0.1"
+
+CONTADOR = "counter"
+INDICADOR = "gauge"
+HISTOGRAMA = "histogram"
+
+# Límites (segundos) de los histogramas de latencia
+LIMITES_S = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+DEFINICIONES = {
+    "minpol_resoluciones_iniciadas_total": (CONTADOR, "Resoluciones iniciadas"),
+    "minpol_resoluciones_terminadas_total": (CONTADOR, "Resoluciones terminadas, por estado"),
+    "minpol_timeouts_total": (CONTADOR, "Resoluciones que agotaron el tiempo (con o sin solución)"),
+    "minpol_resolucion_segundos": (HISTOGRAMA, "Duración de cada resolución (sin aciertos de caché)"),
+    "minpol_aplanado_segundos": (HISTOGRAMA, "Tiempo de aplanado de MiniZinc (flatTime)"),
+    "minpol_cache_aciertos_total": (CONTADOR, "Aciertos de la caché de resultados"),
+    "minpol_cache_fallos_total": (CONTADOR, "Fallos de la caché de resultados"),
+    "minpol_cola_trabajos": (INDICADOR, "Trabajos en espera en la cola"),
+    "minpol_workers_ocupados": (INDICADOR, "Workers resolviendo un trabajo"),
+}
+
+_activo = os.environ.get("MINPOL_METRICAS", "") not in ("", "0")
+_lock = threading.Lock()
+# (nombre, etiquetas) -> valor, o [cuentas por límite, suma, total] en histogramas
+_series: Dict[tuple, object] = {}
+
+
+def activar():
+    """Activa la captura (también en los procesos hijos que se creen después)."""
+    global _activo
+    _activo = True
+    os.environ["MINPOL_METRICAS"] = "1"
+
+
+def desactivar():
+    global _activo
+    _activo = False
+    os.environ.pop("MINPOL_METRICAS", None)
+
+
+def activo() -> bool:
+    return _activo
+
+
+def reiniciar():
+    with _lock:
+        _series.clear()
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def incrementar(nombre: str, valor: float = 1, **etiquetas):
+    """Suma `valor` a un contador."""
+    if not _activo:
+        return
+    clave = _clave(nombre, etiquetas)
+    with _lock:
+        _series[clave] = _series.get(clave, 0) + valor
+
+
+def fijar(nombre: str, valor: float, **etiquetas):
+    """Fija el valor de un indicador."""
+    if not _activo:
+        return
+    with _lock:
+        _series[_clave(nombre, etiquetas)] = valor
+
+
+def observar(nombre: str, valor: float, **etiquetas):
+    """Registra una observación (en segundos) en un histograma."""
+    if not _activo:
+        return
+    clave = _clave(nombre, etiquetas)
+    with _lock:
+        serie = _series.get(clave)
+        if serie is None:
+            serie = _series[clave] = [[0] * len(LIMITES_S), 0.0, 0]
+        for i, limite in enumerate(LIMITES_S):
+            if valor <= limite:
+                serie[0][i] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _etiquetas(pares, extra=()) -> str:
+    todos = list(pares) + list(extra)
+    if not todos:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in todos) + "}"
+
+
+def _numero(valor) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def texto_prometheus(etiquetas_fijas: Optional[Dict[str, str]] = None) -> str:
+    """
+    Todas las series en formato de texto de Prometheus (versión 0.0.4).
+    `etiquetas_fijas` se agregan a cada serie (p. ej. worker="3").
+    """
+    fijas = tuple(sorted((k, str(v)) for k, v in (etiquetas_fijas or {}).items()))
+    with _lock:
+        series = {clave: (list(valor[0]), valor[1], valor[2]) if isinstance(valor, list) else valor
+                  for clave, valor in _series.items()}
+
+    lineas = []
+    for nombre, (tipo, ayuda) in DEFINICIONES.items():
+        propias = sorted((clave[1], valor) for clave, valor in series.items() if clave[0] == nombre)
+        if not propias:
+            continue
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for pares, valor in propias:
+            pares = pares + fijas
+            if tipo != HISTOGRAMA:
+                lineas.append(f"{nombre}{_etiquetas(pares)} {_numero(valor)}")
+                continue
+            cuentas, suma, total = valor
+            for limite, cuenta in zip(LIMITES_S, cuentas):
+                lineas.append(f"{nombre}_bucket{_etiquetas(pares, [('le', _numero(limite))])} {cuenta}")
+            lineas.append(f"{nombre}_bucket{_etiquetas(pares, [('le', '+Inf')])} {total}")
+            lineas.append(f"{nombre}_sum{_etiquetas(pares)} {_numero(suma)}")
+            lineas.append(f"{nombre}_count{_etiquetas(pares)} {total}")
+    return "\n".join(lineas) + "\n" if lineas else ""
+
+
+def exportar_archivo(path, etiquetas_fijas: Optional[Dict[str, str]] = None):
+    """Escribe las métricas en `path` a través de un temporal y os.replace."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(texto_prometheus(etiquetas_fijas), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def ruta_worker(path, indice) -> str:
+    """Archivo de métricas del worker `indice` de un lote: lote.prom -> lote.3.prom."""
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}.{indice}{path.suffix}"))
+
+
+class ExportadorArchivo:
+    """Reescribe el archivo de métricas cada `intervalo` segundos mientras está activo."""
+
+    def __init__(self, path, intervalo: float = 5.0, etiquetas_fijas: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.intervalo = intervalo
+        self.etiquetas_fijas = etiquetas_fijas
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+
+    def iniciar(self):
+        activar()
+        self._hilo.start()
+
+    def detener(self):
+        """Para el hilo y escribe el estado final."""
+        self._parar.set()
+        self._hilo.join()
+        self._escribir()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def _escribir(self):
+        try:
+            exportar_archivo(self.path, self.etiquetas_fijas)
+        except OSError:
+            # Un fallo al escribir las métricas no debe cortar la ejecución
+            pass
+
+    def _bucle(self):
+        while not self._parar.wait(self.intervalo):
+            self._escribir()
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("/metrics", ""):
+            self.send_error(404)
+            return
+        cuerpo = texto_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def servir(puerto: int, host: str = HOST) -> ThreadingHTTPServer:
+    """Sirve /metrics en host:puerto desde un hilo de fondo (activa la captura)."""
+    activar()
+    servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,274 @@
+# minpol.py
+"""
+Línea de comandos de MinPol (sin interfaz gráfica).
+
+Uso:
+    python -m minpol ../BateriaPruebas/Prueba1.txt ../BateriaPruebas/Prueba2.txt
+    python -m minpol --jsonl < instancias.jsonl > resultados.jsonl
+
+En modo --jsonl cada línea de stdin es un objeto JSON con una de estas formas:
+    {"id": "a1", "texto": "<contenido del .txt>"}
+    {"id": "a2", "archivo": "ruta/a/instancia.txt"}
+    {"id": "a3", "n": 10, "m": 3, "p": [...], "v": [...], "s": [[...]], "ct": 25, "max_movs": 5}
+
+Por cada instancia se escribe una línea JSON en stdout en cuanto termina
+(el orden de salida es el orden de finalización, no el de entrada).
+
+Con --metricas ARCHIVO (o --metricas-puerto) se exponen contadores e
+histogramas en formato de Prometheus mientras corre el lote (ver metricas.py).
+"""
+
+import argparse
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from checkpoint import ruta_checkpoint
+from generar_dzn import CLAVES_INSTANCIA, format_input_text, parse_input_text
+from generar_salida import generate_output_txt
+from pipeline import DEFAULT_MZN, crear_runner, resolver_texto
+from planificador import PresupuestoNucleos, hilos_recomendados, nucleos_disponibles, tamano_instancia
+import metricas
+import traza
+
+def leer_tarea_jsonl(linea, numero):
+    """
+    Convierte una línea JSONL en (id, texto). Lanza ValueError si es inválida.
+    """
+    try:
+        obj = json.loads(linea)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON inválido: {e}")
+    if not isinstance(obj, dict):
+        raise ValueError("Cada línea debe ser un objeto JSON")
+
+    tarea_id = obj.get("id", numero)
+    if "texto" in obj:
+        return tarea_id, obj["texto"]
+    if "archivo" in obj:
+        try:
+            return tarea_id, Path(obj["archivo"]).read_text(encoding='utf-8')
+        except OSError as e:
+            raise ValueError(f"No se pudo leer '{obj['archivo']}': {e}")
+    if all(clave in obj for clave in CLAVES_INSTANCIA):
+        try:
+            return tarea_id, format_input_text(obj)
+        except (TypeError, KeyError) as e:
+            raise ValueError(f"Instancia inválida: {e}")
+    raise ValueError("La línea debe tener 'texto', 'archivo' o las claves " + ", ".join(CLAVES_INSTANCIA))
+
+
+def tareas_desde_archivos(rutas):
+    """Genera (id, texto) para cada archivo .txt indicado."""
+    for ruta in rutas:
+        try:
+            yield ruta, Path(ruta).read_text(encoding='utf-8')
+        except OSError as e:
+            yield ruta, e
+
+
+def tareas_desde_jsonl(stream):
+    """Genera (id, texto) por cada línea no vacía de un stream JSONL."""
+    for numero, linea in enumerate(stream, start=1):
+        if not linea.strip():
+            continue
+        try:
+            yield leer_tarea_jsonl(linea, numero)
+        except ValueError as e:
+            yield numero, e
+
+
+def ordenar_por_tamano(tareas):
+    """
+    Ordena las tareas de mayor a menor tamaño (las grandes primero reducen el
+    tiempo total cuando se reparten núcleos). Las que no parsean van al final.
+    """
+    def tamano(tarea):
+        try:
+            return tamano_instancia(parse_input_text(tarea[1]))
+        except (ValueError, AttributeError):
+            return -1
+    return sorted(tareas, key=tamano, reverse=True)
+
+
+def ejecutar_tarea(tarea_id, texto, args, presupuesto=None):
+    """
+    Resuelve una tarea y construye la línea de resultado.
+
+    Si se da un PresupuestoNucleos, reserva los hilos recomendados para la
+    instancia antes de lanzar el solver y los libera al terminar.
+    """
+    if isinstance(texto, Exception):
+        return {"id": tarea_id, "estado": "error", "error": str(texto)}
+
+    hilos = args.hilos
+    if presupuesto is not None:
+        try:
+            hilos = hilos_recomendados(parse_input_text(texto), presupuesto.total)
+        except ValueError:
+            hilos = 1
+        with traza.tramo("espera_nucleos", id=str(tarea_id), hilos=hilos):
+            hilos = presupuesto.adquirir(hilos)
+
+    try:
+        runner = crear_runner(memoria_mb=args.memoria_mb, cpu_s=args.cpu_s)
+        with traza.tramo("tarea", id=str(tarea_id)):
+            salida = resolver_texto(texto, mzn_path=args.mzn, solver=args.solver, timeout=args.timeout,
+                                    runner=runner, threads=hilos, random_seed=args.semilla,
+                                    free_search=args.busqueda_libre, exhaustivo=not args.sin_exhaustivo,
+                                    checkpoint=ruta_checkpoint(args.checkpoints, tarea_id) if args.checkpoints else None)
+    except (OSError, ValueError) as e:
+        # Por ejemplo, MiniZinc no está en PATH o la instancia no se puede escalar
+        return {"id": tarea_id, "estado": "error", "error": str(e)}
+    finally:
+        if presupuesto is not None:
+            presupuesto.liberar(hilos)
+    linea = {"id": tarea_id, "estado": "error" if "error" in salida else "ok"}
+    if hilos:
+        linea["hilos"] = hilos
+    linea.update(salida)
+
+    if args.salida and "error" not in salida:
+        destino = Path(args.salida) / f"{Path(str(tarea_id)).stem}.txt"
+        try:
+            generate_output_txt(salida["resultado"], str(destino))
+            linea["archivo_salida"] = str(destino)
+        except (OSError, ValueError) as e:
+            linea["error_salida"] = str(e)
+    return linea
+
+
+def procesar(tareas, args, out=sys.stdout):
+    """
+    Resuelve las tareas con un pool de hilos y escribe una línea por tarea
+    en cuanto termina. Mantiene a lo sumo 2 * workers tareas en vuelo, así
+    que la entrada por stdin se consume a medida que hay capacidad.
+
+    Con --auto-nucleos hay un worker por núcleo y cada instancia reserva
+    del presupuesto común tantos núcleos como hilos le asigna el planificador.
+
+    Returns:
+        int: Número de tareas con error
+    """
+    errores = 0
+    lock_out = threading.Lock()
+
+    def emitir(linea):
+        with lock_out:
+            out.write(json.dumps(linea, ensure_ascii=False) + "\n")
+            out.flush()
+
+    presupuesto = None
+    workers = max(1, args.workers)
+    if args.auto_nucleos:
+        presupuesto = PresupuestoNucleos(nucleos_disponibles())
+        workers = presupuesto.total
+
+    def medir_ocupacion(en_vuelo):
+        metricas.fijar("minpol_workers_ocupados", min(en_vuelo, workers))
+        metricas.fijar("minpol_cola_trabajos", max(0, en_vuelo - workers))
+
+    max_en_vuelo = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pendientes = set()
+        for tarea_id, texto in tareas:
+            pendientes.add(pool.submit(ejecutar_tarea, tarea_id, texto, args, presupuesto))
+            medir_ocupacion(len(pendientes))
+            if len(pendientes) >= max_en_vuelo:
+                hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    linea = futuro.result()
+                    errores += linea["estado"] != "ok"
+                    emitir(linea)
+                medir_ocupacion(len(pendientes))
+        while pendientes:
+            hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                linea = futuro.result()
+                errores += linea["estado"] != "ok"
+                emitir(linea)
+            medir_ocupacion(len(pendientes))
+    return errores
+
+
+def construir_parser():
+    parser = argparse.ArgumentParser(
+        prog="minpol",
+        description="Resuelve instancias de MinPol con MiniZinc (sin interfaz gráfica)"
+    )
+    parser.add_argument("archivos", nargs="*", help="Archivos .txt de entrada")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Leer instancias como JSONL desde stdin")
+    parser.add_argument("--solver", default="gecode",
+                        help="Solver de MiniZinc (por defecto: gecode; 'auto' = elegir por historial)")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="Tiempo máximo por instancia en segundos (0 = sin límite)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Instancias a resolver en paralelo")
+    parser.add_argument("--hilos", type=int, default=None,
+                        help="Hilos del solver por instancia (-p de MiniZinc)")
+    parser.add_argument("--auto-nucleos", action="store_true",
+                        help="Repartir automáticamente los núcleos entre instancias e hilos según el tamaño")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla aleatoria del solver")
+    parser.add_argument("--busqueda-libre", action="store_true",
+                        help="Permitir búsqueda libre al solver (-f de MiniZinc)")
+    parser.add_argument("--mzn", default=DEFAULT_MZN, help="Modelo .mzn a usar")
+    parser.add_argument("--sin-exhaustivo", action="store_true",
+                        help="Usar MiniZinc también en instancias chicas (ver exhaustivo.py)")
+    parser.add_argument("--memoria-mb", type=float, default=None,
+                        help="Límite de memoria por instancia en MB (solo POSIX)")
+    parser.add_argument("--cpu-s", type=float, default=None,
+                        help="Límite de tiempo de CPU por instancia en segundos (solo POSIX)")
+    parser.add_argument("--checkpoints", default=None,
+                        help="Directorio donde guardar la mejor solución de cada instancia a medida que "
+                             "aparece; al repetir la ejecución se reanuda desde ahí")
+    parser.add_argument("--salida", default=None,
+                        help="Directorio donde guardar la salida .txt de cada instancia")
+    parser.add_argument("--traza", default=None,
+                        help="Guardar una traza Chrome/Perfetto (JSON) y mostrar el resumen por etapa en stderr")
+    parser.add_argument("--metricas", default=None,
+                        help="Archivo de métricas de Prometheus, reescrito cada 5 s mientras corre el lote")
+    parser.add_argument("--metricas-puerto", type=int, default=None,
+                        help="Servir las métricas de Prometheus en http://127.0.0.1:PUERTO/metrics")
+    return parser
+
+
+def main(argv=None):
+    args = construir_parser().parse_args(argv)
+    if args.timeout is not None and args.timeout <= 0:
+        args.timeout = None
+    if args.salida:
+        Path(args.salida).mkdir(parents=True, exist_ok=True)
+    if args.traza:
+        traza.activar()
+
+    if args.jsonl:
+        tareas = tareas_desde_jsonl(sys.stdin)
+    elif args.archivos:
+        tareas = tareas_desde_archivos(args.archivos)
+        if args.auto_nucleos:
+            tareas = ordenar_por_tamano(list(tareas))
+    else:
+        construir_parser().error("Indica archivos .txt o usa --jsonl")
+
+    exportador = metricas.ExportadorArchivo(args.metricas) if args.metricas else None
+    if exportador:
+        exportador.iniciar()
+    if args.metricas_puerto:
+        metricas.servir(args.metricas_puerto)
+    try:
+        with traza.tramo("lote"):
+            errores = procesar(tareas, args)
+    finally:
+        if exportador:
+            exportador.detener()
+    if args.traza:
+        traza.exportar_chrome(args.traza)
+        print(traza.tabla_resumen(), file=sys.stderr)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
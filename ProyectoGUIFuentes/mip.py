@@ -0,0 +1,428 @@
+# mip.py
+"""
+Formulación lineal de MinPol para solvers MIP, generada desde la instancia.
+
+Es la misma formulación de ProyectoMZN/ProyectoMIP.mzn: la polarización
+(doble, escalada) es 2 * min_r sum_j p_final[j] * |v_int[j] - v_int[r]|,
+así que basta elegir con binarias ref[r] la opinión de referencia y acotar
+con un big-M la desviación respecto de ella. No hay arreglo de personas ni
+comparaciones reificadas, y el modelo tiene O(m^2) variables en vez de
+O(n^2) restricciones.
+
+El modelo se exporta en formato LP (CPLEX) o MPS libre, y se puede resolver
+con el ejecutable `cbc` directamente o con ProyectoMIP.mzn a través de
+MiniZinc (--solver coin-bc). El subcomando `comparar` mide los dos modelos
+y CBC directo sobre las mismas instancias.
+
+Uso:
+    python mip.py exportar instancia.txt --lp modelo.lp --mps modelo.mps
+    python mip.py resolver instancia.txt --timeout 60
+    python mip.py comparar ../BateriaPruebas/Prueba*.txt --solver coin-bc --timeout 60 --csv comparacion.csv
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from generar_dzn import cotas_movimiento, escalado_exacto, parse_input_text
+from pipeline import DEFAULT_MZN, MZN_DIR, resolver_instancia
+from run_mzn import DESCONOCIDO, MARGEN_TIMEOUT_S, OPTIMO, SATISFECHO, UNSAT
+from verificador import CLAVES_MATRICES, verificar_solucion
+
+MIP_MZN = str(MZN_DIR / "ProyectoMIP.mzn")
+
+# Términos por línea al escribir el formato LP
+TERMINOS_POR_LINEA = 8
+
+
+def construir_modelo(parsed: Dict, cotas=None) -> Dict:
+    """
+    Construye el modelo lineal de la instancia.
+
+    Args:
+        parsed: Dict de la instancia (salida de parse_input_text)
+        cotas: (x_min, x_max) opcionales, como en generate_dzn
+
+    Returns:
+        Dict con 'variables' {nombre: (lb, ub, tipo)} (tipo "I", "B" o "C"),
+        'restricciones' [(nombre, {variable: coef}, sentido, rhs)] (sentido
+        "<=", ">=" o "=") y 'objetivo' {variable: coef} (a minimizar)
+    """
+    n, m = parsed['n'], parsed['m']
+    s = parsed['s']
+    esc = escalado_exacto(parsed)
+    v_int, peso = esc['v_int'], esc['peso_costo']
+    if cotas is None:
+        x_min, x_max = [[[0] * 3 for _ in range(m)] for _ in range(m)], cotas_movimiento(parsed)
+    else:
+        x_min, x_max = cotas
+
+    variables: Dict[str, tuple] = {}
+    restricciones: List[tuple] = []
+
+    # x[i,j,k]: solo las que pueden ser positivas (el resto es 0 por las cotas)
+    x = {}
+    for i in range(m):
+        for j in range(m):
+            for k in range(3):
+                if x_max[i][j][k] > 0:
+                    nombre = f"x_{i + 1}_{j + 1}_{k + 1}"
+                    x[i, j, k] = nombre
+                    variables[nombre] = (x_min[i][j][k], x_max[i][j][k], "I")
+
+    for i in range(m):
+        for k in range(3):
+            fila = {x[i, j, k]: 1 for j in range(m) if (i, j, k) in x}
+            if fila and sum(x_max[i][j][k] for j in range(m)) > s[i][k]:
+                restricciones.append((f"salen_{i + 1}_{k + 1}", fila, "<=", s[i][k]))
+
+    movs = {nombre: abs(i - j) for (i, j, k), nombre in x.items()}
+    costo = {nombre: abs(i - j) * peso[k] for (i, j, k), nombre in x.items()}
+    if movs:
+        restricciones.append(("movimientos", movs, "<=", parsed['max_movs']))
+        restricciones.append(("costo", costo, "<=", esc['ct_int']))
+
+    # p_final[j] = p[j] + entradas - salidas
+    for j in range(m):
+        nombre = f"pf_{j + 1}"
+        variables[nombre] = (0, n, "C")
+        fila = {nombre: 1}
+        for (a, b, k), var in x.items():
+            if b == j:
+                fila[var] = fila.get(var, 0) - 1
+            if a == j:
+                fila[var] = fila.get(var, 0) + 1
+        restricciones.append((f"final_{j + 1}", fila, "=", sum(s[j])))
+
+    # Opinión de referencia y desviación respecto de ella (big-M)
+    for r in range(m):
+        variables[f"ref_{r + 1}"] = (0, 1, "B")
+    restricciones.append(("referencia", {f"ref_{r + 1}": 1 for r in range(m)}, "=", 1))
+    objetivo = {}
+    for r in range(m):
+        desv_max = n * max(abs(v_int[j] - v_int[r]) for j in range(m))
+        nombre = f"desv_{r + 1}"
+        variables[nombre] = (0, desv_max, "C")
+        objetivo[nombre] = 2
+        # desv[r] >= sum_j |v_j - v_r| p_final[j] - desv_max * (1 - ref[r])
+        fila = {nombre: 1, f"ref_{r + 1}": -desv_max}
+        for j in range(m):
+            if v_int[j] != v_int[r]:
+                fila[f"pf_{j + 1}"] = -abs(v_int[j] - v_int[r])
+        restricciones.append((f"desviacion_{r + 1}", fila, ">=", -desv_max))
+
+    return {"variables": variables, "restricciones": restricciones, "objetivo": objetivo}
+
+
+def _numero(valor) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def _expresion(coefs: Dict[str, float]) -> List[str]:
+    """Términos '+ 3 x' / '- x' de una expresión lineal."""
+    terminos = []
+    for var, coef in coefs.items():
+        if coef == 0:
+            continue
+        signo = "-" if coef < 0 else "+"
+        magnitud = abs(coef)
+        terminos.append(f"{signo} {var}" if magnitud == 1 else f"{signo} {_numero(magnitud)} {var}")
+    return terminos or ["0"]
+
+
+def _lineas_lp(prefijo: str, terminos: List[str]) -> List[str]:
+    lineas = []
+    for inicio in range(0, len(terminos), TERMINOS_POR_LINEA):
+        trozo = " ".join(terminos[inicio:inicio + TERMINOS_POR_LINEA])
+        lineas.append((prefijo if inicio == 0 else "   ") + trozo)
+    return lineas
+
+
+def escribir_lp(modelo: Dict, path: str):
+    """Escribe el modelo en formato LP (CPLEX), legible por CBC, HiGHS, Gurobi y GLPK."""
+    sentidos = {"<=": "<=", ">=": ">=", "=": "="}
+    lineas = ["\\ MinPol - formulación lineal (ver mip.py)", "Minimize"]
+    lineas += _lineas_lp(" obj: ", _expresion(modelo["objetivo"]))
+    lineas.append("Subject To")
+    for nombre, coefs, sentido, rhs in modelo["restricciones"]:
+        terminos = _expresion(coefs)
+        terminos[-1] += f" {sentidos[sentido]} {_numero(rhs)}"
+        lineas += _lineas_lp(f" {nombre}: ", terminos)
+    lineas.append("Bounds")
+    for nombre, (lb, ub, tipo) in modelo["variables"].items():
+        if tipo != "B":
+            lineas.append(f" {_numero(lb)} <= {nombre} <= {_numero(ub)}")
+    for seccion, tipo in (("General", "I"), ("Binary", "B")):
+        nombres = [nombre for nombre, (_, _, t) in modelo["variables"].items() if t == tipo]
+        if nombres:
+            lineas.append(seccion)
+            lineas += _lineas_lp(" ", nombres)
+    lineas.append("End")
+    Path(path).write_text("\n".join(lineas) + "\n", encoding='utf-8')
+
+
+def escribir_mps(modelo: Dict, path: str):
+    """Escribe el modelo en formato MPS libre (los nombres pueden tener más de 8 caracteres)."""
+    tipos_fila = {"<=": "L", ">=": "G", "=": "E"}
+    columnas: Dict[str, List[tuple]] = {nombre: [] for nombre in modelo["variables"]}
+    for var, coef in modelo["objetivo"].items():
+        columnas[var].append(("obj", coef))
+    for nombre, coefs, _, _ in modelo["restricciones"]:
+        for var, coef in coefs.items():
+            if coef != 0:
+                columnas[var].append((nombre, coef))
+
+    lineas = ["NAME MinPol", "ROWS", " N obj"]
+    lineas += [f" {tipos_fila[sentido]} {nombre}" for nombre, _, sentido, _ in modelo["restricciones"]]
+    lineas.append("COLUMNS")
+    enteras = False
+    for var, (_, _, tipo) in modelo["variables"].items():
+        entera = tipo in ("I", "B")
+        if entera != enteras:
+            marca = "'INTORG'" if entera else "'INTEND'"
+            lineas.append(f" MARKER 'MARKER' {marca}")
+            enteras = entera
+        for fila, coef in columnas[var]:
+            lineas.append(f" {var} {fila} {_numero(coef)}")
+    if enteras:
+        lineas.append(" MARKER 'MARKER' 'INTEND'")
+    lineas.append("RHS")
+    for nombre, _, _, rhs in modelo["restricciones"]:
+        if rhs != 0:
+            lineas.append(f" RHS {nombre} {_numero(rhs)}")
+    lineas.append("BOUNDS")
+    for var, (lb, ub, tipo) in modelo["variables"].items():
+        if tipo == "B":
+            lineas.append(f" BV BND {var}")
+            continue
+        if lb != 0:
+            lineas.append(f" LO BND {var} {_numero(lb)}")
+        lineas.append(f" UP BND {var} {_numero(ub)}")
+    lineas.append("ENDATA")
+    Path(path).write_text("\n".join(lineas) + "\n", encoding='utf-8')
+
+
+def resultado_desde_valores(parsed: Dict, valores: Dict[str, float]) -> Dict:
+    """
+    Resultado con el formato de salida del modelo a partir de los valores de
+    las variables x_i_j_k; las métricas se recalculan con el verificador.
+    """
+    m = parsed['m']
+    matrices = {clave: [[0] * m for _ in range(m)] for clave in CLAVES_MATRICES}
+    for nombre, valor in valores.items():
+        if nombre.startswith("x_"):
+            i, j, k = (int(parte) - 1 for parte in nombre.split("_")[1:])
+            matrices[CLAVES_MATRICES[k]][i][j] = int(round(valor))
+    resultado = {"matrices_movimiento": matrices}
+    resultado.update(verificar_solucion(parsed, resultado)["recalculado"])
+    return resultado
+
+
+def leer_solucion_cbc(path: str):
+    """
+    Lee el archivo de `cbc ... -solu`.
+
+    Returns:
+        (línea de estado, {variable: valor})
+    """
+    lineas = Path(path).read_text(encoding='utf-8').splitlines()
+    valores = {}
+    for linea in lineas[1:]:
+        partes = linea.split()
+        if partes and partes[0] == "**":
+            partes = partes[1:]
+        if len(partes) >= 3:
+            try:
+                valores[partes[1]] = float(partes[2])
+            except ValueError:
+                continue
+    return (lineas[0].strip() if lineas else ""), valores
+
+
+def resolver_cbc(parsed: Dict, timeout: Optional[float] = None, cbc: Optional[str] = None,
+                 cotas=None) -> Dict:
+    """
+    Resuelve la formulación lineal con el ejecutable de CBC.
+
+    Returns:
+        Dict con el mismo formato que MiniZincRunner.run (o con 'error')
+
+    Raises:
+        FileNotFoundError: Si `cbc` no está en PATH
+    """
+    cbc = cbc or shutil.which("cbc")
+    if not cbc:
+        raise FileNotFoundError(
+            "No se encontró el ejecutable 'cbc' en PATH.\n"
+            "Viene con MiniZinc (coin-bc) o se instala con el paquete coinor-cbc."
+        )
+
+    directorio = tempfile.mkdtemp(prefix="minpol_mip_")
+    mps_path = os.path.join(directorio, "modelo.mps")
+    sol_path = os.path.join(directorio, "solucion.txt")
+    try:
+        escribir_mps(construir_modelo(parsed, cotas), mps_path)
+        comando = [cbc, mps_path]
+        if timeout:
+            comando += ["-sec", str(timeout)]
+        comando += ["-solve", "-solu", sol_path]
+        try:
+            subprocess.run(comando, capture_output=True, text=True,
+                           timeout=timeout + MARGEN_TIMEOUT_S if timeout else None)
+        except subprocess.TimeoutExpired:
+            return {"error": f"Timeout: CBC no terminó en {timeout} segundos", "timeout": True,
+                    "estado": DESCONOCIDO}
+        if not os.path.exists(sol_path):
+            return {"error": "CBC no escribió solución", "estado": DESCONOCIDO}
+        estado, valores = leer_solucion_cbc(sol_path)
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    if estado.startswith("Infeasible") or estado.startswith("Integer infeasible"):
+        return {"error": "El modelo es insatisfacible", "estado": UNSAT}
+    if "no integer solution" in estado or not valores:
+        if timeout:
+            return {"error": f"Timeout: no se encontró solución en {timeout} segundos",
+                    "timeout": True, "estado": DESCONOCIDO}
+        return {"error": f"CBC no devolvió solución ({estado})", "estado": DESCONOCIDO}
+
+    resultado = resultado_desde_valores(parsed, valores)
+    resultado["objetivo"] = resultado["polarizacion"]
+    if estado.startswith("Optimal"):
+        resultado["estado"] = OPTIMO
+        resultado["cota"], resultado["brecha"] = resultado["polarizacion"], 0.0
+    else:
+        resultado["estado"] = SATISFECHO
+        resultado["tiempo_agotado"] = True
+    resultado["motor"] = "cbc"
+    return resultado
+
+
+def comparar(archivos: List[str], solver: str = "coin-bc", timeout: Optional[float] = 60,
+             con_cbc: bool = True) -> List[Dict]:
+    """
+    Resuelve cada instancia con Proyecto.mzn, ProyectoMIP.mzn y (si está)
+    CBC directo, y mide el tiempo de cada uno.
+
+    Returns:
+        Lista de filas {instancia, n, m, enfoque, tiempo, polarizacion, estado, error}
+    """
+    enfoques = [
+        ("original", lambda parsed: resolver_instancia(parsed, mzn_path=DEFAULT_MZN, solver=solver, timeout=timeout,
+                                                       registrar_historial=False, exhaustivo=False)),
+        ("mip", lambda parsed: resolver_instancia(parsed, mzn_path=MIP_MZN, solver=solver, timeout=timeout,
+                                                  registrar_historial=False)),
+    ]
+    if con_cbc and shutil.which("cbc"):
+        enfoques.append(("cbc", lambda parsed: resolver_cbc(parsed, timeout=timeout)))
+
+    filas = []
+    for archivo in archivos:
+        try:
+            parsed = parse_input_text(Path(archivo).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            filas.append({"instancia": archivo, "enfoque": None, "error": str(e)})
+            continue
+        for nombre, resolver in enfoques:
+            inicio = time.perf_counter()
+            try:
+                resultado = resolver(parsed)
+            except OSError as e:
+                resultado = {"error": str(e)}
+            filas.append({
+                "instancia": Path(archivo).name,
+                "n": parsed['n'],
+                "m": parsed['m'],
+                "enfoque": nombre,
+                "tiempo": round(time.perf_counter() - inicio, 3),
+                "polarizacion": resultado.get("polarizacion"),
+                "estado": resultado.get("estado"),
+                "error": resultado.get("error"),
+            })
+    return filas
+
+
+def _imprimir_comparacion(filas: List[Dict]):
+    print(f"{'instancia':<16} {'n':>5} {'m':>4} {'enfoque':<9} {'tiempo (s)':>10}  {'polarización':>13}  estado")
+    for fila in filas:
+        if fila["enfoque"] is None:
+            print(f"{fila['instancia']:<16} error: {fila['error']}")
+            continue
+        polarizacion = "-" if fila["polarizacion"] is None else f"{fila['polarizacion']:.6g}"
+        estado = fila["estado"] or ""
+        if fila["error"]:
+            estado = f"{estado} ({fila['error'].splitlines()[0]})".strip()
+        print(f"{fila['instancia']:<16} {fila['n']:>5} {fila['m']:>4} {fila['enfoque']:<9} "
+              f"{fila['tiempo']:>10.3f}  {polarizacion:>13}  {estado}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Formulación lineal de MinPol (LP/MPS, CBC)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_exportar = sub.add_parser("exportar", help="Escribir el modelo lineal de una instancia")
+    p_exportar.add_argument("archivo", help="Archivo .txt de entrada")
+    p_exportar.add_argument("--lp", default=None, help="Ruta del archivo .lp")
+    p_exportar.add_argument("--mps", default=None, help="Ruta del archivo .mps")
+
+    p_resolver = sub.add_parser("resolver", help="Resolver una instancia con CBC directo")
+    p_resolver.add_argument("archivo", help="Archivo .txt de entrada")
+    p_resolver.add_argument("--timeout", type=float, default=None)
+    p_resolver.add_argument("--cbc", default=None, help="Ruta al ejecutable de CBC")
+
+    p_comparar = sub.add_parser("comparar", help="Comparar Proyecto.mzn, ProyectoMIP.mzn y CBC directo")
+    p_comparar.add_argument("archivos", nargs="+", help="Archivos .txt de entrada")
+    p_comparar.add_argument("--solver", default="coin-bc", help="Solver de MiniZinc para los dos modelos")
+    p_comparar.add_argument("--timeout", type=float, default=60, help="Timeout por instancia y enfoque (0 = sin límite)")
+    p_comparar.add_argument("--sin-cbc", action="store_true", help="No incluir CBC directo")
+    p_comparar.add_argument("--csv", default=None, help="Guardar la comparación en CSV")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "comparar":
+        filas = comparar(args.archivos, args.solver, args.timeout or None, con_cbc=not args.sin_cbc)
+        _imprimir_comparacion(filas)
+        if args.csv:
+            columnas = ("instancia", "n", "m", "enfoque", "tiempo", "polarizacion", "estado", "error")
+            with open(args.csv, "w", encoding='utf-8') as f:
+                f.write(",".join(columnas) + "\n")
+                for fila in filas:
+                    f.write(",".join("" if fila.get(c) is None else str(fila[c]).replace(",", ";").splitlines()[0]
+                                     for c in columnas) + "\n")
+        return 0
+
+    try:
+        parsed = parse_input_text(Path(args.archivo).read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.comando == "exportar":
+        if not args.lp and not args.mps:
+            parser.error("Indica --lp y/o --mps")
+        modelo = construir_modelo(parsed)
+        if args.lp:
+            escribir_lp(modelo, args.lp)
+        if args.mps:
+            escribir_mps(modelo, args.mps)
+        print(f"Variables: {len(modelo['variables'])}  Restricciones: {len(modelo['restricciones'])}")
+        return 0
+
+    try:
+        resultado = resolver_cbc(parsed, timeout=args.timeout, cbc=args.cbc)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    return 0 if "error" not in resultado else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+# pipeline.py
+"""
+Pipeline completo sin interfaz gráfica: parseo -> .dzn -> MiniZinc -> resultado.
+
+Lo usan la línea de comandos (minpol.py) y cualquier herramienta que necesite
+resolver instancias sin importar PySimpleGUI.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import metricas
+from canonico import canonizar, descanonizar
+from checkpoint import arranque_desde, cargar_checkpoint
+from exhaustivo import es_pequena, resolver_exhaustivo
+from generar_dzn import CLAVES_INSTANCIA, escalado_exacto, parse_input_text, generate_dzn
+from run_mzn import RESULTADO_CANCELADO, SATISFECHO, MiniZincRunner
+from seleccion_solver import elegir_solver, registrar_ejecucion
+from traza import tramo
+
+# Nombre de solver que activa la selección automática por historial
+SOLVER_AUTO = "auto"
+
+# CONFIGURACIÓN DE RUTAS
+BASE_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BASE_DIR.parent
+MZN_DIR = PROJECT_ROOT / "ProyectoMZN"
+DEFAULT_MZN = str(MZN_DIR / "Proyecto.mzn")
+
+
+def clave_instancia(parsed: Dict, solver: str, mzn_path: str = DEFAULT_MZN) -> str:
+    """
+    Clave de caché de una instancia: hash de los datos, el solver y el modelo
+    (ruta y mtime, para invalidar si el .mzn cambia). resolver_instancia la
+    calcula sobre la forma canónica, así que las instancias equivalentes
+    comparten entrada.
+    """
+    try:
+        mtime = os.path.getmtime(mzn_path)
+    except OSError:
+        mtime = None
+    datos = {k: parsed[k] for k in CLAVES_INSTANCIA}
+    contenido = json.dumps([datos, solver, str(mzn_path), mtime], sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class CacheResultados:
+    """
+    Caché LRU en memoria de resultados exitosos, segura entre hilos.
+    Solo se guardan resultados sin error; los timeouts, incluidos los que
+    devuelven una solución no probada óptima, no se cachean.
+    """
+
+    def __init__(self, capacidad=1024):
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                metricas.incrementar("minpol_cache_aciertos_total")
+                return self._datos[clave]
+            self.fallos += 1
+            metricas.incrementar("minpol_cache_fallos_total")
+            return None
+
+    def guardar(self, clave, resultado):
+        if not isinstance(resultado, dict) or "error" in resultado or resultado.get("tiempo_agotado"):
+            return
+        with self._lock:
+            self._datos[clave] = resultado
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+
+    def estadisticas(self):
+        with self._lock:
+            return {"entradas": len(self._datos), "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+def crear_runner(**opciones) -> Optional[MiniZincRunner]:
+    """
+    MiniZincRunner con esas opciones, o None si MiniZinc no está en PATH: las
+    instancias que no lo necesitan (vía exhaustiva, caché) se siguen
+    resolviendo, y resolver_instancia devuelve el error solo para las demás.
+    """
+    try:
+        return MiniZincRunner(**opciones)
+    except FileNotFoundError:
+        return None
+
+
+def resolver_instancia(parsed: Dict, mzn_path: str = DEFAULT_MZN, solver: str = "gecode",
+                       timeout: Optional[float] = None, runner: Optional[MiniZincRunner] = None,
+                       on_solution=None, cache: Optional[CacheResultados] = None,
+                       registrar_historial: bool = True, normalizar: bool = True,
+                       exhaustivo: bool = True, checkpoint: Optional[str] = None,
+                       cancelado: Optional[threading.Event] = None, **opciones) -> Dict:
+    """
+    Resuelve una instancia ya parseada.
+
+    El .dzn se escribe en un archivo temporal propio, así que se pueden
+    resolver varias instancias a la vez sin pisarse.
+
+    Args:
+        parsed: Dict de la instancia (salida de parse_input_text)
+        mzn_path: Ruta al modelo .mzn
+        solver: Nombre del solver, o "auto" para elegirlo según el historial
+        timeout: Tiempo máximo en segundos (None = sin límite)
+        runner: MiniZincRunner a reutilizar (opcional; uno por hilo), o un
+            MiniZincPythonRunner (en ese caso se usa su modelo y su solver).
+            Si es None se crea uno solo cuando hace falta lanzar MiniZinc
+        on_solution: Callback para soluciones intermedias (opcional)
+        cache: CacheResultados compartida (opcional)
+        registrar_historial: Si True, guarda el tiempo de la ejecución en el
+            historial que usa la selección automática de solver
+        normalizar: Si True, resuelve la forma canónica de la instancia
+            (v afín normalizado, sin opiniones vacías inalcanzables en los
+            extremos) y devuelve el resultado llevado a la original
+        exhaustivo: Si True, las instancias chicas del modelo por defecto se
+            resuelven por enumeración (exhaustivo.py), sin lanzar MiniZinc
+        checkpoint: Archivo donde se guarda cada solución que mejora (ver
+            checkpoint.py). Si ya existe, su solución se usa como cota y
+            arranque en caliente, y se devuelve si no se mejora a tiempo
+        cancelado: threading.Event opcional. Si está activado antes de la vía
+            exhaustiva o de lanzar el solver, se devuelve un resultado
+            cancelado sin resolver; MiniZincRunner además no arranca el proceso
+        **opciones: Opciones extra de MiniZincRunner.run (threads, random_seed, free_search)
+
+    Returns:
+        Dict con el resultado de MiniZinc (o con 'error', también si la
+        instancia no se puede escalar a enteros exactos)
+    """
+    instancia, transformacion = parsed, None
+    try:
+        if normalizar:
+            with tramo("canonizar"):
+                instancia, transformacion = canonizar(parsed)
+        else:
+            # Valida que el escalado entero exacto entre en el modelo
+            escalado_exacto(parsed)
+    except ValueError as e:
+        # Por ejemplo, v con tantos decimales que el escalado desborda 64 bits
+        return {"error": str(e)}
+    if normalizar:
+        if on_solution is not None:
+            callback = on_solution
+            on_solution = lambda sol: callback(descanonizar(sol, transformacion))
+
+    if cancelado is not None and cancelado.is_set():
+        return dict(RESULTADO_CANCELADO)
+
+    if exhaustivo and mzn_path == DEFAULT_MZN and es_pequena(instancia):
+        inicio = time.perf_counter()
+        with tramo("exhaustivo"):
+            resultado = resolver_exhaustivo(instancia)
+        if resultado is not None:
+            _registrar_metricas("exhaustivo", resultado, time.perf_counter() - inicio)
+            if on_solution is not None:
+                on_solution(resultado)
+            if transformacion is not None:
+                resultado = descanonizar(resultado, transformacion)
+            return resultado
+
+    seleccion = None
+    if solver == SOLVER_AUTO:
+        try:
+            runner = runner or MiniZincRunner()
+        except FileNotFoundError as e:
+            return {"error": str(e)}
+        solver, razon = elegir_solver(parsed, runner.list_solvers())
+        seleccion = {"solver": solver, **razon}
+
+    clave = None
+    if cache is not None:
+        # La caché guarda resultados de la instancia tal como se resolvió (canónica)
+        clave = clave_instancia(instancia, solver, mzn_path)
+        resultado = cache.obtener(clave)
+        if resultado is not None:
+            if transformacion is not None:
+                resultado = descanonizar(resultado, transformacion)
+            resultado = dict(resultado)
+            if seleccion:
+                resultado["seleccion_solver"] = seleccion
+            return resultado
+
+    if cancelado is not None and cancelado.is_set():
+        return dict(RESULTADO_CANCELADO)
+
+    etiqueta = runner.solver if hasattr(runner, "resolver_async") else solver
+    metricas.incrementar("minpol_resoluciones_iniciadas_total", solver=etiqueta)
+    inicio = time.perf_counter()
+    resultado = _ejecutar_minizinc(instancia, mzn_path, solver, timeout, runner, on_solution, opciones,
+                                   checkpoint, cancelado)
+    _registrar_metricas(etiqueta, resultado, time.perf_counter() - inicio, iniciada=True)
+    if registrar_historial:
+        registrar_ejecucion(parsed, solver, time.perf_counter() - inicio, resultado)
+    if cache is not None:
+        cache.guardar(clave, resultado)
+    if transformacion is not None:
+        resultado = descanonizar(resultado, transformacion)
+    if seleccion:
+        resultado = dict(resultado, seleccion_solver=seleccion)
+    return resultado
+
+
+def _registrar_metricas(solver: str, resultado: Dict, segundos: float, iniciada: bool = False):
+    """Cuenta una resolución terminada: estado, duración y si agotó el tiempo."""
+    if not metricas.activo():
+        return
+    if not iniciada:
+        metricas.incrementar("minpol_resoluciones_iniciadas_total", solver=solver)
+    if resultado.get("cancelado"):
+        estado = "CANCELADO"
+    else:
+        estado = resultado.get("estado") or ("ERROR" if "error" in resultado else SATISFECHO)
+    metricas.incrementar("minpol_resoluciones_terminadas_total", solver=solver, estado=estado)
+    metricas.observar("minpol_resolucion_segundos", segundos, solver=solver)
+    if resultado.get("tiempo_agotado") or resultado.get("timeout"):
+        metricas.incrementar("minpol_timeouts_total", solver=solver)
+
+
+def _ejecutar_minizinc(parsed, mzn_path, solver, timeout, runner, on_solution, opciones, checkpoint=None,
+                       cancelado=None):
+    """Escribe el .dzn temporal y lanza MiniZinc (reanudando desde el checkpoint si hay)."""
+    incumbente = cargar_checkpoint(checkpoint, parsed) if checkpoint else None
+    arranque = arranque_desde(parsed, incumbente) if incumbente else None
+
+    if hasattr(runner, "resolver_async"):
+        # MiniZincPythonRunner: modelo ya cargado, los datos se asignan sin .dzn
+        resultado = runner.resolver(parsed, timeout=timeout, on_solution=on_solution,
+                                    arranque=arranque, checkpoint=checkpoint, **opciones)
+        return _con_incumbente(resultado, incumbente)
+    try:
+        runner = runner or MiniZincRunner()
+    except FileNotFoundError as e:
+        return _con_incumbente({"error": str(e)}, incumbente)
+
+    fd, dzn_path = tempfile.mkstemp(suffix=".dzn", prefix="minpol_")
+    os.close(fd)
+    try:
+        generate_dzn(parsed, dzn_path, arranque=arranque)
+        resultado = runner.run(mzn_path, dzn_path, solver=solver, timeout=timeout,
+                               on_solution=on_solution, checkpoint=checkpoint, cancelado=cancelado,
+                               **opciones)
+    finally:
+        try:
+            os.remove(dzn_path)
+        except OSError:
+            pass
+    return _con_incumbente(resultado, incumbente)
+
+
+def _con_incumbente(resultado: Dict, incumbente: Optional[Dict]) -> Dict:
+    """
+    Marca el resultado como reanudado. Si la ejecución terminó sin solución
+    (timeout, memoria, proceso muerto), devuelve la del checkpoint.
+    """
+    if incumbente is None:
+        return resultado
+    if "error" in resultado and not resultado.get("cancelado"):
+        resultado = dict(incumbente, estado=SATISFECHO, tiempo_agotado=True,
+                         objetivo=incumbente["polarizacion"])
+    return dict(resultado, reanudado=True)
+
+
+def resolver_texto(text: str, **kwargs) -> Dict:
+    """
+    Parsea el contenido de un .txt de entrada y lo resuelve.
+
+    Returns:
+        Dict con 'resultado' (o 'error' si la entrada es inválida) y 'tiempo' en segundos
+    """
+    inicio = time.perf_counter()
+    try:
+        parsed = parse_input_text(text)
+    except ValueError as e:
+        return {"error": str(e), "tiempo": time.perf_counter() - inicio}
+    resultado = resolver_instancia(parsed, **kwargs)
+    salida = {"resultado": resultado, "tiempo": time.perf_counter() - inicio}
+    if "error" in resultado:
+        salida["error"] = resultado["error"]
+    return salida
@@ -0,0 +1,77 @@
+# planificador.py
+"""
+Reparto de núcleos entre instancias y hilos del solver.
+
+Con muchas instancias pequeñas conviene resolver varias a la vez con un
+hilo cada una; con instancias grandes conviene darles varios hilos (-p).
+Este módulo estima el tamaño de cada instancia, recomienda cuántos hilos
+darle y reparte un presupuesto fijo de núcleos entre las que se ejecutan
+a la vez, de modo que la máquina no quede ni ociosa ni sobresuscrita.
+"""
+
+import math
+import os
+import threading
+from typing import Dict
+
+# Tamaño (ver tamano_instancia) por debajo del cual basta un hilo
+UMBRAL_HILOS = 10_000
+
+
+def tamano_instancia(parsed: Dict) -> int:
+    """
+    Estimación del tamaño del modelo aplanado. En Proyecto.mzn domina la
+    mediana, cuyas restricciones crecen con n^2; las variables x con 3*m^2.
+    """
+    return parsed['n'] ** 2 + 3 * parsed['m'] ** 2
+
+
+def hilos_recomendados(parsed: Dict, max_hilos: int) -> int:
+    """
+    Hilos para una instancia: 1 hasta UMBRAL_HILOS y luego uno más cada vez
+    que el tamaño se duplica, sin pasar de max_hilos.
+    """
+    tamano = tamano_instancia(parsed)
+    if tamano < UMBRAL_HILOS or max_hilos <= 1:
+        return 1
+    return max(1, min(max_hilos, math.ceil(math.log2(tamano / UMBRAL_HILOS)) + 1))
+
+
+def nucleos_disponibles() -> int:
+    """Núcleos que este proceso puede usar (respeta la afinidad si existe)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class PresupuestoNucleos:
+    """
+    Semáforo de núcleos con adquisición de varias unidades a la vez.
+
+    Las peticiones se atienden en orden de llegada para que una instancia
+    grande no quede esperando indefinidamente detrás de muchas pequeñas.
+    """
+
+    def __init__(self, total: int):
+        self.total = max(1, total)
+        self.disponibles = self.total
+        self._cond = threading.Condition()
+        self._siguiente_turno = 0
+        self._turno_actual = 0
+
+    def adquirir(self, cantidad: int) -> int:
+        """Bloquea hasta reservar `cantidad` núcleos. Devuelve lo reservado."""
+        cantidad = max(1, min(cantidad, self.total))
+        with self._cond:
+            turno = self._siguiente_turno
+            self._siguiente_turno += 1
+            self._cond.wait_for(lambda: self._turno_actual == turno and self.disponibles >= cantidad)
+            self.disponibles -= cantidad
+            self._turno_actual += 1
+            self._cond.notify_all()
+        return cantidad
+
+    def liberar(self, cantidad: int):
+        with self._cond:
+            self.disponibles += cantidad
+            self._cond.notify_all()
@@ -0,0 +1,88 @@
+# presolve.py
+"""
+Reducción de la instancia antes de generar el .dzn.
+
+Las cotas de cada x[i][j][k] (pares más lejanos que maxMovs, movimientos
+que solos superan ct, clases vacías) las calcula siempre generar_dzn.py
+con cotas_movimiento(). Aquí además se recortan las opiniones de los
+extremos que están vacías y que ninguna persona puede alcanzar: no
+aportan personas ni pueden recibirlas, así que quitarlas no cambia el
+óptimo. Solo se recortan extremos para que |i - j| no cambie entre las
+opiniones que quedan.
+
+Uso:
+    reducido, mapa = reducir_instancia(parsed)
+    resultado = ...resolver reducido...
+    resultado = expandir_resultado(resultado, mapa)
+"""
+
+from typing import Dict, Tuple
+
+from generar_dzn import escalado_exacto
+
+
+def alcance_maximo(parsed: Dict) -> int:
+    """
+    Distancia máxima que puede recorrer una persona: la limitan maxMovs
+    y el costo de moverla con la resistencia más barata que tenga gente.
+    """
+    esc = escalado_exacto(parsed)
+    pesos = [esc['peso_costo'][k] for k in range(3) if any(fila[k] for fila in parsed['s'])]
+    if not pesos:
+        return 0
+    return min(parsed['max_movs'], esc['ct_int'] // min(pesos))
+
+
+def reducir_instancia(parsed: Dict) -> Tuple[Dict, Dict]:
+    """
+    Quita las opiniones vacías e inalcanzables de los extremos.
+
+    Returns:
+        (reducido, mapa): la instancia reducida (mismo formato que
+        parse_input_text) y los datos para expandir_resultado
+    """
+    m = parsed['m']
+    ocupadas = [i for i in range(m) if parsed['p'][i] > 0]
+    if not ocupadas:
+        return parsed, {"inicio": 0, "m_original": m}
+
+    alcance = alcance_maximo(parsed)
+    inicio = max(0, ocupadas[0] - alcance)
+    fin = min(m - 1, ocupadas[-1] + alcance)
+    mapa = {"inicio": inicio, "m_original": m}
+    if inicio == 0 and fin == m - 1:
+        return parsed, mapa
+
+    reducido = dict(parsed)
+    reducido['m'] = fin - inicio + 1
+    for clave in ('p', 'v', 's'):
+        reducido[clave] = parsed[clave][inicio:fin + 1]
+    return reducido, mapa
+
+
+def expandir_resultado(resultado: Dict, mapa: Dict) -> Dict:
+    """
+    Lleva p_final y las matrices de movimiento de la instancia reducida a
+    los índices originales (las opiniones quitadas quedan en 0).
+    """
+    inicio, m = mapa["inicio"], mapa["m_original"]
+    if not isinstance(resultado, dict) or "p_final" not in resultado:
+        return resultado
+    if len(resultado["p_final"]) == m:
+        return resultado
+
+    m_red = len(resultado["p_final"])
+    fin = m - inicio - m_red
+    expandido = dict(resultado)
+    expandido["p_final"] = [0] * inicio + list(resultado["p_final"]) + [0] * fin
+
+    matrices = resultado.get("matrices_movimiento")
+    if isinstance(matrices, dict):
+        vacia = [0] * m
+        expandido["matrices_movimiento"] = {
+            nombre: ([list(vacia) for _ in range(inicio)]
+                     + [[0] * inicio + list(fila) + [0] * fin for fila in matriz]
+                     + [list(vacia) for _ in range(fin)])
+            for nombre, matriz in matrices.items()
+        }
+    return expandido
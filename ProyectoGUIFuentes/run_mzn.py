@@ -5,17 +5,275 @@ Ejecutor de modelos MiniZinc con manejo robusto de salida JSON.
 
 import subprocess
 import json
+import os
 import shutil
+import signal
+import sys
+import threading
 from pathlib import Path
 
+import metricas
+import traza
+from checkpoint import guardar_checkpoint
+from traza import trazado
+
+try:
+    import resource  # Solo disponible en sistemas POSIX
+except ImportError:
+    resource = None
+
+
+# Marcadores que MiniZinc imprime entre soluciones y al terminar la búsqueda
+SEPARADOR_SOLUCION = "----------"
+FIN_BUSQUEDA = "=========="
+SIN_SOLUCION = "=====UNKNOWN====="
+INSATISFACIBLE = "=====UNSATISFIABLE====="
+PREFIJO_ESTADISTICA = "%%%mzn-stat:"
+
+# Estado de la respuesta (mismos nombres que usa MiniZinc)
+OPTIMO = "OPTIMAL_SOLUTION"
+SATISFECHO = "SATISFIED"
+DESCONOCIDO = "UNKNOWN"
+UNSAT = "UNSATISFIABLE"
+
+RESULTADO_CANCELADO = {"error": "Ejecución cancelada por el usuario", "cancelado": True}
+
+# Con timeout, MiniZinc se detiene solo (--time-limit). Si no lo hace en
+# MARGEN_TIMEOUT_S más, se le envía SIGTERM y, tras GRACIA_SIGTERM_S, SIGKILL.
+MARGEN_TIMEOUT_S = 2.0
+GRACIA_SIGTERM_S = 3.0
+
+# Cada cuánto se mide la memoria y la CPU del árbol de procesos de MiniZinc
+MUESTREO_RECURSOS_S = 0.2
+
+# Caché en disco de los solvers disponibles (por ejecutable de MiniZinc)
+CACHE_DIR = Path(os.environ.get("MINPOL_CACHE_DIR", Path.home() / ".minpol"))
+CACHE_SOLVERS = CACHE_DIR / "solvers.json"
+
+_cache_memoria = {}
+_lock_cache = threading.Lock()
+
+# Configuraciones de --solvers-json que son herramientas, no solvers
+# (explicación de insatisfacibilidad, búsqueda de globales, solo aplanar)
+HERRAMIENTAS_NO_SOLVER = {"findmus", "globalizer", "mzn-fzn"}
+
+
+def _es_solver(conf) -> bool:
+    """Si una configuración de --solvers-json es un solver utilizable."""
+    nombre = conf["id"].split(".")[-1].lower()
+    return nombre not in HERRAMIENTAS_NO_SOLVER and "__internal__" not in conf.get("tags", [])
+
+
+def _opciones_grupo_procesos():
+    """
+    Opciones de Popen para lanzar MiniZinc en su propio grupo de procesos,
+    de modo que se pueda matar junto con el solver que lanza.
+    """
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+# Mensajes con los que MiniZinc/solvers reportan falta de memoria
+MARCAS_SIN_MEMORIA = ("bad_alloc", "out of memory", "cannot allocate memory", "memoryerror")
+
+
+def terminar_arbol_procesos(proc):
+    """
+    Mata inmediatamente un proceso y todos sus hijos (minizinc + solver).
+    
+    Args:
+        proc: subprocess.Popen lanzado con _opciones_grupo_procesos()
+    """
+    # No usar proc.poll(): recogería al hijo y se perdería su uso de recursos
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                capture_output=True
+            )
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        proc.kill()
+
+
+def terminar_con_gracia(proc, gracia=None):
+    """
+    Pide terminar al árbol de procesos (SIGTERM, para que el solver pueda
+    imprimir su mejor solución) y lo mata con SIGKILL si sigue vivo tras
+    `gracia` segundos. No bloquea.
+    """
+    if proc.returncode is not None:
+        return
+    if os.name == "nt":
+        terminar_arbol_procesos(proc)
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except OSError:
+        proc.terminate()
+    rematar = threading.Timer(GRACIA_SIGTERM_S if gracia is None else gracia, terminar_arbol_procesos, args=(proc,))
+    rematar.daemon = True
+    rematar.start()
+
+
+def _leer_estadistica(linea, estadisticas):
+    """Guarda una línea '%%%mzn-stat: clave=valor' en el dict de estadísticas."""
+    clave, _, valor = linea[len(PREFIJO_ESTADISTICA):].strip().partition("=")
+    if not valor:
+        return
+    try:
+        estadisticas[clave] = float(valor)
+    except ValueError:
+        estadisticas[clave] = valor.strip('"')
+
+
+def _trazar_minizinc(inicio_us, fin_us, estadisticas, solver):
+    """
+    Registra la ejecución de MiniZinc; si reportó flatTime, la divide en
+    aplanado (flatten) y resolución.
+    """
+    traza.registrar("minizinc", inicio_us, fin_us - inicio_us, solver=solver)
+    aplanado = estadisticas.get("flatTime")
+    if isinstance(aplanado, float):
+        aplanado_us = min(aplanado * 1e6, fin_us - inicio_us)
+        traza.registrar("minizinc.aplanado", inicio_us, aplanado_us)
+        traza.registrar("minizinc.resolucion", inicio_us + aplanado_us, fin_us - inicio_us - aplanado_us)
+
+
+def _crear_preexec(memoria_mb=None, cpu_s=None, cpus=None):
+    """
+    Crea la función que el hijo ejecuta antes de lanzar MiniZinc para
+    aplicarse los límites de recursos (los heredan el solver y sus hijos).
+    Devuelve None si no hay nada que aplicar o el sistema no lo soporta.
+    """
+    if resource is None or not (memoria_mb or cpu_s or cpus):
+        return None
+
+    def preexec():
+        if memoria_mb:
+            limite = int(memoria_mb * 1024 * 1024)
+            resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+        if cpu_s:
+            # Límite blando -> SIGXCPU; el duro (1 s después) -> SIGKILL
+            resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_s), int(cpu_s) + 1))
+        if cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+
+    return preexec
+
+
+class _MuestreoGrupo:
+    """
+    Muestrea en un hilo la memoria (RSS) y la CPU de todos los procesos del
+    grupo de MiniZinc leyendo /proc (solo Linux). wait4 solo cuenta a
+    minizinc y a los hijos que ya esperó: cuando el árbol se mata (timeout,
+    cancelación, límites) el uso del solver se perdería.
+
+    memoria_pico_mb es el pico de la suma del RSS del grupo entre muestras y
+    cpu_s la CPU de cada proceso en su última muestra, así que lo que ocurre
+    en el último intervalo puede quedar sin contar.
+    """
+
+    def __init__(self, pgid, intervalo=MUESTREO_RECURSOS_S):
+        self.pgid = pgid
+        self.intervalo = intervalo
+        self.memoria_pico_mb = 0.0
+        self._cpu = {}  # pid -> segundos de CPU en la última muestra
+        self._ticks = os.sysconf("SC_CLK_TCK")
+        self._pagina = os.sysconf("SC_PAGE_SIZE")
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+
+    @staticmethod
+    def disponible() -> bool:
+        return sys.platform.startswith("linux") and os.path.isdir("/proc")
+
+    @property
+    def cpu_s(self) -> float:
+        return sum(self._cpu.values())
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        self._hilo.join()
+
+    def _bucle(self):
+        while True:
+            self._muestrear()
+            if self._parar.wait(self.intervalo):
+                break
+
+    def _muestrear(self):
+        rss = 0
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/stat", encoding='utf-8', errors='replace') as f:
+                    # Tras el nombre del ejecutable (entre paréntesis) vienen los campos 3..N de proc(5)
+                    campos = f.read().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            if int(campos[2]) != self.pgid:
+                continue
+            self._cpu[pid] = (int(campos[11]) + int(campos[12])) / self._ticks
+            rss += int(campos[21]) * self._pagina
+        self.memoria_pico_mb = max(self.memoria_pico_mb, rss / (1024 * 1024))
+
+
+def _esperar_con_uso(proc, muestreo=None):
+    """
+    Espera a que termine el proceso y devuelve su uso de recursos, o None si
+    no está disponible.
+
+    Con un _MuestreoGrupo (Linux) se mide todo el árbol de procesos, también
+    si se mató al solver ('medicion': 'grupo'). Si no, solo minizinc y los
+    hijos que llegó a esperar ('medicion': 'proceso'): al matar el árbol se
+    pierde el uso del solver.
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, status, uso = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        except ChildProcessError:
+            # Ya fue recogido por otro lado
+            proc.wait()
+            return None
+        finally:
+            if muestreo is not None:
+                muestreo.detener()
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        rss_mb = uso.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else uso.ru_maxrss / 1024
+        cpu_s = uso.ru_utime + uso.ru_stime
+        if muestreo is not None:
+            rss_mb = max(rss_mb, muestreo.memoria_pico_mb)
+            cpu_s = max(cpu_s, muestreo.cpu_s)
+        return {
+            "memoria_pico_mb": round(rss_mb, 1),
+            "cpu_s": round(cpu_s, 3),
+            "medicion": "grupo" if muestreo is not None else "proceso",
+        }
+    proc.wait()
+    return None
+
 
 class MiniZincRunner:
-    def __init__(self, minizinc_exe=None):
+    def __init__(self, minizinc_exe=None, memoria_mb=None, cpu_s=None, cpus=None):
         """
         Inicializa el runner de MiniZinc.
         
         Args:
             minizinc_exe: Ruta al ejecutable de MiniZinc (opcional)
+            memoria_mb: Límite de espacio de direcciones por ejecución, en MB (solo POSIX)
+            cpu_s: Límite de tiempo de CPU por ejecución, en segundos (solo POSIX)
+            cpus: Conjunto de núcleos a los que fijar MiniZinc (solo Linux)
         """
         if minizinc_exe:
             self.minizinc = str(minizinc_exe)
@@ -29,7 +287,17 @@ class MiniZincRunner:
                 "Y asegúrate de agregarlo al PATH del sistema."
             )
 
-    def run(self, mzn_path, dzn_path, solver="gecode", timeout=None, all_solutions=False):
+        self.memoria_mb = memoria_mb
+        self.cpu_s = cpu_s
+        self.cpus = set(cpus) if cpus else None
+
+        # Proceso en ejecución (para poder cancelarlo desde otro hilo)
+        self._proc = None
+        self._motivo_fin = None
+
+    def run(self, mzn_path, dzn_path, solver="gecode", timeout=None, all_solutions=False,
+            on_solution=None, threads=None, random_seed=None, free_search=False, checkpoint=None,
+            cancelado=None):
         """
         Ejecuta un modelo MiniZinc.
         
@@ -37,11 +305,24 @@ class MiniZincRunner:
             mzn_path: Ruta al archivo .mzn
             dzn_path: Ruta al archivo .dzn
             solver: Nombre del solver (gecode, chuffed, gurobi, etc.)
-            timeout: Tiempo máximo en segundos (None = sin límite)
+            timeout: Tiempo máximo en segundos (None = sin límite). Se pasa a
+                MiniZinc como --time-limit; al vencer se devuelve la mejor
+                solución encontrada con estado SATISFIED (o UNKNOWN si no hay)
             all_solutions: Si True, busca todas las soluciones
+            on_solution: Callback opcional que recibe cada solución intermedia
+                (dict) a medida que el solver la reporta
+            threads: Hilos del solver (-p); None = lo que use el solver por defecto
+            random_seed: Semilla aleatoria del solver (-r)
+            free_search: Si True, permite al solver ignorar la búsqueda del modelo (-f)
+            checkpoint: Ruta de un archivo donde guardar (de forma atómica)
+                cada solución que mejora, para reanudar si el proceso muere
+            cancelado: threading.Event opcional; si ya está activado no se lanza
+                MiniZinc, y si se activa justo al lanzarlo el proceso se detiene
             
         Returns:
-            Dict con los resultados o dict con error
+            Dict con los resultados o dict con error. Las soluciones llevan
+            'estado' (OPTIMAL_SOLUTION o SATISFIED), 'objetivo' y, si el
+            solver la reporta, la 'cota' y la 'brecha' relativa
         """
         mzn = Path(mzn_path)
         dzn = Path(dzn_path)
@@ -57,35 +338,255 @@ class MiniZincRunner:
         
         if all_solutions:
             cmd.append("--all-solutions")
+        elif on_solution or timeout or checkpoint:
+            # Reportar cada solución que mejora el objetivo (con timeout,
+            # para quedarse con la mejor si se acaba el tiempo)
+            cmd.append("--intermediate-solutions")
+        
+        if timeout:
+            cmd += ["--time-limit", str(int(timeout * 1000))]
+        if timeout or traza.activo() or metricas.activo():
+            # objectiveBound para la brecha; flatTime para separar aplanado y resolución
+            cmd.append("--statistics")
         
+        if threads and threads > 1:
+            cmd += ["--parallel", str(int(threads))]
+        if random_seed is not None:
+            cmd += ["--random-seed", str(int(random_seed))]
+        if free_search:
+            cmd.append("--free-search")
+        
+        if cancelado is not None and cancelado.is_set():
+            return dict(RESULTADO_CANCELADO)
+
         # Ejecutar
+        inicio_us = traza.ahora_us()
         try:
-            proc = subprocess.run(
+            proc = subprocess.Popen(
                 cmd,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=timeout,
-                encoding='utf-8'
+                encoding='utf-8',
+                preexec_fn=_crear_preexec(self.memoria_mb, self.cpu_s, self.cpus),
+                **_opciones_grupo_procesos()
             )
-        except subprocess.TimeoutExpired:
+        except Exception as e:
+            return {"error": f"Error ejecutando MiniZinc: {e}"}
+
+        self._proc = proc
+        self._motivo_fin = None
+        if cancelado is not None and cancelado.is_set():
+            # La cancelación llegó mientras se lanzaba: cancel() todavía no veía el proceso
+            self._detener(proc, "cancelado")
+        # Con start_new_session el grupo de procesos es el pid de minizinc
+        muestreo = _MuestreoGrupo(proc.pid).iniciar() if os.name != "nt" and _MuestreoGrupo.disponible() else None
+
+        # Leer stderr en paralelo para que el proceso no se bloquee si se llena el buffer
+        stderr_partes = []
+        lector_err = threading.Thread(target=lambda: stderr_partes.append(proc.stderr.read()), daemon=True)
+        lector_err.start()
+
+        temporizador = None
+        if timeout:
+            # Respaldo por si MiniZinc no respeta --time-limit
+            temporizador = threading.Timer(timeout + MARGEN_TIMEOUT_S, self._detener,
+                                           args=(proc, "timeout"))
+            temporizador.daemon = True
+            temporizador.start()
+
+        salida = []
+        bloque = []
+        ultima_solucion = None
+        estado = None
+        estadisticas = {}
+        try:
+            for line in proc.stdout:
+                salida.append(line)
+                marca = line.strip()
+                if marca == SEPARADOR_SOLUCION:
+                    sol = self._parse_output(''.join(bloque))
+                    bloque = []
+                    if "error" not in sol:
+                        ultima_solucion = sol
+                        if checkpoint:
+                            self._guardar_checkpoint(checkpoint, sol)
+                        if on_solution:
+                            on_solution(sol)
+                elif marca == FIN_BUSQUEDA:
+                    estado = OPTIMO
+                elif marca == SIN_SOLUCION:
+                    estado = DESCONOCIDO
+                elif marca == INSATISFACIBLE:
+                    estado = UNSAT
+                elif marca.startswith(PREFIJO_ESTADISTICA):
+                    _leer_estadistica(marca, estadisticas)
+                elif marca.startswith("%%%mzn-stat"):
+                    # %%%mzn-stat-end
+                    pass
+                else:
+                    bloque.append(line)
+            uso = _esperar_con_uso(proc, muestreo)
+            muestreo = None
+        finally:
+            if muestreo is not None:
+                muestreo.detener()
+            if temporizador:
+                temporizador.cancel()
+            lector_err.join(timeout=5)
+            self._proc = None
+
+        stdout = ''.join(salida)
+        stderr = ''.join(stderr_partes)
+        if traza.activo():
+            _trazar_minizinc(inicio_us, traza.ahora_us(), estadisticas, solver)
+        if isinstance(estadisticas.get("flatTime"), float):
+            metricas.observar("minpol_aplanado_segundos", estadisticas["flatTime"], solver=solver)
+
+        res = self._resultado_final(proc, stdout, stderr, timeout, ultima_solucion, all_solutions, uso)
+        res = self._con_estado(res, ultima_solucion, estado, estadisticas, timeout)
+        if uso is not None:
+            res["recursos"] = uso
+        return res
+
+    @staticmethod
+    def _guardar_checkpoint(path, sol):
+        try:
+            guardar_checkpoint(path, sol)
+        except OSError:
+            # Un checkpoint que no se pudo escribir no debe cortar la búsqueda
+            pass
+
+    def _resultado_final(self, proc, stdout, stderr, timeout, ultima_solucion, all_solutions, uso=None):
+        """Construye el dict de resultado según cómo terminó MiniZinc."""
+        if self._motivo_fin == "timeout" and ultima_solucion is not None:
+            # MiniZinc no se detuvo a tiempo pero ya había una solución
+            return dict(ultima_solucion)
+        if self._motivo_fin == "timeout":
             return {
                 "error": f"Timeout: El modelo no terminó en {timeout} segundos",
                 "timeout": True
             }
-        except Exception as e:
-            return {"error": f"Error ejecutando MiniZinc: {e}"}
+        if self._motivo_fin == "cancelado":
+            return dict(RESULTADO_CANCELADO)
 
         # Verificar código de salida
         if proc.returncode != 0:
+            error = stderr.strip().lower()
+            if self.cpu_s and self._supero_cpu(proc.returncode, uso):
+                return {
+                    "error": f"Se superó el límite de CPU de {self.cpu_s} segundos",
+                    "limite_cpu": True,
+                    "stderr": stderr.strip(),
+                    "returncode": proc.returncode
+                }
+            # RLIMIT_AS no mata al proceso: las reservas fallan (bad_alloc, ENOMEM)
+            if self.memoria_mb and any(marca in error for marca in MARCAS_SIN_MEMORIA):
+                return {
+                    "error": f"Memoria insuficiente: se superó el límite de {self.memoria_mb} MB",
+                    "sin_memoria": True,
+                    "stderr": stderr.strip(),
+                    "returncode": proc.returncode
+                }
             return {
-                "error": proc.stderr.strip() if proc.stderr else "Error desconocido",
-                "stderr": proc.stderr.strip(),
+                "error": stderr.strip() if stderr else "Error desconocido",
+                "stderr": stderr.strip(),
                 "returncode": proc.returncode
             }
 
-        # Procesar salida
-        return self._parse_output(proc.stdout)
+        # Procesar salida: con soluciones intermedias la última es la mejor
+        if ultima_solucion is not None and not all_solutions:
+            return ultima_solucion
+        return self._parse_output(stdout)
+
+    def _supero_cpu(self, returncode, uso) -> bool:
+        """
+        Si el proceso murió por RLIMIT_CPU: SIGXCPU (límite blando) o SIGKILL
+        (límite duro) habiendo consumido al menos el límite de CPU.
+        """
+        sigxcpu = getattr(signal, "SIGXCPU", None)
+        if sigxcpu is not None and returncode == -sigxcpu:
+            return True
+        cpu_usado = (uso or {}).get("cpu_s")
+        return (returncode == -getattr(signal, "SIGKILL", 9) and cpu_usado is not None
+                and cpu_usado >= int(self.cpu_s))
+
+    def _con_estado(self, res, ultima_solucion, estado, estadisticas, timeout):
+        """
+        Agrega al resultado el estado de la búsqueda, el objetivo y la cota.
+
+        Sin el marcador de fin de búsqueda (========== ) la última solución
+        no está probada óptima: se devuelve como SATISFIED.
+        """
+        if "error" in res:
+            if estado == UNSAT:
+                # Probado insatisfacible: lo dice el marcador aunque haya timeout
+                res["estado"] = UNSAT
+            elif (timeout and ultima_solucion is None and estado in (None, DESCONOCIDO)
+                  and not any(res.get(k) for k in ("cancelado", "sin_memoria", "limite_cpu"))):
+                res = dict(res)
+                res.setdefault("estado", DESCONOCIDO)
+                if not res.get("timeout") and (estado == DESCONOCIDO or "returncode" not in res):
+                    # --time-limit venció sin soluciones (=====UNKNOWN===== o salida vacía):
+                    # es un timeout, no un error de la instancia
+                    res.update(error=f"Timeout: no se encontró solución en {timeout} segundos", timeout=True)
+            return res
+        if estado is None and timeout and ultima_solucion is None:
+            # --time-limit venció sin soluciones y MiniZinc no imprimió nada
+            return {
+                "error": f"Timeout: no se encontró solución en {timeout} segundos",
+                "timeout": True,
+                "estado": DESCONOCIDO,
+            }
+
+        res = dict(res)
+        res["estado"] = OPTIMO if estado == OPTIMO else SATISFECHO
+        if res["estado"] == SATISFECHO and timeout:
+            res["tiempo_agotado"] = True
+
+        objetivo = res.get("polarizacion")
+        if not isinstance(objetivo, (int, float)):
+            return res
+        res["objetivo"] = objetivo
+        if res["estado"] == OPTIMO:
+            res["cota"] = objetivo
+            res["brecha"] = 0.0
+            return res
+
+        # El solver reporta objetivo y cota en la escala entera del modelo
+        # (polarizacion_scaled); la brecha relativa no depende de la escala
+        obj_escalado = estadisticas.get("objective")
+        cota_escalada = estadisticas.get("objectiveBound")
+        if isinstance(obj_escalado, float) and isinstance(cota_escalada, float) and obj_escalado > 0:
+            brecha = max(0.0, (obj_escalado - cota_escalada) / obj_escalado)
+            res["cota"] = objetivo * (1 - brecha)
+            res["brecha"] = brecha
+        return res
+
+    def cancel(self):
+        """
+        Cancela la ejecución en curso (si la hay) matando todo el árbol de
+        procesos de MiniZinc. Es seguro llamarlo desde otro hilo.
+        
+        Returns:
+            bool: True si había una ejecución que cancelar
+        """
+        proc = self._proc
+        if proc is None:
+            return False
+        self._detener(proc, "cancelado")
+        return True
+
+    def _detener(self, proc, motivo):
+        """Marca el motivo de fin y mata el árbol de procesos."""
+        if proc.returncode is None:
+            self._motivo_fin = motivo
+            if motivo == "timeout":
+                terminar_con_gracia(proc)
+            else:
+                terminar_arbol_procesos(proc)
 
+    @trazado("_parse_output")
     def _parse_output(self, output: str):
         """
         Parsea la salida de MiniZinc y extrae el JSON.
@@ -163,25 +664,62 @@ class MiniZincRunner:
         Returns:
             bool: True si el solver está disponible
         """
+        nombre = solver_name.lower()
+        return any(nombre in solver for solver in self.list_solvers())
+
+    def list_solvers(self, usar_cache=True):
+        """
+        Lista todos los solvers disponibles.
+        
+        El resultado se guarda en disco junto con el mtime del ejecutable de
+        MiniZinc, así que `minizinc --solvers` solo se vuelve a lanzar cuando
+        el ejecutable cambia (p. ej. tras una actualización).
+        
+        Args:
+            usar_cache: Si False, fuerza a consultar a MiniZinc
+            
+        Returns:
+            List[str]: Lista de nombres de solvers
+        """
+        clave, mtime = self._identidad_ejecutable()
+        if usar_cache:
+            solvers = _leer_cache_solvers(clave, mtime)
+            if solvers is not None:
+                # Cachés de versiones anteriores pueden incluir herramientas
+                return [s for s in solvers if s not in HERRAMIENTAS_NO_SOLVER]
+
+        solvers = self._descubrir_solvers()
+        if solvers:
+            _guardar_cache_solvers(clave, mtime, solvers)
+        return solvers
+
+    def _identidad_ejecutable(self):
+        """Ruta resuelta y mtime del ejecutable (para validar la caché)."""
+        ruta = Path(shutil.which(self.minizinc) or self.minizinc)
+        try:
+            return str(ruta.resolve()), ruta.stat().st_mtime
+        except OSError:
+            return str(ruta), None
+
+    def _descubrir_solvers(self):
+        """Consulta a MiniZinc la lista de solvers instalados."""
         try:
             proc = subprocess.run(
-                [self.minizinc, "--solvers"],
+                [self.minizinc, "--solvers-json"],
                 capture_output=True,
                 text=True,
                 timeout=5
             )
-            return solver_name.lower() in proc.stdout.lower()
+            if proc.returncode == 0:
+                # Cada solver se identifica por el último componente de su id
+                # (org.gecode.gecode -> gecode, org.minizinc.mip.coin-bc -> coin-bc)
+                return [conf["id"].split(".")[-1].lower() for conf in json.loads(proc.stdout)
+                        if _es_solver(conf)]
         #   Especificar errores de subproceso
-        except (subprocess.TimeoutExpired, OSError): 
-            return False
+        except (subprocess.TimeoutExpired, OSError, ValueError, KeyError, TypeError):
+            pass
 
-    def list_solvers(self):
-        """
-        Lista todos los solvers disponibles.
-        
-        Returns:
-            List[str]: Lista de nombres de solvers
-        """
+        # Versiones antiguas sin --solvers-json
         try:
             proc = subprocess.run(
                 [self.minizinc, "--solvers"],
@@ -196,7 +734,7 @@ class MiniZincRunner:
                 for line in lines:
                     # Típicamente: "Gecode 6.3.0" o "gecode"
                     parts = line.strip().split()
-                    if parts:
+                    if parts and parts[0].lower() not in HERRAMIENTAS_NO_SOLVER:
                         solvers.append(parts[0].lower())
                 return solvers
             return []
@@ -204,6 +742,54 @@ class MiniZincRunner:
         except (subprocess.TimeoutExpired, OSError):
             return []
 
+
+# CACHÉ DE SOLVERS EN DISCO
+def _leer_cache_solvers(clave, mtime):
+    """
+    Devuelve la lista de solvers cacheada para el ejecutable `clave`, o None
+    si no existe o si el ejecutable cambió desde que se guardó.
+    """
+    if mtime is None:
+        return None
+    with _lock_cache:
+        if clave in _cache_memoria and _cache_memoria[clave]["mtime"] == mtime:
+            return list(_cache_memoria[clave]["solvers"])
+    try:
+        datos = json.loads(CACHE_SOLVERS.read_text(encoding='utf-8'))
+        entrada = datos[clave]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if entrada.get("mtime") != mtime or not isinstance(entrada.get("solvers"), list):
+        return None
+    with _lock_cache:
+        _cache_memoria[clave] = entrada
+    return list(entrada["solvers"])
+
+
+def _guardar_cache_solvers(clave, mtime, solvers):
+    """Guarda la lista de solvers en disco (escritura atómica)."""
+    if mtime is None:
+        return
+    entrada = {"mtime": mtime, "solvers": list(solvers)}
+    with _lock_cache:
+        _cache_memoria[clave] = entrada
+        try:
+            try:
+                datos = json.loads(CACHE_SOLVERS.read_text(encoding='utf-8'))
+                if not isinstance(datos, dict):
+                    datos = {}
+            except (OSError, ValueError):
+                datos = {}
+            datos[clave] = entrada
+            CACHE_SOLVERS.parent.mkdir(parents=True, exist_ok=True)
+            tmp = CACHE_SOLVERS.with_name(f"{CACHE_SOLVERS.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(datos, indent=2), encoding='utf-8')
+            os.replace(tmp, CACHE_SOLVERS)
+        except OSError:
+            # La caché es una optimización: si no se puede escribir, se ignora
+            pass
+
+
 # FUNCIONES DE UTILIDAD
 def run_model_simple(mzn_path, dzn_path, solver="gecode", timeout=300):
     """
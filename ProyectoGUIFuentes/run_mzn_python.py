@@ -0,0 +1,186 @@
+# run_mzn_python.py
+"""
+Ejecutor de Proyecto.mzn en proceso, con el paquete de Python `minizinc`.
+
+A diferencia de run_mzn.MiniZincRunner, que lanza `minizinc` con un .dzn
+por instancia, aquí el modelo se carga y analiza una sola vez y cada
+instancia es una rama (Instance.branch()) a la que se le asignan los datos
+y, opcionalmente, restricciones extra. Las ramas se resuelven de forma
+asíncrona, varias a la vez, y los resultados se leen de las variables
+tipadas del modelo en lugar de raspar stdout.
+
+Requiere `pip install minizinc` además del ejecutable de MiniZinc.
+
+Uso:
+    runner = MiniZincPythonRunner(DEFAULT_MZN, solver="gecode")
+    resultado = runner.resolver(parsed, timeout=60)
+    resultados = runner.resolver_varios([parsed1, parsed2], timeout=60, concurrencia=4)
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+from fractions import Fraction
+from typing import Callable, Dict, Iterable, List, Optional
+
+from checkpoint import guardar_checkpoint
+from generar_dzn import CLAVES_MATRICES, datos_modelo, escalado_exacto
+from run_mzn import DESCONOCIDO, OPTIMO, SATISFECHO, UNSAT
+
+try:
+    import minizinc
+except ImportError:
+    minizinc = None
+
+
+class MiniZincPythonRunner:
+    def __init__(self, mzn_path, solver="gecode"):
+        """
+        Carga el modelo una vez.
+
+        Args:
+            mzn_path: Ruta al archivo .mzn
+            solver: Solver de MiniZinc (gecode, chuffed, ...)
+
+        Raises:
+            ImportError: Si el paquete `minizinc` no está instalado
+        """
+        if minizinc is None:
+            raise ImportError(
+                "No se encontró el paquete de Python 'minizinc'.\n"
+                "Instálalo con: pip install minizinc"
+            )
+        self.solver = solver
+        self.modelo = minizinc.Model(str(mzn_path))
+        self.instancia = minizinc.Instance(minizinc.Solver.lookup(solver), self.modelo)
+
+    async def resolver_async(self, parsed: Dict, timeout: Optional[float] = None,
+                             cotas=None, restricciones: Iterable[str] = (),
+                             on_solution: Optional[Callable[[Dict], None]] = None,
+                             threads=None, random_seed=None, free_search=False,
+                             arranque=None, checkpoint=None) -> Dict:
+        """
+        Resuelve una instancia en una rama del modelo cargado.
+
+        Args:
+            parsed: Dict de la instancia (salida de parse_input_text)
+            timeout: Tiempo máximo en segundos (None = sin límite)
+            cotas: (x_min, x_max) opcionales (ver generate_dzn)
+            restricciones: Restricciones MiniZinc extra, como texto
+            on_solution: Callback opcional para cada solución intermedia
+            arranque: (x_inicial, cota_polarizacion) opcionales (ver checkpoint.py)
+            checkpoint: Ruta donde guardar cada solución que mejora
+
+        Returns:
+            Dict con el mismo formato que MiniZincRunner.run
+        """
+        opciones = {"intermediate_solutions": True}
+        if timeout:
+            opciones["timeout"] = timedelta(seconds=timeout)
+        if threads and threads > 1:
+            opciones["processes"] = int(threads)
+        if random_seed is not None:
+            opciones["random_seed"] = int(random_seed)
+        if free_search:
+            opciones["free_search"] = True
+
+        esc = escalado_exacto(parsed)
+        ultimo = None
+        estado = None
+        with self.instancia.branch() as rama:
+            for nombre, valor in datos_modelo(parsed, cotas, arranque).items():
+                rama[nombre] = valor
+            for restriccion in restricciones:
+                rama.add_string(restriccion if restriccion.rstrip().endswith(";") else restriccion + ";")
+            try:
+                async for res in rama.solutions(**opciones):
+                    estado = res.status
+                    if res.solution is None:
+                        continue
+                    ultimo = (self._convertir(res.solution, parsed, esc), res.statistics)
+                    if checkpoint:
+                        try:
+                            guardar_checkpoint(checkpoint, ultimo[0])
+                        except OSError:
+                            pass
+                    if on_solution:
+                        on_solution(ultimo[0])
+            except minizinc.MiniZincError as e:
+                return {"error": str(e)}
+
+        return self._con_estado(ultimo, estado, timeout)
+
+    def resolver(self, parsed: Dict, **kwargs) -> Dict:
+        """Versión síncrona de resolver_async."""
+        return asyncio.run(self.resolver_async(parsed, **kwargs))
+
+    async def resolver_varios_async(self, instancias: Iterable[Dict], concurrencia=2, **kwargs) -> List[Dict]:
+        """Resuelve varias instancias a la vez (a lo sumo `concurrencia`), en orden de entrada."""
+        limite = asyncio.Semaphore(max(1, concurrencia))
+
+        async def una(parsed):
+            async with limite:
+                return await self.resolver_async(parsed, **kwargs)
+
+        return await asyncio.gather(*(una(parsed) for parsed in instancias))
+
+    def resolver_varios(self, instancias: Iterable[Dict], concurrencia=2, **kwargs) -> List[Dict]:
+        return asyncio.run(self.resolver_varios_async(instancias, concurrencia, **kwargs))
+
+    @staticmethod
+    def _convertir(solucion, parsed: Dict, esc: Dict) -> Dict:
+        """
+        Construye el dict de resultado a partir de las variables tipadas; si
+        el solver solo devolvió el texto de salida, se lee su JSON.
+        """
+        x = getattr(solucion, "x", None)
+        if x is None:
+            return json.loads(str(getattr(solucion, "_output_item", solucion)))
+
+        m = parsed['m']
+        factor_v = esc['factor_v']
+        mediana = esc['v_base'] + Fraction(solucion.mediana_scaled) * factor_v / 2
+        return {
+            "polarizacion": float(Fraction(solucion.polarizacion_scaled) * factor_v / 2),
+            "costo_usado": float(Fraction(solucion.costoTotal_scaled) / esc['escala_costo']),
+            "movimientos_usados": sum(abs(i - j) * x[i][j][k]
+                                      for i in range(m) for j in range(m) for k in range(3)),
+            "p_final": list(solucion.p_final),
+            "mediana": float(mediana),
+            "matrices_movimiento": {
+                clave: [[x[i][j][k] for j in range(m)] for i in range(m)]
+                for k, clave in enumerate(CLAVES_MATRICES)
+            },
+        }
+
+    @staticmethod
+    def _con_estado(ultimo, estado, timeout) -> Dict:
+        """Agrega estado, objetivo y cota (mismas claves que MiniZincRunner)."""
+        nombre_estado = getattr(estado, "name", None)
+        if ultimo is None:
+            if nombre_estado == UNSAT:
+                return {"error": "El modelo es insatisfacible", "estado": UNSAT}
+            if timeout:
+                return {"error": f"Timeout: no se encontró solución en {timeout} segundos",
+                        "timeout": True, "estado": DESCONOCIDO}
+            return {"error": "MiniZinc no devolvió solución", "estado": nombre_estado or DESCONOCIDO}
+
+        resultado, estadisticas = ultimo
+        resultado = dict(resultado)
+        optimo = nombre_estado == OPTIMO
+        resultado["estado"] = OPTIMO if optimo else SATISFECHO
+        if not optimo and timeout:
+            resultado["tiempo_agotado"] = True
+        objetivo = resultado.get("polarizacion")
+        if isinstance(objetivo, (int, float)):
+            resultado["objetivo"] = objetivo
+            if optimo:
+                resultado["cota"], resultado["brecha"] = objetivo, 0.0
+            else:
+                obj_escalado = estadisticas.get("objective")
+                cota_escalada = estadisticas.get("objectiveBound")
+                if isinstance(obj_escalado, (int, float)) and isinstance(cota_escalada, (int, float)) \
+                        and obj_escalado > 0:
+                    brecha = max(0.0, (obj_escalado - cota_escalada) / obj_escalado)
+                    resultado["cota"], resultado["brecha"] = objetivo * (1 - brecha), brecha
+        return resultado
@@ -0,0 +1,230 @@
+# seleccion_solver.py
+"""
+Selección automática de solver a partir del historial de ejecuciones.
+
+Cada ejecución registra las características de la instancia (n, m, holgura
+de ct y de maxMovs, dispersión de v) junto con el solver y su tiempo. Para
+el solver "auto" se buscan las k ejecuciones más parecidas de cada solver
+candidato (vecinos más cercanos) y se elige el de menor tiempo esperado.
+Los timeouts se penalizan (PAR10) y los errores descartan al solver, para
+no premiar a uno que abandona rápido.
+
+Para que el historial no quede fijado en el primer solver registrado, un
+candidato con menos de MIN_EXPLORACION ejecuciones a distancia RADIO_VECINDAD
+de la instancia se elige antes que el mejor puntaje (exploración mínima).
+El historial se recorta a los REGISTROS_CONSERVADOS más recientes cuando
+supera MAX_BYTES_HISTORIAL.
+"""
+
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from generar_dzn import PESOS_RESISTENCIA
+from run_mzn import CACHE_DIR
+
+HISTORIAL = CACHE_DIR / "historial_solvers.jsonl"
+
+# Solver usado cuando no hay historial para ninguno de los candidatos
+SOLVER_POR_DEFECTO = "gecode"
+
+# Vecinos por solver que se promedian
+K_VECINOS = 5
+
+# Penalización de ejecuciones sin solución: tiempo * PENALIZACION (PAR10)
+PENALIZACION = 10
+
+# Exploración: ejecuciones cercanas mínimas de cada candidato antes de confiar en los puntajes
+MIN_EXPLORACION = 2
+RADIO_VECINDAD = 0.2
+
+# Tamaño máximo del historial; al superarlo se conservan solo los registros más recientes
+MAX_BYTES_HISTORIAL = 4 * 1024 * 1024
+REGISTROS_CONSERVADOS = 5000
+
+_lock = threading.Lock()
+_cache = {"mtime": None, "registros": []}
+
+
+def caracteristicas(parsed: Dict) -> Dict[str, float]:
+    """
+    Características de una instancia usadas para compararla con otras.
+
+    - holgura_ct: ct relativo al costo de mover a todos lo más lejos posible
+    - holgura_movs: maxMovs relativo a n * (m - 1)
+    - dispersion_v: desviación estándar de v
+    """
+    n, m = parsed['n'], parsed['m']
+    costo_max = sum(
+        parsed['s'][i][k] * PESOS_RESISTENCIA[k] * max(i, m - 1 - i)
+        for i in range(m) for k in range(3)
+    )
+    movs_max = n * max(1, m - 1)
+    v = parsed['v']
+    media = sum(v) / m
+    return {
+        "n": n,
+        "m": m,
+        "holgura_ct": min(1.0, parsed['ct'] / costo_max) if costo_max else 1.0,
+        "holgura_movs": min(1.0, parsed['max_movs'] / movs_max),
+        "dispersion_v": math.sqrt(sum((x - media) ** 2 for x in v) / m),
+    }
+
+
+def _vector(c: Dict[str, float]) -> Tuple[float, ...]:
+    """Vector normalizado para la distancia (n y m en escala logarítmica)."""
+    return (
+        math.log2(1 + c["n"]) / 10,
+        math.log2(1 + c["m"]) / 10,
+        c["holgura_ct"],
+        c["holgura_movs"],
+        c["dispersion_v"],
+    )
+
+
+def registrar_ejecucion(parsed: Dict, solver: str, tiempo: float, resultado: Dict,
+                        path: Path = HISTORIAL):
+    """
+    Agrega una ejecución al historial (una línea JSON, escritura en modo append).
+    Los errores de escritura se ignoran: el historial es solo una ayuda.
+    """
+    if resultado.get("cancelado"):
+        return
+    if "error" not in resultado and not resultado.get("tiempo_agotado"):
+        estado = "ok"
+    elif resultado.get("timeout") or resultado.get("tiempo_agotado"):
+        estado = "timeout"
+    else:
+        estado = "error"
+    registro = {
+        "caracteristicas": caracteristicas(parsed),
+        "solver": solver,
+        "tiempo": round(tiempo, 4),
+        "estado": estado,
+        "fecha": time.time(),
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _lock:
+            with open(path, "a", encoding='utf-8') as f:
+                f.write(json.dumps(registro) + "\n")
+            if path.stat().st_size > MAX_BYTES_HISTORIAL:
+                _recortar(path)
+    except OSError:
+        pass
+
+
+def _recortar(path: Path):
+    """Deja en el historial solo los REGISTROS_CONSERVADOS más recientes (temporal + os.replace)."""
+    with open(path, encoding='utf-8') as f:
+        lineas = f.readlines()[-REGISTROS_CONSERVADOS:]
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding='utf-8') as f:
+        f.writelines(lineas)
+    os.replace(tmp, path)
+
+
+def cargar_historial(path: Path = HISTORIAL) -> List[Dict]:
+    """Lee el historial (cacheado en memoria mientras el archivo no cambie)."""
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return []
+    with _lock:
+        if _cache["mtime"] == mtime and _cache.get("path") == str(path):
+            return _cache["registros"]
+    registros = []
+    with open(path, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except ValueError:
+                continue
+    with _lock:
+        _cache.update({"mtime": mtime, "path": str(path), "registros": registros})
+    return registros
+
+
+def elegir_solver(parsed: Dict, candidatos: Iterable[str], k: int = K_VECINOS,
+                  path: Path = HISTORIAL) -> Tuple[str, Dict]:
+    """
+    Elige el solver con menor tiempo esperado para instancias parecidas.
+
+    Args:
+        parsed: Instancia a resolver
+        candidatos: Solvers disponibles
+        k: Vecinos por solver a promediar
+
+    Returns:
+        (solver, justificación) donde la justificación es un dict con el
+        puntaje de cada candidato y los vecinos usados
+    """
+    candidatos = [c for c in candidatos if c != "auto"]
+    objetivo = _vector(caracteristicas(parsed))
+    por_solver: Dict[str, List[Tuple[float, float]]] = {c: [] for c in candidatos}
+
+    for reg in cargar_historial(path):
+        solver = reg.get("solver")
+        if solver not in por_solver:
+            continue
+        try:
+            distancia = math.dist(objetivo, _vector(reg["caracteristicas"]))
+            tiempo = float(reg["tiempo"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if reg.get("estado") == "error":
+            # Un error rápido no debe parecer un buen tiempo
+            tiempo = math.inf
+        elif reg.get("estado") != "ok":
+            tiempo *= PENALIZACION
+        por_solver[solver].append((distancia, tiempo))
+
+    puntajes = {}
+    for solver, muestras in por_solver.items():
+        if not muestras:
+            continue
+        vecinos = heapq.nsmallest(k, muestras)
+        esperado = sum(t for _, t in vecinos) / len(vecinos)
+        puntajes[solver] = {
+            # None si algún vecino terminó en error (inf no es JSON válido)
+            "tiempo_esperado": esperado if math.isfinite(esperado) else None,
+            "vecinos": len(vecinos),
+            "distancia_media": sum(d for d, _ in vecinos) / len(vecinos),
+        }
+
+    if not puntajes:
+        elegido = SOLVER_POR_DEFECTO if SOLVER_POR_DEFECTO in candidatos or not candidatos else candidatos[0]
+        return elegido, {"motivo": "Sin historial para los solvers disponibles; se usa el solver por defecto",
+                         "puntajes": {}}
+
+    # Exploración mínima: el candidato con menos ejecuciones cercanas (el de
+    # por defecto primero en caso de empate) si no llega a MIN_EXPLORACION
+    cercanas = {c: sum(1 for d, _ in por_solver[c] if d <= RADIO_VECINDAD) for c in candidatos}
+    orden = sorted(candidatos, key=lambda c: (cercanas[c], c != SOLVER_POR_DEFECTO))
+    if cercanas[orden[0]] < MIN_EXPLORACION:
+        elegido = orden[0]
+        return elegido, {"motivo": (f"Exploración: {elegido} tiene {cercanas[elegido]} ejecuciones parecidas "
+                                    f"(mínimo {MIN_EXPLORACION})"),
+                         "puntajes": puntajes, "exploracion": True}
+
+    elegido = min(puntajes, key=lambda s: _esperado(puntajes[s]))
+    sin_datos = [c for c in candidatos if c not in puntajes]
+    razon = {
+        "motivo": (f"{elegido} tiene el menor tiempo esperado "
+                   f"({_esperado(puntajes[elegido]):.3f} s) en las {puntajes[elegido]['vecinos']} "
+                   f"ejecuciones más parecidas"),
+        "puntajes": puntajes,
+    }
+    if sin_datos:
+        razon["sin_historial"] = sin_datos
+    return elegido, razon
+
+
+def _esperado(puntaje: Dict) -> float:
+    tiempo = puntaje["tiempo_esperado"]
+    return math.inf if tiempo is None else tiempo
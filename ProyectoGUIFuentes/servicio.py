@@ -0,0 +1,355 @@
+# servicio.py
+"""
+Servicio HTTP local de MinPol con pool fijo de workers y cola acotada.
+
+Solo escucha en 127.0.0.1. Cada worker es un hilo que conduce un proceso
+de MiniZinc a la vez, así que nunca hay más de `workers` procesos de
+MiniZinc en ejecución; los trabajos en vuelo se pueden cancelar matando
+su árbol de procesos.
+
+Endpoints:
+    POST   /trabajos        Envía una instancia. Cuerpo JSON con 'texto' o las
+                            claves n, m, p, v, s, ct, max_movs; opcionalmente
+                            'solver' y 'timeout'. Responde 202 con {"id": ...},
+                            o 429 si la cola está llena.
+    GET    /trabajos/<id>   Estado, tiempos y resultado del trabajo.
+    DELETE /trabajos/<id>   Cancela el trabajo (en cola o en ejecución).
+    GET    /estado          Profundidad de cola, workers ocupados y caché.
+    GET    /metrics         Métricas en formato de texto de Prometheus (ver metricas.py).
+
+Uso:
+    python servicio.py --puerto 8765 -j 4 --cola 100 [--metricas-archivo minpol.prom]
+"""
+
+import argparse
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import metricas
+from generar_dzn import CLAVES_INSTANCIA, format_input_text, parse_input_text
+from pipeline import DEFAULT_MZN, CacheResultados, crear_runner, resolver_instancia
+
+HOST = "127.0.0.1"
+
+# Estados de un trabajo
+EN_COLA = "en_cola"
+EJECUTANDO = "ejecutando"
+TERMINADO = "terminado"
+ERROR = "error"
+CANCELADO = "cancelado"
+
+# Cada cuánto revisa un worker ocioso si el servicio se detuvo (segundos)
+ESPERA_COLA_S = 0.5
+
+
+class ColaLlena(Exception):
+    """La cola de trabajos alcanzó su capacidad máxima."""
+
+
+class Trabajo:
+    def __init__(self, trabajo_id, parsed, solver, timeout):
+        self.id = trabajo_id
+        self.parsed = parsed
+        self.solver = solver
+        self.timeout = timeout
+        self.estado = EN_COLA
+        self.resultado = None
+        self.runner = None
+        # Se activa al cancelar: resolver_instancia y MiniZincRunner.run lo
+        # revisan antes de empezar cada etapa
+        self.cancelado = threading.Event()
+        self.encolado_en = time.time()
+        self.iniciado_en = None
+        self.terminado_en = None
+
+    def a_dict(self):
+        """Representación JSON del trabajo."""
+        datos = {
+            "id": self.id,
+            "estado": self.estado,
+            "solver": self.solver,
+            "encolado_en": self.encolado_en,
+            "iniciado_en": self.iniciado_en,
+            "terminado_en": self.terminado_en,
+        }
+        if self.iniciado_en is not None:
+            datos["espera_s"] = self.iniciado_en - self.encolado_en
+        if self.terminado_en is not None and self.iniciado_en is not None:
+            datos["ejecucion_s"] = self.terminado_en - self.iniciado_en
+        if self.resultado is not None:
+            datos["resultado"] = self.resultado
+        return datos
+
+
+class ServicioMinPol:
+    def __init__(self, workers=2, capacidad_cola=100, mzn_path=DEFAULT_MZN,
+                 max_trabajos=10000, cache: Optional[CacheResultados] = None):
+        """
+        Args:
+            workers: Número fijo de workers (procesos de MiniZinc simultáneos)
+            capacidad_cola: Trabajos en espera admitidos antes de rechazar (429)
+            mzn_path: Modelo .mzn a usar
+            max_trabajos: Trabajos terminados que se recuerdan para consulta
+            cache: Caché de resultados compartida entre peticiones
+        """
+        self.workers = workers
+        self.mzn_path = mzn_path
+        self.max_trabajos = max_trabajos
+        self.cache = cache if cache is not None else CacheResultados()
+        self._cola = queue.Queue(maxsize=capacidad_cola)
+        self._trabajos = OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._hilos = []
+        self._detenido = threading.Event()
+
+    def iniciar(self):
+        self._detenido.clear()
+        for i in range(self.workers):
+            hilo = threading.Thread(target=self._bucle_worker, name=f"minpol-worker-{i+1}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def detener(self):
+        """
+        Detiene los workers y cancela lo que esté en ejecución. Los workers
+        ociosos lo notan en a lo sumo ESPERA_COLA_S, aunque la cola esté llena.
+        """
+        self._detenido.set()
+        with self._lock:
+            for trabajo in self._trabajos.values():
+                if trabajo.estado == EN_COLA:
+                    trabajo.estado = CANCELADO
+                    trabajo.terminado_en = time.time()
+                elif trabajo.estado == EJECUTANDO:
+                    trabajo.cancelado.set()
+                    if trabajo.runner:
+                        trabajo.runner.cancel()
+
+    def enviar(self, parsed: Dict, solver="gecode", timeout=None) -> str:
+        """
+        Encola una instancia.
+
+        Raises:
+            ColaLlena: Si no hay espacio en la cola (contrapresión)
+        """
+        trabajo = Trabajo(str(next(self._ids)), parsed, solver, timeout)
+        with self._lock:
+            try:
+                self._cola.put_nowait(trabajo)
+            except queue.Full:
+                raise ColaLlena(f"Cola llena ({self._cola.maxsize} trabajos en espera)")
+            self._trabajos[trabajo.id] = trabajo
+            self._podar()
+        metricas.fijar("minpol_cola_trabajos", self._cola.qsize())
+        return trabajo.id
+
+    def consultar(self, trabajo_id) -> Optional[Dict]:
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            return trabajo.a_dict() if trabajo else None
+
+    def cancelar(self, trabajo_id) -> Optional[Dict]:
+        """Cancela un trabajo. Devuelve su estado o None si no existe."""
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            if trabajo is None:
+                return None
+            if trabajo.estado == EN_COLA:
+                # El worker lo descartará al sacarlo de la cola
+                trabajo.estado = CANCELADO
+                trabajo.terminado_en = time.time()
+            elif trabajo.estado == EJECUTANDO:
+                trabajo.estado = CANCELADO
+                # Sin proceso de MiniZinc (canonización, vía exhaustiva, .dzn)
+                # runner.cancel() no hace nada: el evento evita que arranque
+                trabajo.cancelado.set()
+                if trabajo.runner:
+                    trabajo.runner.cancel()
+            return trabajo.a_dict()
+
+    def estado(self) -> Dict:
+        with self._lock:
+            ejecutando = sum(1 for t in self._trabajos.values() if t.estado == EJECUTANDO)
+            terminados = sum(1 for t in self._trabajos.values() if t.estado == TERMINADO)
+        return {
+            "workers": self.workers,
+            "workers_ocupados": ejecutando,
+            "en_cola": self._cola.qsize(),
+            "capacidad_cola": self._cola.maxsize,
+            "terminados": terminados,
+            "cache": self.cache.estadisticas(),
+        }
+
+    def _podar(self):
+        """Olvida los trabajos terminados más antiguos si hay demasiados."""
+        exceso = len(self._trabajos) - self.max_trabajos
+        if exceso <= 0:
+            return
+        for trabajo_id in list(self._trabajos):
+            if exceso <= 0:
+                break
+            if self._trabajos[trabajo_id].estado in (TERMINADO, ERROR, CANCELADO):
+                del self._trabajos[trabajo_id]
+                exceso -= 1
+
+    def _bucle_worker(self):
+        # El runner se reutiliza entre trabajos (y con él la caché de solvers).
+        # Sin MiniZinc es None y solo se resuelven las instancias que no lo necesitan
+        runner = crear_runner()
+
+        while not self._detenido.is_set():
+            try:
+                trabajo = self._cola.get(timeout=ESPERA_COLA_S)
+            except queue.Empty:
+                continue
+            with self._lock:
+                if trabajo.estado == CANCELADO or self._detenido.is_set():
+                    continue
+                trabajo.estado = EJECUTANDO
+                trabajo.iniciado_en = time.time()
+                trabajo.runner = runner
+            self._medir_ocupacion()
+
+            try:
+                resultado = resolver_instancia(
+                    trabajo.parsed, mzn_path=self.mzn_path, solver=trabajo.solver,
+                    timeout=trabajo.timeout, runner=runner, cache=self.cache,
+                    cancelado=trabajo.cancelado
+                )
+            except Exception as e:
+                # Un fallo inesperado (.dzn temporal, historial, checkpoint...) no
+                # debe matar al worker ni dejar el trabajo en ejecución para siempre
+                resultado = {"error": f"Error interno resolviendo el trabajo: {e}"}
+
+            with self._lock:
+                trabajo.runner = None
+                trabajo.terminado_en = time.time()
+                trabajo.resultado = resultado
+                if trabajo.estado != CANCELADO:
+                    trabajo.estado = ERROR if "error" in resultado else TERMINADO
+            self._medir_ocupacion()
+
+    def _medir_ocupacion(self):
+        """Actualiza los indicadores de cola y workers ocupados."""
+        if not metricas.activo():
+            return
+        with self._lock:
+            ejecutando = sum(1 for t in self._trabajos.values() if t.estado == EJECUTANDO)
+        metricas.fijar("minpol_workers_ocupados", ejecutando)
+        metricas.fijar("minpol_cola_trabajos", self._cola.qsize())
+
+
+def crear_manejador(servicio: ServicioMinPol):
+    """Crea la clase de manejador HTTP ligada a un servicio."""
+
+    class Manejador(BaseHTTPRequestHandler):
+        def _responder(self, codigo, datos, cabeceras=None):
+            cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            for clave, valor in (cabeceras or {}).items():
+                self.send_header(clave, valor)
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def _id_trabajo(self):
+            partes = self.path.strip("/").split("/")
+            if len(partes) == 2 and partes[0] == "trabajos":
+                return partes[1]
+            return None
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/estado":
+                return self._responder(200, servicio.estado())
+            if self.path.rstrip("/") == "/metrics":
+                cuerpo = metricas.texto_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+                return
+            trabajo_id = self._id_trabajo()
+            datos = servicio.consultar(trabajo_id) if trabajo_id else None
+            if datos is None:
+                return self._responder(404, {"error": "Trabajo no encontrado"})
+            self._responder(200, datos)
+
+        def do_DELETE(self):
+            trabajo_id = self._id_trabajo()
+            datos = servicio.cancelar(trabajo_id) if trabajo_id else None
+            if datos is None:
+                return self._responder(404, {"error": "Trabajo no encontrado"})
+            self._responder(200, datos)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/trabajos":
+                return self._responder(404, {"error": "Ruta no encontrada"})
+            try:
+                largo = int(self.headers.get("Content-Length", 0))
+                cuerpo = json.loads(self.rfile.read(largo) or b"{}")
+                if "texto" in cuerpo:
+                    parsed = parse_input_text(cuerpo["texto"])
+                elif all(clave in cuerpo for clave in CLAVES_INSTANCIA):
+                    parsed = parse_input_text(format_input_text(cuerpo))
+                else:
+                    raise ValueError("Se requiere 'texto' o las claves " + ", ".join(CLAVES_INSTANCIA))
+                timeout = cuerpo.get("timeout")
+                timeout = float(timeout) if timeout else None
+                solver = str(cuerpo.get("solver", "gecode"))
+            except (ValueError, TypeError, KeyError) as e:
+                return self._responder(400, {"error": str(e)})
+
+            try:
+                trabajo_id = servicio.enviar(parsed, solver=solver, timeout=timeout)
+            except ColaLlena as e:
+                return self._responder(429, {"error": str(e)}, {"Retry-After": "1"})
+            self._responder(202, {"id": trabajo_id, "estado": EN_COLA})
+
+        def log_message(self, formato, *args):
+            # Silenciar el log por petición de BaseHTTPRequestHandler
+            pass
+
+    return Manejador
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio local de resolución de MinPol")
+    parser.add_argument("--puerto", type=int, default=8765, help="Puerto en 127.0.0.1")
+    parser.add_argument("-j", "--workers", type=int, default=2, help="Workers (procesos de MiniZinc simultáneos)")
+    parser.add_argument("--cola", type=int, default=100, help="Capacidad máxima de la cola de espera")
+    parser.add_argument("--mzn", default=DEFAULT_MZN, help="Modelo .mzn a usar")
+    parser.add_argument("--metricas-archivo", default=None,
+                        help="Además de /metrics, reescribir las métricas en este archivo cada 5 s")
+    args = parser.parse_args(argv)
+
+    # El servicio siempre expone /metrics
+    metricas.activar()
+    exportador = metricas.ExportadorArchivo(args.metricas_archivo) if args.metricas_archivo else None
+    if exportador:
+        exportador.iniciar()
+    servicio = ServicioMinPol(workers=args.workers, capacidad_cola=args.cola, mzn_path=args.mzn)
+    servicio.iniciar()
+    servidor = ThreadingHTTPServer((HOST, args.puerto), crear_manejador(servicio))
+    print(f"Servicio MinPol escuchando en http://{HOST}:{args.puerto} ({args.workers} workers)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servicio.detener()
+        if exportador:
+            exportador.detener()
+
+
+if __name__ == "__main__":
+    main()
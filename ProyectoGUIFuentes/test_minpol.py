@@ -0,0 +1,47 @@
+# test_minpol.py
+"""
+Pruebas de regresión de la línea de comandos.
+
+Uso:
+    cd ProyectoGUIFuentes
+    python -m unittest test_minpol
+"""
+
+import io
+import json
+import unittest
+
+import minpol
+
+# v con tantos decimales que el escalado entero exacto no entra en 64 bits
+LINEA_DESBORDA = json.dumps({
+    "id": "desborda", "n": 1000, "m": 3, "p": [300, 300, 400],
+    "v": [0.1234567890123456, 0.5, 0.9876543210987654],
+    "s": [[100, 100, 100], [100, 100, 100], [100, 150, 150]], "ct": 25, "max_movs": 5,
+})
+
+LINEA_CHICA = json.dumps({
+    "id": "chica", "n": 10, "m": 3, "p": [3, 3, 4], "v": [0.1, 0.5, 0.9],
+    "s": [[1, 1, 1], [1, 1, 1], [1, 2, 1]], "ct": 10, "max_movs": 5,
+})
+
+
+class TestJsonl(unittest.TestCase):
+
+    def test_escalado_imposible_solo_falla_su_instancia(self):
+        args = minpol.construir_parser().parse_args(["--jsonl"])
+        tareas = minpol.tareas_desde_jsonl(io.StringIO(LINEA_DESBORDA + "\n" + LINEA_CHICA + "\n"))
+        out = io.StringIO()
+
+        errores = minpol.procesar(tareas, args, out=out)
+
+        lineas = {linea["id"]: linea for linea in map(json.loads, out.getvalue().splitlines())}
+        self.assertEqual(errores, 1)
+        self.assertEqual(lineas["desborda"]["estado"], "error")
+        self.assertIn("decimales", lineas["desborda"]["error"])
+        # La instancia chica se resuelve por la vía exhaustiva, sin MiniZinc
+        self.assertEqual(lineas["chica"]["estado"], "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
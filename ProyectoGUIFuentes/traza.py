@@ -0,0 +1,156 @@
+# traza.py
+"""
+Trazas ligeras del pipeline (parseo, .dzn, MiniZinc, salida, lotes).
+
+Desactivadas por defecto: tramo() devuelve entonces un contexto vacío
+compartido y @trazado solo comprueba una bandera, así que el costo es
+despreciable. Se activan con activar() o con la variable de entorno
+MINPOL_TRAZA=1 (la heredan los procesos hijos de los lotes).
+
+Uso:
+    with tramo("generate_dzn", m=parsed['m']):
+        ...
+    exportar_chrome("traza.json")   # abrir en chrome://tracing o ui.perfetto.dev
+    print(tabla_resumen())
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List
+
+_activo = os.environ.get("MINPOL_TRAZA", "") not in ("", "0")
+_eventos: List[Dict] = []
+_lock = threading.Lock()
+_NULO = contextlib.nullcontext()
+
+
+def activar():
+    """Activa la captura (también en los procesos hijos que se creen después)."""
+    global _activo
+    _activo = True
+    os.environ["MINPOL_TRAZA"] = "1"
+
+
+def desactivar():
+    global _activo
+    _activo = False
+    os.environ.pop("MINPOL_TRAZA", None)
+
+
+def activo() -> bool:
+    return _activo
+
+
+def ahora_us() -> float:
+    """Reloj monótono en µs (común a todos los procesos de la máquina)."""
+    return time.perf_counter_ns() / 1000
+
+
+def registrar(nombre: str, inicio_us: float, duracion_us: float, **args):
+    """Agrega un tramo ya medido (inicio en la escala de perf_counter, en µs)."""
+    if not _activo:
+        return
+    evento = {
+        "name": nombre,
+        "ph": "X",
+        "ts": inicio_us,
+        "dur": duracion_us,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    if args:
+        evento["args"] = args
+    with _lock:
+        _eventos.append(evento)
+
+
+@contextlib.contextmanager
+def _tramo_activo(nombre, args):
+    inicio = ahora_us()
+    try:
+        yield
+    finally:
+        registrar(nombre, inicio, ahora_us() - inicio, **args)
+
+
+def tramo(nombre: str, **args):
+    """Context manager que mide un tramo con nombre (no hace nada si está desactivado)."""
+    if not _activo:
+        return _NULO
+    return _tramo_activo(nombre, args)
+
+
+def trazado(nombre: str = None):
+    """Decorador: mide cada llamada a la función como un tramo."""
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*a, **kw):
+            if not _activo:
+                return funcion(*a, **kw)
+            with _tramo_activo(etiqueta, {}):
+                return funcion(*a, **kw)
+        return envoltura
+    return decorador
+
+
+def eventos() -> List[Dict]:
+    with _lock:
+        return list(_eventos)
+
+
+def reiniciar():
+    with _lock:
+        _eventos.clear()
+
+
+def exportar_chrome(path: str, extra: Iterable[Dict] = ()):
+    """
+    Escribe los eventos en formato Chrome Trace (JSON), legible por
+    chrome://tracing y Perfetto. `extra` permite sumar eventos de otros
+    procesos (ver cargar_eventos).
+    """
+    datos = {"traceEvents": eventos() + list(extra), "displayTimeUnit": "ms"}
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump(datos, f)
+
+
+def cargar_eventos(path: str) -> List[Dict]:
+    """Lee los eventos de un archivo escrito por exportar_chrome."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get("traceEvents", [])
+
+
+def resumen(lista: Iterable[Dict] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Agrega los tramos por nombre: cantidad, total, media y máximo (en ms).
+    """
+    por_nombre: Dict[str, List[float]] = {}
+    for evento in (eventos() if lista is None else lista):
+        if evento.get("ph") == "X":
+            por_nombre.setdefault(evento["name"], []).append(evento["dur"] / 1000)
+    return {
+        nombre: {
+            "llamadas": len(duraciones),
+            "total_ms": sum(duraciones),
+            "media_ms": sum(duraciones) / len(duraciones),
+            "max_ms": max(duraciones),
+        }
+        for nombre, duraciones in por_nombre.items()
+    }
+
+
+def tabla_resumen(lista: Iterable[Dict] = None) -> str:
+    """Tabla de texto del resumen, ordenada por tiempo total."""
+    filas = sorted(resumen(lista).items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+    ancho = max([len("tramo")] + [len(nombre) for nombre, _ in filas])
+    lineas = [f"{'tramo':<{ancho}} {'llamadas':>9} {'total ms':>12} {'media ms':>10} {'max ms':>10}"]
+    for nombre, r in filas:
+        lineas.append(f"{nombre:<{ancho}} {r['llamadas']:>9} {r['total_ms']:>12.2f} "
+                      f"{r['media_ms']:>10.2f} {r['max_ms']:>10.2f}")
+    return "\n".join(lineas)
@@ -0,0 +1,349 @@
+# verificador.py
+"""
+Verificador independiente de soluciones del problema MinPol.
+
+Recalcula con NumPy, a partir de la instancia parseada y de la solución
+(matrices de movimiento o solo p_final), el costo, los movimientos, la
+distribución final, la mediana y la polarización, y reporta cualquier
+restricción violada. Los cálculos usan el mismo escalado entero exacto que
+Proyecto.mzn (generar_dzn.escalado_exacto), así que no hay redondeos.
+
+Incluye un modo por lotes que verifica miles de archivos de resultado en
+paralelo usando varios procesos.
+"""
+
+import json
+import os
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from generar_dzn import CLAVES_MATRICES, escalado_exacto, parse_input_text
+from generar_salida import parse_output_text
+
+# Tolerancia para comparar valores reportados en punto flotante
+TOLERANCIA = 1e-6
+
+
+def matrices_a_x(matrices: Dict, m: int) -> np.ndarray:
+    """
+    Convierte el dict 'matrices_movimiento' en un arreglo x[i, j, k].
+
+    Args:
+        matrices: Dict con las claves resistencia_baja/media/alta (m x m cada una)
+        m: Número de opiniones
+
+    Returns:
+        np.ndarray de forma (m, m, 3)
+
+    Raises:
+        ValueError: Si alguna matriz falta o no tiene forma m x m
+    """
+    capas = []
+    for clave in CLAVES_MATRICES:
+        if clave not in matrices:
+            raise ValueError(f"Falta la matriz '{clave}' en matrices_movimiento")
+        capa = np.asarray(matrices[clave], dtype=np.int64)
+        if capa.shape != (m, m):
+            raise ValueError(f"La matriz '{clave}' debe ser {m}x{m}, pero es {capa.shape}")
+        capas.append(capa)
+    return np.stack(capas, axis=2)
+
+
+def calcular_mediana_doble(p_final: np.ndarray, v_int: np.ndarray) -> int:
+    """
+    Calcula 2 * mediana (en la escala entera) de las opiniones de la población.
+
+    Replica el modelo: con n impar es el doble del valor central; con n par
+    la suma de los dos centrales, así el promedio es exacto.
+    """
+    n = int(p_final.sum())
+    if n <= 0:
+        return 0
+
+    orden = np.argsort(v_int, kind="stable")
+    acumulado = np.cumsum(p_final[orden])
+    valores = v_int[orden]
+
+    if n % 2 == 1:
+        pos = np.searchsorted(acumulado, n // 2 + 1, side="left")
+        return 2 * int(valores[pos])
+
+    pos_baja, pos_alta = np.searchsorted(acumulado, [n // 2, n // 2 + 1], side="left")
+    return int(valores[pos_baja]) + int(valores[pos_alta])
+
+
+def verificar_solucion(parsed: Dict, resultado: Dict) -> Dict:
+    """
+    Verifica una solución contra su instancia y recalcula todas las métricas.
+
+    Args:
+        parsed: Dict de la instancia (salida de parse_input_text)
+        resultado: Dict con 'matrices_movimiento' y/o 'p_final', y opcionalmente
+            los valores reportados (polarizacion, costo_usado, movimientos_usados, mediana)
+
+    Returns:
+        Dict con 'valido', 'violaciones', 'advertencias' y los valores recalculados
+    """
+    m = parsed['m']
+    n = parsed['n']
+    s = np.asarray(parsed['s'], dtype=np.int64)
+    p = np.asarray(parsed['p'], dtype=np.int64)
+    esc = escalado_exacto(parsed)
+    v_int = np.asarray(esc['v_int'], dtype=np.int64)
+
+    violaciones: List[str] = []
+    advertencias: List[str] = []
+    recalculado: Dict = {}
+
+    matrices = resultado.get("matrices_movimiento")
+    if matrices:
+        try:
+            x = matrices_a_x(matrices, m)
+        except ValueError as e:
+            return {"valido": False, "violaciones": [str(e)], "advertencias": [], "recalculado": {}}
+
+        idx = np.arange(m)
+        distancia = np.abs(idx[:, None] - idx[None, :])
+
+        if (x < 0).any():
+            violaciones.append("Hay movimientos negativos en x")
+
+        diagonal = x[idx, idx, :]
+        if diagonal.any():
+            ops = sorted({int(i) + 1 for i in np.nonzero(diagonal)[0]})
+            violaciones.append(f"Movimientos hacia la misma opinión en {ops}")
+
+        salidas = x.sum(axis=1)  # (m, 3): personas que salen de (i, k)
+        exceso = salidas > s
+        if exceso.any():
+            for i, k in zip(*np.nonzero(exceso)):
+                violaciones.append(
+                    f"Opinión {i+1}, resistencia {k+1}: se mueven {salidas[i, k]} "
+                    f"pero solo hay {s[i, k]}"
+                )
+
+        movs_por_par = (distancia[:, :, None] * x)
+        movimientos = int(movs_por_par.sum())
+        if movimientos > parsed['max_movs']:
+            violaciones.append(f"Movimientos {movimientos} exceden maxMovs = {parsed['max_movs']}")
+
+        # Costo entero exacto, igual que costoTotal_scaled en el modelo
+        costo_int = int((movs_por_par * np.asarray(esc['peso_costo'], dtype=np.int64)).sum())
+        costo = float(costo_int / esc['escala_costo'])
+        if costo_int > esc['ct_int']:
+            violaciones.append(f"Costo {costo} excede ct = {parsed['ct']}")
+
+        p_final = p + x.sum(axis=(0, 2)) - x.sum(axis=(1, 2))
+        recalculado["movimientos_usados"] = movimientos
+        recalculado["costo_usado"] = costo
+
+        if "p_final" in resultado and list(resultado["p_final"]) != p_final.tolist():
+            violaciones.append(
+                f"p_final reportado {list(resultado['p_final'])} no coincide con el "
+                f"recalculado {p_final.tolist()}"
+            )
+    elif "p_final" in resultado:
+        p_final = np.asarray(resultado["p_final"], dtype=np.int64)
+        if p_final.shape != (m,):
+            return {
+                "valido": False,
+                "violaciones": [f"p_final debe tener {m} elementos, pero tiene {p_final.size}"],
+                "advertencias": [],
+                "recalculado": {},
+            }
+        advertencias.append("Sin matrices de movimiento: no se verifican costo ni movimientos")
+    else:
+        return {
+            "valido": False,
+            "violaciones": ["El resultado no contiene matrices_movimiento ni p_final"],
+            "advertencias": [],
+            "recalculado": {},
+        }
+
+    if (p_final < 0).any():
+        violaciones.append(f"p_final tiene valores negativos: {p_final.tolist()}")
+    if int(p_final.sum()) != n:
+        violaciones.append(f"La suma de p_final ({int(p_final.sum())}) no es igual a n ({n})")
+
+    mediana_doble = calcular_mediana_doble(np.maximum(p_final, 0), v_int)
+    polarizacion_doble = int((p_final * np.abs(2 * v_int - mediana_doble)).sum())
+
+    recalculado["p_final"] = p_final.tolist()
+    # Convertir a unidades originales con fracciones exactas
+    recalculado["mediana"] = float(esc['v_base'] + esc['factor_v'] * Fraction(mediana_doble, 2))
+    recalculado["polarizacion"] = float(esc['factor_v'] * Fraction(polarizacion_doble, 2))
+
+    # Comparar contra los valores reportados
+    for clave in ("polarizacion", "costo_usado", "movimientos_usados", "mediana"):
+        if clave in resultado and clave in recalculado:
+            try:
+                reportado = float(resultado[clave])
+            except (TypeError, ValueError):
+                violaciones.append(f"Valor reportado no numérico en '{clave}': {resultado[clave]!r}")
+                continue
+            if abs(reportado - recalculado[clave]) > TOLERANCIA * max(1.0, abs(reportado)):
+                violaciones.append(
+                    f"'{clave}' reportado {reportado} difiere del recalculado {recalculado[clave]}"
+                )
+
+    return {
+        "valido": not violaciones,
+        "violaciones": violaciones,
+        "advertencias": advertencias,
+        "recalculado": recalculado,
+    }
+
+
+def cargar_resultado(path: str) -> Dict:
+    """
+    Carga un resultado desde un .json (salida del modelo) o un .txt
+    (formato de salida del proyecto).
+    """
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix.lower() == ".json":
+        return json.loads(text)
+    return parse_output_text(text)
+
+
+def verificar_archivos(entrada_path: str, resultado_path: str) -> Dict:
+    """
+    Verifica un par (instancia .txt, resultado .json/.txt).
+
+    Nunca lanza excepción: los errores de lectura se reportan como violaciones.
+    """
+    try:
+        parsed = parse_input_text(Path(entrada_path).read_text(encoding='utf-8'))
+        resultado = cargar_resultado(resultado_path)
+        reporte = verificar_solucion(parsed, resultado)
+    except (OSError, ValueError) as e:
+        reporte = {"valido": False, "violaciones": [f"Error leyendo archivos: {e}"],
+                   "advertencias": [], "recalculado": {}}
+    reporte["entrada"] = str(entrada_path)
+    reporte["resultado"] = str(resultado_path)
+    return reporte
+
+
+def _verificar_par(par: Tuple[str, str]) -> Dict:
+    return verificar_archivos(*par)
+
+
+def verificar_lote(pares: Iterable[Tuple[str, str]], workers: Optional[int] = None) -> List[Dict]:
+    """
+    Verifica muchos pares (instancia, resultado) en paralelo.
+
+    Args:
+        pares: Iterable de tuplas (ruta_entrada, ruta_resultado)
+        workers: Número de procesos (None = número de CPUs)
+
+    Returns:
+        Lista de reportes en el mismo orden de los pares
+    """
+    pares = [(str(a), str(b)) for a, b in pares]
+    if not pares:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pares) < 2 * workers:
+        return [_verificar_par(par) for par in pares]
+
+    # Bloques grandes para amortizar el costo de comunicación entre procesos
+    chunksize = max(1, len(pares) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_verificar_par, pares, chunksize=chunksize))
+
+
+# Extensiones que se quitan del nombre de archivo para obtener el nombre de la instancia
+EXTENSIONES_NOMBRE = (".txt", ".json", ".salida")
+
+# Sufijo de las salidas .txt que pueden convivir con las entradas en un directorio
+SUFIJO_SALIDA = ".salida.txt"
+
+
+def nombre_instancia(path) -> str:
+    """
+    Nombre de la instancia de un archivo de entrada o de resultado: el nombre
+    sin sus extensiones finales .txt/.json/.salida (Prueba1.txt,
+    Prueba1.txt.txt, Prueba1.json y Prueba1.salida.txt -> Prueba1).
+    """
+    nombre = Path(path).name
+    while True:
+        extension = next((e for e in EXTENSIONES_NOMBRE if nombre.lower().endswith(e)), None)
+        if extension is None or len(nombre) == len(extension):
+            return nombre
+        nombre = nombre[:-len(extension)]
+
+
+def emparejar_archivos(dir_entradas: str, dir_resultados: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Empareja cada instancia .txt con su resultado según nombre_instancia.
+
+    Regla de nombres, en orden de preferencia: <nombre>.json (salida del
+    modelo), <nombre>.salida.txt y <nombre>.txt (salida de generate_output_txt).
+    Si los resultados están en el mismo directorio que las entradas, los .txt
+    sin el sufijo .salida.txt son entradas y no se toman como resultado.
+
+    Returns:
+        (pares, sin_resultado): pares (entrada, resultado) y las entradas que
+        no tienen ningún resultado
+    """
+    dir_entradas, dir_resultados = Path(dir_entradas), Path(dir_resultados)
+    mismo_directorio = dir_entradas.resolve() == dir_resultados.resolve()
+    entradas = sorted(p for p in dir_entradas.glob("*.txt")
+                      if not (mismo_directorio and p.name.lower().endswith(SUFIJO_SALIDA)))
+
+    def prioridad(res: Path):
+        nombre = res.name.lower()
+        if nombre.endswith(".json"):
+            return 0
+        if nombre.endswith(SUFIJO_SALIDA):
+            return 1
+        if nombre.endswith(".txt") and not mismo_directorio:
+            return 2
+        return None
+
+    resultados = {}
+    for res in sorted(dir_resultados.iterdir()):
+        orden = prioridad(res)
+        if orden is None or not res.is_file():
+            continue
+        clave = nombre_instancia(res)
+        if clave not in resultados or orden < resultados[clave][0]:
+            resultados[clave] = (orden, res)
+
+    pares, sin_resultado = [], []
+    for entrada in entradas:
+        encontrado = resultados.get(nombre_instancia(entrada))
+        if encontrado is None:
+            sin_resultado.append(str(entrada))
+        else:
+            pares.append((str(entrada), str(encontrado[1])))
+    return pares, sin_resultado
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Verifica resultados de MinPol contra sus instancias")
+    parser.add_argument("entradas", help="Directorio con las instancias .txt")
+    parser.add_argument("resultados", help="Directorio con los resultados .json/.txt")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Procesos en paralelo")
+    args = parser.parse_args()
+
+    pares, sin_resultado = emparejar_archivos(args.entradas, args.resultados)
+    reportes = verificar_lote(pares, args.workers)
+    invalidos = [r for r in reportes if not r["valido"]]
+    for r in invalidos:
+        print(f"❌ {r['resultado']}")
+        for v in r["violaciones"]:
+            print(f"   - {v}")
+    for entrada in sin_resultado:
+        print(f"⚠️ Sin resultado: {entrada}")
+    print(f"Verificados: {len(reportes)} | Válidos: {len(reportes) - len(invalidos)} | "
+          f"Inválidos: {len(invalidos)} | Sin resultado: {len(sin_resultado)}")
+    sys.exit(1 if invalidos or sin_resultado else 0)
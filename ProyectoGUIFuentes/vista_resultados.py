@@ -0,0 +1,133 @@
+# vista_resultados.py
+"""
+Vista paginada de resultados para la interfaz gráfica.
+
+Con m grande, volcar el JSON completo del resultado (o el .dzn) en un
+Multiline de Tk congela la ventana durante segundos. Aquí el resultado se
+prepara una sola vez, en el hilo que ejecuta MiniZinc, en un resumen corto
+y en dos tablas que la GUI muestra de a una página:
+
+    p_final       una fila por opinión (inicial, final y diferencia)
+    movimientos   solo los movimientos no nulos (origen, destino,
+                  resistencia, personas), ordenados por origen y destino
+
+Cada actualización de la ventana convierte a listas a lo sumo
+FILAS_POR_PAGINA filas, sin importar el tamaño de la instancia. No importa
+PySimpleGUI, así que se puede usar y probar sin interfaz. NumPy se importa
+recién al construir una VistaResultado (en el hilo del solver), para no
+demorar la apertura de la ventana.
+"""
+
+import json
+import math
+from typing import Dict, List, Optional, Sequence
+
+from generar_dzn import CLAVES_MATRICES
+
+FILAS_POR_PAGINA = 200
+
+# Límites para los textos largos que se muestran en un Multiline o un popup
+MAX_LINEAS_TEXTO = 300
+MAX_CARACTERES_LINEA = 200
+
+NOMBRES_RESISTENCIA = ("baja", "media", "alta")
+
+ENCABEZADOS = {
+    "p_final": ["Opinión", "Inicial", "Final", "Diferencia"],
+    "movimientos": ["Origen", "Destino", "Resistencia", "Personas"],
+}
+
+
+def recortar_texto(texto: str, max_lineas: int = MAX_LINEAS_TEXTO,
+                   max_caracteres: int = MAX_CARACTERES_LINEA, aviso: str = "") -> str:
+    """
+    Primeras `max_lineas` líneas de `texto`, cada una cortada a
+    `max_caracteres`, con una nota de cuánto se omitió (y `aviso`, por
+    ejemplo dónde está el archivo completo).
+    """
+    lineas = []
+    restantes = 0
+    inicio = 0
+    while inicio <= len(texto):
+        fin = texto.find("\n", inicio)
+        if fin < 0:
+            fin = len(texto)
+        if len(lineas) < max_lineas:
+            linea = texto[inicio:fin]
+            if len(linea) > max_caracteres:
+                linea = linea[:max_caracteres] + f" … (+{len(linea) - max_caracteres} caracteres)"
+            lineas.append(linea)
+        else:
+            # Contar lo omitido sin recorrerlo línea por línea
+            restantes = texto.count("\n", inicio) + 1
+            break
+        inicio = fin + 1
+    if restantes:
+        lineas.append(f"… {restantes} líneas más omitidas. {aviso}".rstrip())
+    return "\n".join(lineas)
+
+
+class VistaResultado:
+    """Resumen y tablas paginadas de un resultado exitoso."""
+
+    def __init__(self, resultado: Dict, p_inicial: Optional[Sequence[int]] = None,
+                 filas_por_pagina: int = FILAS_POR_PAGINA):
+        import numpy as np
+
+        self.resultado = resultado
+        self.filas_por_pagina = filas_por_pagina
+        p_final = np.asarray(resultado.get("p_final") or [], dtype=np.int64)
+        if p_inicial is not None and len(p_inicial) == len(p_final):
+            p_ini = np.asarray(p_inicial, dtype=np.int64)
+        else:
+            p_ini = None
+        self._p_final = p_final
+        self._p_inicial = p_ini
+        self._movimientos = self._movimientos_no_nulos(resultado.get("matrices_movimiento") or {})
+
+    @staticmethod
+    def _movimientos_no_nulos(matrices: Dict):
+        """Arreglo (k, 4) con (origen, destino, resistencia, personas) de cada x > 0."""
+        import numpy as np
+
+        capas = [np.asarray(matrices[clave], dtype=np.int64) for clave in CLAVES_MATRICES if clave in matrices]
+        if len(capas) != len(CLAVES_MATRICES) or capas[0].ndim != 2:
+            return np.zeros((0, 4), dtype=np.int64)
+        x = np.stack(capas, axis=2)
+        indices = np.argwhere(x > 0)
+        return np.column_stack((indices, x[tuple(indices.T)]))
+
+    def filas(self, tabla: str) -> int:
+        return len(self._p_final) if tabla == "p_final" else len(self._movimientos)
+
+    def paginas(self, tabla: str) -> int:
+        return max(1, math.ceil(self.filas(tabla) / self.filas_por_pagina))
+
+    def pagina(self, tabla: str, numero: int) -> List[List]:
+        """Filas de la página `numero` (desde 0) de la tabla, listas para un sg.Table."""
+        numero = min(max(numero, 0), self.paginas(tabla) - 1)
+        desde = numero * self.filas_por_pagina
+        hasta = desde + self.filas_por_pagina
+        if tabla == "p_final":
+            final = self._p_final[desde:hasta]
+            opiniones = range(desde + 1, desde + 1 + len(final))
+            if self._p_inicial is None:
+                return [[j, "", f, ""] for j, f in zip(opiniones, final.tolist())]
+            inicial = self._p_inicial[desde:hasta]
+            return [[j, a, b, f"{b - a:+d}"]
+                    for j, a, b in zip(opiniones, inicial.tolist(), final.tolist())]
+        return [[i + 1, j + 1, NOMBRES_RESISTENCIA[k], c]
+                for i, j, k, c in self._movimientos[desde:hasta].tolist()]
+
+    def resumen(self) -> str:
+        """Texto corto con los valores escalares del resultado y el tamaño de las tablas."""
+        lineas = []
+        for clave, valor in self.resultado.items():
+            if clave in ("p_final", "matrices_movimiento"):
+                continue
+            if isinstance(valor, (dict, list)):
+                valor = json.dumps(valor, ensure_ascii=False)
+            lineas.append(f"{clave}: {valor}")
+        lineas.append(f"opiniones: {len(self._p_final)}")
+        lineas.append(f"movimientos no nulos: {len(self._movimientos)}")
+        return recortar_texto("\n".join(lineas))